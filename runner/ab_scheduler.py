@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Interleaved A/B execution of baseline and RPT binaries.
+
+Instead of running all RPT reps, rebuilding, then all baseline reps, both
+binaries stay open side by side (read-only sessions on the same database)
+and every round runs each mode once in a randomized order. Per query:
+
+  1. warm up until the last --warmup-window timings of both modes have a
+     coefficient of variation below --warmup-cv (steady state), for at most
+     --max-warmup rounds and half of the query's share of --time-budget
+  2. record rounds until the bootstrap confidence interval of the speedup
+     is narrower than --target-ci (relative half-width), or the query's
+     share of --time-budget or --max-reps is used up
+
+Writes ssb_baseline.csv and ssb_rpt.csv (same columns as run_experiments.py)
+plus ab_summary.csv into --out-dir.
+"""
+
+import argparse
+import csv
+import random
+import time
+from pathlib import Path
+from statistics import mean, median, stdev
+
+from duckdb_session import SESSION_KINDS, open_session
+from run_experiments import CSV_FIELDS, QUERIES, format_seconds
+
+MODES = ("baseline", "rpt")
+
+SUMMARY_FIELDS = ["query", "reps", "warmup_runs", "speedup", "ci_low", "ci_high",
+                  "ci_half_width", "converged", "seconds"]
+
+
+def coefficient_of_variation(values):
+    if len(values) < 2 or mean(values) == 0:
+        return float("inf")
+    return stdev(values) / mean(values)
+
+
+def bootstrap_speedup_ci(baseline, rpt, rng, resamples=1000, confidence=0.95):
+    """Percentile bootstrap CI for median(baseline) / median(rpt)."""
+    ratios = []
+    for _ in range(resamples):
+        b = median(rng.choices(baseline, k=len(baseline)))
+        r = median(rng.choices(rpt, k=len(rpt)))
+        if r > 0:
+            ratios.append(b / r)
+    ratios.sort()
+    alpha = (1 - confidence) / 2
+    lo = ratios[int(alpha * (len(ratios) - 1))]
+    hi = ratios[int((1 - alpha) * (len(ratios) - 1))]
+    return lo, hi
+
+
+def run_round(sessions, sql, rng):
+    """Run every mode once in random order; return {mode: QueryResult}."""
+    order = list(MODES)
+    rng.shuffle(order)
+    return {mode: sessions[mode].execute(sql) for mode in order}
+
+
+def warm_up(sessions, sql, rng, window, cv_target, max_runs, deadline):
+    """Run rounds until both modes reach steady state or the deadline
+    (a perf_counter value) passes; return runs used."""
+    history = {mode: [] for mode in MODES}
+    for run in range(1, max_runs + 1):
+        for mode, result in run_round(sessions, sql, rng).items():
+            history[mode].append(result.wall_seconds)
+        if run >= window and all(
+                coefficient_of_variation(history[m][-window:]) <= cv_target for m in MODES):
+            return run
+        if time.perf_counter() >= deadline:
+            return run
+    return max_runs
+
+
+def schedule_query(qname, sql, sessions, writers, args, rng, budget_seconds):
+    """Interleave reps of one query until the speedup CI is tight enough."""
+    start = time.perf_counter()
+    # leave at least half of the budget for recorded reps
+    warmup_runs = warm_up(sessions, sql, rng, args.warmup_window,
+                          args.warmup_cv, args.max_warmup, start + budget_seconds / 2)
+    times = {mode: [] for mode in MODES}
+    ci = (float("nan"), float("nan"))
+    speedup = float("nan")
+    converged = False
+    rep = 0
+    while rep < args.max_reps:
+        rep += 1
+        for mode, result in run_round(sessions, sql, rng).items():
+            times[mode].append(result.wall_seconds)
+            writers[mode].writerow({
+                "mode": mode,
+                "query": qname,
+                "rep": rep,
+                "time_seconds": format_seconds(result.wall_seconds),
+                "engine_seconds": format_seconds(result.engine_seconds),
+                "session": sessions[mode].kind,
+                "profile": "",
+            })
+        if rep < args.min_reps:
+            continue
+        speedup = median(times["baseline"]) / median(times["rpt"])
+        ci = bootstrap_speedup_ci(times["baseline"], times["rpt"], rng)
+        if (ci[1] - ci[0]) / 2 / speedup <= args.target_ci:
+            converged = True
+            break
+        if time.perf_counter() - start >= budget_seconds:
+            break
+
+    elapsed = time.perf_counter() - start
+    return {
+        "query": qname,
+        "reps": rep,
+        "warmup_runs": warmup_runs,
+        "speedup": f"{speedup:.4f}",
+        "ci_low": f"{ci[0]:.4f}",
+        "ci_high": f"{ci[1]:.4f}",
+        "ci_half_width": f"{(ci[1] - ci[0]) / 2 / speedup:.4f}",
+        "converged": converged,
+        "seconds": f"{elapsed:.1f}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Interleave baseline and RPT executions with adaptive repetitions."
+    )
+    parser.add_argument("--baseline-bin", required=True,
+                        help="Path to the baseline duckdb executable")
+    parser.add_argument("--rpt-bin", required=True,
+                        help="Path to the RPT duckdb executable")
+    parser.add_argument("--db", default="db/ssb.duckdb",
+                        help="Path to DuckDB database file (opened read-only)")
+    parser.add_argument("--out-dir", default=".",
+                        help="Directory for ssb_<mode>.csv and ab_summary.csv")
+    parser.add_argument("--queries", nargs="+", default=None,
+                        help="Specific queries to run (default: all)")
+    parser.add_argument("--session", choices=SESSION_KINDS, default="persistent",
+                        help="How to run queries (see run_experiments.py)")
+    parser.add_argument("--min-reps", type=int, default=5,
+                        help="Rounds recorded before checking the confidence interval")
+    parser.add_argument("--max-reps", type=int, default=50,
+                        help="Upper bound on recorded rounds per query")
+    parser.add_argument("--target-ci", type=float, default=0.02,
+                        help="Stop when the 95%% CI half-width is below this "
+                             "fraction of the speedup")
+    parser.add_argument("--time-budget", type=float, default=1800,
+                        help="Total seconds to spend; split over the remaining queries")
+    parser.add_argument("--warmup-window", type=int, default=3,
+                        help="Runs per mode used to judge steady state")
+    parser.add_argument("--warmup-cv", type=float, default=0.05,
+                        help="Coefficient of variation that counts as steady state")
+    parser.add_argument("--max-warmup", type=int, default=20,
+                        help="Give up waiting for steady state after this many rounds")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for the mode order and bootstrap (default: random)")
+    args = parser.parse_args()
+    if args.min_reps < 1:
+        parser.error("--min-reps must be at least 1")
+    if args.max_reps < args.min_reps:
+        parser.error("--max-reps must be at least --min-reps")
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    rng = random.Random(seed)
+    print(f"Scheduler seed: {seed}")
+
+    db_path = str(Path(args.db))
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    queries_to_run = args.queries if args.queries else list(QUERIES.keys())
+    bins = {"baseline": str(Path(args.baseline_bin)), "rpt": str(Path(args.rpt_bin))}
+
+    files = {mode: (out_dir / f"ssb_{mode}.csv").open("w", newline="") for mode in MODES}
+    sessions = {}
+    summaries = []
+    deadline = time.perf_counter() + args.time_budget
+    try:
+        writers = {}
+        for mode in MODES:
+            writers[mode] = csv.DictWriter(files[mode], fieldnames=CSV_FIELDS)
+            writers[mode].writeheader()
+            # both binaries share the database file, so open it read-only
+            sessions[mode] = open_session(args.session, bins[mode], db_path, read_only=True)
+
+        for idx, qname in enumerate(queries_to_run):
+            if qname not in QUERIES:
+                print(f"Warning: Query {qname} not found, skipping")
+                continue
+            remaining = max(deadline - time.perf_counter(), 0.0)
+            budget = remaining / (len(queries_to_run) - idx)
+            summary = schedule_query(qname, QUERIES[qname], sessions, writers,
+                                     args, rng, budget)
+            summaries.append(summary)
+            status = "converged" if summary["converged"] else "budget/max reps"
+            print(f"{qname}: speedup {summary['speedup']}x "
+                  f"[{summary['ci_low']}, {summary['ci_high']}] after "
+                  f"{summary['reps']} reps, {summary['warmup_runs']} warm-up ({status})")
+    finally:
+        for session in sessions.values():
+            session.close()
+        for f in files.values():
+            f.close()
+
+    summary_path = out_dir / "ab_summary.csv"
+    with summary_path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summaries)
+    print(f"\nResults saved to: {out_dir} (seed {seed})")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,53 +2,88 @@
 """
 Analyze and compare baseline vs RPT experiment results.
 Usage: python3 analyze_results.py [baseline_csv] [rpt_csv]
+       python3 analyze_results.py --store ../results/warehouse.duckdb --sf 5
 """
 
+import argparse
 import csv
 import sys
 from collections import defaultdict
 from pathlib import Path
-from statistics import mean, stdev
+from statistics import mean
 
-def load_results(csv_file):
-    """Load results from CSV file."""
+from cache_control import CACHE_MODES, DEFAULT_CACHE_MODE
+from resource_usage import RESOURCE_FIELDS
+from speedup_stats import add_stats_arguments, compare
+
+def load_results(csv_file, column='time_seconds'):
+    """Load results from CSV file (reps without the column are skipped)."""
     times = defaultdict(list)
     
     with open(csv_file, 'r') as f:
         reader = csv.DictReader(f)
         for row in reader:
+            if not row.get(column):
+                continue
             query = row['query']
-            time = float(row['time_seconds'])
+            time = float(row[column])
             times[query].append(time)
     
     return times
 
-def analyze_results(baseline_file, rpt_file):
+def load_resources(csv_file):
+    """{resource field: {query: [values]}} from a results CSV."""
+    return {field: load_results(csv_file, field) for field in RESOURCE_FIELDS}
+
+def load_hashes(csv_file):
+    """{query: [result_hash]} of the reps run with --result hash."""
+    hashes = defaultdict(list)
+    with open(csv_file, 'r') as f:
+        for row in csv.DictReader(f):
+            if row.get('result_hash'):
+                hashes[row['query']].append(row['result_hash'])
+    return hashes
+
+def analyze_results(baseline_file, rpt_file, **stats_options):
     """Compare baseline and RPT results."""
     baseline_times = load_results(baseline_file)
     rpt_times = load_results(rpt_file)
-    
+    analyze_times(baseline_times, rpt_times, **stats_options)
+    analyze_resources(load_resources(baseline_file), load_resources(rpt_file),
+                      baseline_times, rpt_times, **stats_options)
+    check_results(load_hashes(baseline_file), load_hashes(rpt_file))
+
+def analyze_times(baseline_times, rpt_times, alpha=0.05, confidence=0.95, **stats_options):
+    """Compare per-query baseline and RPT timings.
+
+    A query only counts as a win or loss when the Mann-Whitney test is
+    significant at alpha and the bootstrap CI of its speedup excludes 1
+    (see speedup_stats.py).
+    """
     # Get all queries (should be the same)
     all_queries = sorted(set(baseline_times.keys()) | set(rpt_times.keys()))
+    rows, geomeans = compare({(None, "baseline"): baseline_times, (None, "rpt"): rpt_times},
+                             alpha=alpha, confidence=confidence, **stats_options)
+    stats = {row["query"]: row for row in rows}
+    ci_label = f"{confidence:.0%} CI"
     
-    print("=" * 80)
+    print("=" * 96)
     print("RPT vs Baseline Performance Analysis")
-    print("=" * 80)
-    print(f"{'Query':<10} {'Baseline Avg':<15} {'RPT Avg':<15} {'Speedup':<10} {'Improvement':<12}")
-    print("-" * 80)
+    print("=" * 96)
+    print(f"{'Query':<10} {'Baseline Avg':<15} {'RPT Avg':<15} {'Speedup':<10} {'Improvement':<12} "
+          f"{ci_label:<17} {'p':<8} {'Result':<8}")
+    print("-" * 96)
     
     total_baseline = 0
     total_rpt = 0
     
     for query in all_queries:
-        if query not in baseline_times or query not in rpt_times:
+        if query not in stats:
             print(f"{query:<10} {'MISSING':<15} {'MISSING':<15}")
             continue
         
         baseline_avg = mean(baseline_times[query])
         rpt_avg = mean(rpt_times[query])
-        baseline_std = stdev(baseline_times[query]) if len(baseline_times[query]) > 1 else 0
-        rpt_std = stdev(rpt_times[query]) if len(rpt_times[query]) > 1 else 0
         
         speedup = baseline_avg / rpt_avg if rpt_avg > 0 else 0
         improvement = ((baseline_avg - rpt_avg) / baseline_avg * 100) if baseline_avg > 0 else 0
@@ -59,48 +94,160 @@ def analyze_results(baseline_file, rpt_file):
         # Format output
         speedup_str = f"{speedup:.3f}x"
         improvement_str = f"{improvement:+.1f}%"
+        result = stats[query]["verdict"]
+        ci_str = f"[{stats[query]['ci_low']:.3f}, {stats[query]['ci_high']:.3f}]"
         
-        if speedup > 1.0:
+        # Only color significant differences
+        if result == "faster":
             speedup_str = f"\033[92m{speedup_str}\033[0m"  # Green
-        elif speedup < 1.0:
+        elif result == "slower":
             speedup_str = f"\033[91m{speedup_str}\033[0m"  # Red
         
-        print(f"{query:<10} {baseline_avg:>12.6f}s {rpt_avg:>12.6f}s {speedup_str:>10} {improvement_str:>12}")
+        print(f"{query:<10} {baseline_avg:>12.6f}s {rpt_avg:>12.6f}s {speedup_str:>10} {improvement_str:>12} "
+              f"{ci_str:>17} {stats[query]['p_value']:>8.4f} {result:>8}")
     
-    print("-" * 80)
+    print("-" * 96)
     overall_speedup = total_baseline / total_rpt if total_rpt > 0 else 0
     overall_improvement = ((total_baseline - total_rpt) / total_baseline * 100) if total_baseline > 0 else 0
     print(f"{'TOTAL':<10} {total_baseline:>12.6f}s {total_rpt:>12.6f}s {overall_speedup:>10.3f}x {overall_improvement:>+11.1f}%")
-    print("=" * 80)
+    print("=" * 96)
     
     # Summary statistics
     print("\nSummary Statistics:")
     print(f"  Total queries: {len(all_queries)}")
     print(f"  Overall speedup: {overall_speedup:.3f}x")
     print(f"  Overall improvement: {overall_improvement:+.1f}%")
+    for gm in geomeans:
+        print(f"  Geometric mean speedup: {gm['geomean_speedup']:.3f}x "
+              f"({ci_label} {gm['ci_low']:.3f}-{gm['ci_high']:.3f})")
     
-    # Count wins/losses
-    wins = sum(1 for q in all_queries 
-               if q in baseline_times and q in rpt_times 
-               and mean(baseline_times[q]) > mean(rpt_times[q]))
-    losses = sum(1 for q in all_queries 
-                 if q in baseline_times and q in rpt_times 
-                 and mean(baseline_times[q]) < mean(rpt_times[q]))
+    # Count significant wins/losses
+    verdicts = [row["verdict"] for row in rows]
+    wins = verdicts.count("faster")
+    losses = verdicts.count("slower")
     ties = len(all_queries) - wins - losses
     
     print(f"  Queries where RPT is faster: {wins}")
     print(f"  Queries where RPT is slower: {losses}")
-    print(f"  Queries with no significant difference: {ties}")
+    print(f"  Queries with no significant difference: {ties} (alpha={alpha})")
+
+def analyze_resources(baseline, rpt, baseline_times, rpt_times, alpha=0.05, confidence=0.95,
+                      **stats_options):
+    """Compare CPU work (user + sys seconds over all threads) with wall time.
+
+    A query whose wall-time speedup is well above its CPU ratio got faster
+    through better parallel overlap rather than by doing less work. "Cores"
+    is cpu / wall, the average number of busy cores.
+    """
+    baseline_cpu, rpt_cpu = baseline["cpu_seconds"], rpt["cpu_seconds"]
+    if not baseline_cpu or not rpt_cpu:
+        return  # runs from before resource accounting
+    queries = sorted(set(baseline_cpu) & set(rpt_cpu))
+    # a ratio needs non-zero work on both sides
+    measurable = [q for q in queries if min(baseline_cpu[q] + rpt_cpu[q]) > 0]
+    rows, geomeans = compare({(None, "baseline"): {q: baseline_cpu[q] for q in measurable},
+                              (None, "rpt"): {q: rpt_cpu[q] for q in measurable}},
+                             alpha=alpha, confidence=confidence, **stats_options)
+    stats = {row["query"]: row for row in rows}
+    work = {"faster": "less", "slower": "more"}
+
+    print("\n" + "=" * 96)
+    print("CPU Work vs Wall Time")
+    print("=" * 96)
+    print(f"{'Query':<10} {'Baseline CPU':<15} {'RPT CPU':<15} {'CPU Ratio':<10} "
+          f"{'Wall Speedup':<13} {'Base Cores':<11} {'RPT Cores':<10} {'Work':<6}")
+    print("-" * 96)
+    for query in queries:
+        b_cpu, r_cpu = mean(baseline_cpu[query]), mean(rpt_cpu[query])
+        b_wall, r_wall = mean(baseline_times[query]), mean(rpt_times[query])
+        cpu_ratio = b_cpu / r_cpu if r_cpu > 0 else 0
+        wall_speedup = b_wall / r_wall if r_wall > 0 else 0
+        result = work.get(stats[query]["verdict"], "same") if query in stats else ""
+        print(f"{query:<10} {b_cpu:>12.6f}s {r_cpu:>12.6f}s {cpu_ratio:>9.3f}x "
+              f"{wall_speedup:>12.3f}x {b_cpu / b_wall:>11.2f} {r_cpu / r_wall:>10.2f} "
+              f"{result:>6}")
+    print("-" * 96)
+    for gm in geomeans:
+        print(f"  Geometric mean CPU ratio: {gm['geomean_speedup']:.3f}x "
+              f"({confidence:.0%} CI {gm['ci_low']:.3f}-{gm['ci_high']:.3f})")
+
+    print("\nOS counters, mean per execution:")
+    print(f"  {'Counter':<22} {'Baseline':>16} {'RPT':>16} {'RPT/Baseline':>13}")
+    for field in RESOURCE_FIELDS:
+        b_values = [v for values in baseline[field].values() for v in values]
+        r_values = [v for values in rpt[field].values() for v in values]
+        if not b_values or not r_values:
+            continue
+        b_mean, r_mean = mean(b_values), mean(r_values)
+        ratio = f"{r_mean / b_mean:.3f}" if b_mean else "-"
+        print(f"  {field:<22} {b_mean:>16.6g} {r_mean:>16.6g} {ratio:>13}")
+
+def check_results(baseline_hashes, rpt_hashes):
+    """Report queries whose result hash differs between reps or modes."""
+    queries = sorted(set(baseline_hashes) & set(rpt_hashes))
+    if not queries:
+        return  # runs without --result hash
+    mismatched = []
+    for query in queries:
+        hashes = set(baseline_hashes[query]) | set(rpt_hashes[query])
+        if len(hashes) > 1:
+            mismatched.append(query)
+    print(f"\nResult check: {len(queries) - len(mismatched)} of {len(queries)} queries "
+          "returned identical results on every rep of both modes")
+    for query in mismatched:
+        print(f"  \033[91m{query}: results differ\033[0m "
+              f"(baseline {', '.join(sorted(set(baseline_hashes[query])))}; "
+              f"rpt {', '.join(sorted(set(rpt_hashes[query])))})")
 
 def main():
-    if len(sys.argv) < 3:
+    parser = argparse.ArgumentParser(description="Compare baseline and RPT timings.")
+    parser.add_argument("baseline_csv", nargs="?", default=None)
+    parser.add_argument("rpt_csv", nargs="?", default=None)
+    parser.add_argument("--store", default=None,
+                        help="Read the runs from this results store instead of CSVs")
+    parser.add_argument("--sf", default=None,
+                        help="Scale factor of the runs to compare (with --store)")
+    parser.add_argument("--baseline-run", default=None,
+                        help="Baseline run id (default: latest)")
+    parser.add_argument("--rpt-run", default=None,
+                        help="RPT run id (default: latest)")
+    parser.add_argument("--cache", choices=CACHE_MODES, default=DEFAULT_CACHE_MODE,
+                        help="Cache mode of the runs to compare (with --store)")
+    add_stats_arguments(parser)
+    args = parser.parse_args()
+    stats_options = {"statistic": args.statistic, "alpha": args.alpha,
+                     "confidence": args.confidence, "resamples": args.resamples,
+                     "correction": args.correction, "seed": args.seed}
+
+    if args.store:
+        from results_store import load_times
+        baseline_times = load_times(args.store, "baseline", args.sf, args.baseline_run, args.cache)
+        rpt_times = load_times(args.store, "rpt", args.sf, args.rpt_run, args.cache)
+        if not baseline_times or not rpt_times:
+            print(f"Error: no {args.cache} baseline and rpt runs in {args.store} for SF={args.sf}")
+            sys.exit(1)
+        analyze_times(baseline_times, rpt_times, **stats_options)
+        resources = {mode: {field: load_times(args.store, mode, args.sf, run_id, args.cache,
+                                              field)
+                            for field in RESOURCE_FIELDS}
+                     for mode, run_id in (("baseline", args.baseline_run),
+                                          ("rpt", args.rpt_run))}
+        analyze_resources(resources["baseline"], resources["rpt"], baseline_times, rpt_times,
+                          **stats_options)
+        check_results(load_times(args.store, "baseline", args.sf, args.baseline_run, args.cache,
+                                 "result_hash"),
+                      load_times(args.store, "rpt", args.sf, args.rpt_run, args.cache,
+                                 "result_hash"))
+        return
+
+    if args.rpt_csv is None:
         # Default paths
         script_dir = Path(__file__).parent
         baseline_file = script_dir.parent / "results" / "ssb_baseline.csv"
         rpt_file = script_dir.parent / "results" / "ssb_rpt.csv"
     else:
-        baseline_file = Path(sys.argv[1])
-        rpt_file = Path(sys.argv[2])
+        baseline_file = Path(args.baseline_csv)
+        rpt_file = Path(args.rpt_csv)
     
     if not baseline_file.exists():
         print(f"Error: Baseline results file not found: {baseline_file}")
@@ -110,7 +257,7 @@ def main():
         print(f"Error: RPT results file not found: {rpt_file}")
         sys.exit(1)
     
-    analyze_results(baseline_file, rpt_file)
+    analyze_results(baseline_file, rpt_file, **stats_options)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of DuckDB-RPT binaries.
+
+Every binary is keyed by the rpt-src commit plus a hash of the rendered
+setting.hpp (and of any uncommitted source changes), and kept under its own
+name in duckdb-rpt/bin-cache/. A configuration is only rebuilt when no
+binary for its key exists yet.
+
+Usage:
+    python3 build_cache.py build --mode rpt          # prints the binary path
+    python3 build_cache.py build --mode baseline --define External
+    python3 build_cache.py list
+    python3 build_cache.py bisect --query q4.1 --good <commit> --bad <commit> \\
+        --db ../duckdb-rpt/ssb_sf10.db
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from statistics import median
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RPT_SRC_DIR = PROJECT_ROOT / "duckdb-rpt" / "rpt-src"
+SETTING_RELPATH = Path("src/include/duckdb/optimizer/predicate_transfer/setting.hpp")
+CACHE_DIR = PROJECT_ROOT / "duckdb-rpt" / "bin-cache"
+
+# Layout of setting.hpp; a flag is enabled by uncommenting its #define
+SETTING_LAYOUT = [
+    "// Exclusive",
+    "BloomJoin",
+    "PredicateTransfer",
+    "",
+    "// Exclusive",
+    "ExactLeftDeep",
+    "RandomBushy",
+    "RandomLeftDeep",
+    "",
+    "SmalltoLarge",
+    "",
+    "External",
+]
+SETTING_FLAGS = [line for line in SETTING_LAYOUT if line and not line.startswith("//")]
+
+# Flags enabled for each experiment mode
+MODE_FLAGS = {
+    "rpt": ["PredicateTransfer", "RandomLeftDeep"],
+    "baseline": ["RandomLeftDeep"],
+}
+
+
+def render_setting(flags):
+    """Render setting.hpp with the given flags enabled."""
+    unknown = set(flags) - set(SETTING_FLAGS)
+    if unknown:
+        raise ValueError(f"Unknown setting flags: {', '.join(sorted(unknown))}")
+    lines = []
+    for entry in SETTING_LAYOUT:
+        if not entry or entry.startswith("//"):
+            lines.append(entry)
+        elif entry in flags:
+            lines.append(f"#define {entry}")
+        else:
+            lines.append(f"// #define {entry}")
+    return "\n".join(lines) + "\n"
+
+
+def mode_flags(mode, defines=None):
+    """Flags for a mode plus any extra defines."""
+    if mode not in MODE_FLAGS:
+        raise ValueError(f"Unknown mode: {mode}")
+    return sorted(set(MODE_FLAGS[mode]) | set(defines or []))
+
+
+def git(src_dir, *args):
+    result = subprocess.run(["git", "-C", str(src_dir)] + list(args),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout.strip()
+
+
+def source_commit(src_dir):
+    return git(src_dir, "rev-parse", "HEAD")
+
+
+def source_diff(src_dir):
+    """Uncommitted source changes, ignoring setting.hpp (hashed separately)."""
+    return git(src_dir, "diff", "HEAD", "--", ".", f":(exclude){SETTING_RELPATH}")
+
+
+def cache_key(commit, setting_text, diff=""):
+    digest = hashlib.sha256(setting_text.encode())
+    if diff:
+        digest.update(diff.encode())
+    return f"{commit[:12]}-{digest.hexdigest()[:12]}"
+
+
+def binary_path(key, cache_dir=CACHE_DIR):
+    return Path(cache_dir) / f"duckdb-{key}"
+
+
+def binary_fingerprint(bin_path):
+    """SHA-256 of a binary file, used to tag results."""
+    digest = hashlib.sha256()
+    with open(bin_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def config_key(flags, src_dir=RPT_SRC_DIR):
+    """Cache key of a configuration at the current state of src_dir."""
+    src_dir = Path(src_dir)
+    return cache_key(source_commit(src_dir), render_setting(flags), source_diff(src_dir))
+
+
+def build(flags, src_dir=RPT_SRC_DIR, cache_dir=CACHE_DIR, jobs=None, force=False):
+    """Return the cached binary for a configuration, building it if missing."""
+    src_dir = Path(src_dir)
+    setting_file = src_dir / SETTING_RELPATH
+    setting_text = render_setting(flags)
+    commit = source_commit(src_dir)
+    key = cache_key(commit, setting_text, source_diff(src_dir))
+    target = binary_path(key, cache_dir)
+    if target.exists() and not force:
+        print(f"Using cached binary {target.name} ({', '.join(flags)})", file=sys.stderr)
+        return target
+
+    if not setting_file.exists():
+        raise RuntimeError(f"Setting file not found: {setting_file}")
+    original = setting_file.read_text()
+    print(f"Building {target.name} ({', '.join(flags)})...", file=sys.stderr)
+    try:
+        if original != setting_text:
+            setting_file.write_text(setting_text)
+        start = time.perf_counter()
+        # make output goes to stderr so stdout only carries the binary path
+        result = subprocess.run(["make", f"-j{jobs or os.cpu_count()}"],
+                                cwd=src_dir / "build", stdout=sys.stderr)
+        if result.returncode != 0:
+            raise RuntimeError(f"Build failed for {target.name}")
+        built = src_dir / "build" / "duckdb"
+        if not built.exists():
+            raise RuntimeError(f"Build failed, binary not found: {built}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        shutil.copy2(built, tmp)
+        os.replace(tmp, target)
+        metadata = {
+            "key": key,
+            "commit": commit,
+            "flags": flags,
+            "fingerprint": binary_fingerprint(target),
+            "build_seconds": round(time.perf_counter() - start, 1),
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        target.with_suffix(".json").write_text(json.dumps(metadata, indent=2) + "\n")
+    finally:
+        if setting_file.read_text() != original:
+            setting_file.write_text(original)
+    print(f"Build successful: {target}", file=sys.stderr)
+    return target
+
+
+def list_cache(cache_dir=CACHE_DIR):
+    cache_dir = Path(cache_dir)
+    entries = sorted(cache_dir.glob("duckdb-*.json")) if cache_dir.exists() else []
+    if not entries:
+        print(f"No cached binaries in {cache_dir}")
+        return
+    print(f"{'Binary':<40} {'Flags':<35} {'Built':<20}")
+    print("-" * 95)
+    for meta_file in entries:
+        meta = json.loads(meta_file.read_text())
+        print(f"{meta_file.stem:<40} {','.join(meta['flags']):<35} {meta['built_at']:<20}")
+
+
+def time_query(bin_path, db_path, sql, reps):
+    """Median wall time of a query in a persistent session after one warm-up."""
+    from duckdb_session import open_session
+
+    with open_session("persistent", str(bin_path), str(db_path)) as session:
+        session.execute(sql)
+        return median(session.execute(sql).wall_seconds for _ in range(reps))
+
+
+def bisect(query, good, bad, flags, db_path, reps, threshold,
+           src_dir=RPT_SRC_DIR, cache_dir=CACHE_DIR):
+    """Find the first commit in good..bad where a query regressed.
+
+    A commit counts as regressed when its median runtime exceeds the good
+    commit's median by more than `threshold` (relative).
+    """
+    from run_experiments import QUERIES
+
+    if query not in QUERIES:
+        raise ValueError(f"Unknown query: {query}")
+    sql = QUERIES[query]
+    src_dir = Path(src_dir)
+    if git(src_dir, "status", "--porcelain", "--untracked-files=no"):
+        raise RuntimeError(f"Source tree has uncommitted changes: {src_dir}")
+
+    original_ref = git(src_dir, "rev-parse", "--abbrev-ref", "HEAD")
+    if original_ref == "HEAD":
+        original_ref = source_commit(src_dir)
+    commits = git(src_dir, "rev-list", "--ancestry-path", "--reverse",
+                  f"{good}..{bad}").split()
+    if not commits:
+        raise RuntimeError(f"No commits between {good} and {bad}")
+
+    timings = {}
+
+    def measure(commit):
+        if commit not in timings:
+            git(src_dir, "checkout", "--quiet", "--detach", commit)
+            bin_path = build(flags, src_dir=src_dir, cache_dir=cache_dir)
+            timings[commit] = time_query(bin_path, db_path, sql, reps)
+            print(f"  {commit[:12]}: {timings[commit]:.4f}s", file=sys.stderr)
+        return timings[commit]
+
+    try:
+        good_commit = git(src_dir, "rev-parse", good)
+        limit = measure(good_commit) * (1 + threshold)
+        if measure(commits[-1]) <= limit:
+            print(f"{query} did not regress beyond {threshold:.0%} at {bad}")
+            return None
+        lo, hi = 0, len(commits) - 1  # commits[hi] is known to be regressed
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if measure(commits[mid]) > limit:
+                hi = mid
+            else:
+                lo = mid + 1
+        first_bad = commits[hi]
+    finally:
+        git(src_dir, "checkout", "--quiet", original_ref)
+
+    print(f"First regressed commit for {query}: {first_bad}")
+    print(f"  {git(src_dir, 'log', '-1', '--oneline', first_bad)}")
+    print(f"  good {timings[good_commit]:.4f}s -> {timings[first_bad]:.4f}s")
+    return first_bad
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build, cache and bisect DuckDB-RPT binaries."
+    )
+    parser.add_argument("--src", default=str(RPT_SRC_DIR),
+                        help="Path to the rpt-src checkout")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR),
+                        help="Directory holding cached binaries")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = sub.add_parser("build", help="Print the binary for a mode, building if needed")
+    build_parser.add_argument("--mode", required=True, choices=sorted(MODE_FLAGS))
+    build_parser.add_argument("--define", action="append", default=[],
+                              help="Extra setting.hpp flag to enable (repeatable)")
+    build_parser.add_argument("--jobs", type=int, default=None,
+                              help="Parallel make jobs (default: all cores)")
+    build_parser.add_argument("--force", action="store_true",
+                              help="Rebuild even if a cached binary exists")
+
+    sub.add_parser("list", help="List cached binaries")
+
+    bisect_parser = sub.add_parser("bisect", help="Find the commit where a query regressed")
+    bisect_parser.add_argument("--query", required=True)
+    bisect_parser.add_argument("--good", required=True, help="Known good commit")
+    bisect_parser.add_argument("--bad", default="HEAD", help="Known regressed commit")
+    bisect_parser.add_argument("--mode", default="rpt", choices=sorted(MODE_FLAGS))
+    bisect_parser.add_argument("--define", action="append", default=[])
+    bisect_parser.add_argument("--db", required=True, help="Path to DuckDB database file")
+    bisect_parser.add_argument("--reps", type=int, default=5,
+                               help="Repetitions per commit (median is compared)")
+    bisect_parser.add_argument("--threshold", type=float, default=0.10,
+                               help="Relative slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            flags = mode_flags(args.mode, args.define)
+            print(build(flags, src_dir=args.src, cache_dir=args.cache_dir,
+                        jobs=args.jobs, force=args.force))
+        elif args.command == "list":
+            list_cache(args.cache_dir)
+        elif args.command == "bisect":
+            flags = mode_flags(args.mode, args.define)
+            db_path = str(Path(args.db).resolve())
+            bisect(args.query, args.good, args.bad, flags, db_path, args.reps,
+                   args.threshold, src_dir=args.src, cache_dir=args.cache_dir)
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Cache states a query can be measured in.
+
+  cold        the database file is evicted from the OS page cache before
+              every repetition and the query runs in a fresh duckdb process,
+              like the first query after a restart or after eviction
+  os-warm     the database file is in the page cache but every repetition
+              is a fresh process, so DuckDB's own buffer pool starts empty
+  fully-warm  one warm-up execution, then repetitions in the same session
+              (page cache and buffer pool both warm; the historical default)
+
+Eviction drops the whole page cache through /proc/sys/vm/drop_caches when
+that is writable (root), and otherwise asks the kernel to drop the pages of
+the database file (and its WAL) with posix_fadvise(POSIX_FADV_DONTNEED).
+The method used is recorded with every cold measurement.
+
+    python3 cache_control.py evict ../duckdb-rpt/ssb_sf10.db
+    python3 cache_control.py warm ../duckdb-rpt/ssb_sf10.db
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+CACHE_MODES = ("cold", "os-warm", "fully-warm")
+DEFAULT_CACHE_MODE = "fully-warm"
+
+EVICTION_METHODS = ("auto", "drop_caches", "fadvise")
+
+DROP_CACHES = Path("/proc/sys/vm/drop_caches")
+
+READ_CHUNK = 8 * 1024 * 1024
+
+
+def database_files(db_path):
+    """The database file plus its WAL, when one exists."""
+    db_path = Path(db_path)
+    wal = db_path.with_name(db_path.name + ".wal")
+    return [p for p in (db_path, wal) if p.exists()]
+
+
+def drop_page_cache():
+    """Drop the clean page cache system-wide; False without permission."""
+    os.sync()
+    try:
+        DROP_CACHES.write_text("1\n")
+    except OSError:
+        return False
+    return True
+
+
+def fadvise_dontneed(path):
+    """Ask the kernel to drop the cached pages of one file."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # dirty pages are not dropped, so write them back first
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def evict(db_path, method="auto"):
+    """Evict the database from the page cache; returns the method used."""
+    if method not in EVICTION_METHODS:
+        raise ValueError(f"Unknown eviction method: {method}")
+    if method in ("auto", "drop_caches"):
+        if drop_page_cache():
+            return "drop_caches"
+        if method == "drop_caches":
+            raise RuntimeError(f"{DROP_CACHES} is not writable (needs root)")
+    if not hasattr(os, "posix_fadvise"):
+        raise RuntimeError("posix_fadvise is not available on this platform")
+    for path in database_files(db_path):
+        fadvise_dontneed(path)
+    return "fadvise"
+
+
+def warm(db_path):
+    """Read the database files once so they sit in the page cache."""
+    total = 0
+    for path in database_files(db_path):
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                total += len(chunk)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evict or warm a database in the page cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    evict_cmd = sub.add_parser("evict", help="Drop the database from the page cache")
+    evict_cmd.add_argument("db")
+    evict_cmd.add_argument("--method", choices=EVICTION_METHODS, default="auto")
+    warm_cmd = sub.add_parser("warm", help="Read the database into the page cache")
+    warm_cmd.add_argument("db")
+    args = parser.parse_args()
+
+    if args.command == "evict":
+        print(f"Evicted {args.db} ({evict(args.db, args.method)})")
+    elif args.command == "warm":
+        print(f"Read {warm(args.db) / (1024 * 1024):.1f} MB of {args.db}")
+
+
+if __name__ == "__main__":
+    main()
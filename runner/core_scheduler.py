@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Disjoint CPU sets for experiment cells that share a machine.
+
+The schedulable CPUs are the ones this process may run on (its affinity,
+so taskset/cgroup cpusets are respected), minus --reserve CPUs left to the
+orchestrator and the OS. Logical CPUs are grouped into physical cores
+(hyperthread siblings, from /sys/devices/system/cpu/cpu*/topology) and
+cores into packages. A cell asking for n CPUs gets them on whole physical
+cores, from a single package when one has room. A core is never split
+between cells: when n is not a multiple of the threads per core, the
+unused sibling stays idle until the cell ends. So two cells never share a
+core's execution units or, where possible, a socket's last-level cache.
+
+Memory-heavy cells additionally take a heavy slot (--max-heavy at a time),
+and exclusive cells (builds, loads) only start on an idle machine and keep
+everything else off it while they run.
+
+    python3 core_scheduler.py                 # topology and schedulable CPUs
+    python3 core_scheduler.py --cells 4 4 2   # where these cells would go
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+CPU_SYSFS = Path("/sys/devices/system/cpu")
+
+
+def format_cpus(cpus):
+    """Compact CPU list as taskset writes it, e.g. "0-3,8,10-11"."""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def parse_cpus(text):
+    """CPU numbers of a list such as "0-3,8" (sysfs and taskset format)."""
+    cpus = set()
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            a, b = part.split("-")
+            cpus.update(range(int(a), int(b) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def available_cpus():
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return set(os.sched_getaffinity(0))
+    return set(range(os.cpu_count() or 1))
+
+
+def _topology(cpu, name):
+    try:
+        return (CPU_SYSFS / f"cpu{cpu}" / "topology" / name).read_text().strip()
+    except (FileNotFoundError, PermissionError):
+        return None
+
+
+def physical_cores(cpus):
+    """{package: [[logical CPUs of a core]]}, cores in CPU order.
+
+    Without sysfs topology every CPU is a core of package 0.
+    """
+    packages = defaultdict(dict)
+    for cpu in sorted(cpus):
+        siblings = _topology(cpu, "thread_siblings_list")
+        package = _topology(cpu, "physical_package_id")
+        core = min(parse_cpus(siblings)) if siblings else cpu
+        packages[int(package) if package else 0].setdefault(core, []).append(cpu)
+    return {package: list(cores.values()) for package, cores in sorted(packages.items())}
+
+
+class CoreScheduler:
+    """Hands out disjoint CPU sets; allocate() returns None when a cell has to wait."""
+
+    def __init__(self, cpus=None, reserve=0, max_heavy=1):
+        cpus = sorted(available_cpus() if cpus is None else cpus)
+        if reserve >= len(cpus):
+            raise ValueError(f"Cannot reserve {reserve} of {len(cpus)} CPUs")
+        self.reserved = set(cpus[:reserve])
+        self.cpus = set(cpus[reserve:])
+        self.packages = physical_cores(self.cpus)
+        self.free = set(self.cpus)
+        # {allocated CPUs: CPUs of the whole cores they took}
+        self.taken = {}
+        self.max_heavy = max_heavy
+        self.heavy = 0
+        self.exclusive = False
+
+    @property
+    def idle(self):
+        return self.free == self.cpus
+
+    def allocate(self, n, heavy=False, exclusive=False):
+        """A set of n free CPUs (all of them for an exclusive cell), or None."""
+        if self.exclusive or (heavy and self.heavy >= self.max_heavy):
+            return None
+        if exclusive:
+            if not self.idle:
+                return None
+            self.exclusive = True
+            self.free = set()
+            return sorted(self.cpus)
+        n = min(n, len(self.cpus))
+        if len(self.free) < n:
+            return None
+        cpus, taken = self._pick(n)
+        self.free -= taken
+        self.taken[tuple(sorted(cpus))] = taken
+        if heavy:
+            self.heavy += 1
+        return sorted(cpus)
+
+    def _pick(self, n):
+        """(n CPUs, the CPUs of the whole cores they are on)."""
+        # cores are only ever taken whole, so free CPUs make up free cores
+        free_cores = {package: [c for c in cores if set(c) <= self.free]
+                      for package, cores in self.packages.items()}
+        # the package that fits the cell with the fewest CPUs to spare
+        fitting = [p for p in self.packages if sum(map(len, free_cores[p])) >= n]
+        order = (sorted(fitting, key=lambda p: sum(map(len, free_cores[p])))
+                 or sorted(self.packages))
+        picked, taken = [], set()
+        for package in order:
+            for core in free_cores[package]:
+                picked.extend(core[:n - len(picked)])
+                taken.update(core)
+                if len(picked) == n:
+                    return set(picked), taken
+        raise RuntimeError("free CPU accounting is inconsistent")
+
+    def release(self, cpus, heavy=False, exclusive=False):
+        if exclusive:
+            self.exclusive = False
+            self.free = set(self.cpus)
+            return
+        self.free |= self.taken.pop(tuple(sorted(cpus)), set(cpus))
+        if heavy:
+            self.heavy -= 1
+
+
+def pinned_command(cmd, cpus):
+    """cmd restricted to cpus: through taskset when installed, else a Python
+    shim that sets the affinity and execs cmd (children inherit it)."""
+    cpu_list = format_cpus(cpus)
+    if shutil.which("taskset"):
+        return ["taskset", "-c", cpu_list] + list(cmd)
+    shim = ("import os, sys; os.sched_setaffinity(0, {%s}); os.execvp(sys.argv[1], sys.argv[1:])"
+            % ", ".join(str(c) for c in sorted(cpus)))
+    return [sys.executable, "-c", shim] + list(cmd)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show the CPU topology and how cells would be packed onto it."
+    )
+    parser.add_argument("--reserve", type=int, default=0,
+                        help="CPUs kept free for the orchestrator and the OS")
+    parser.add_argument("--cells", type=int, nargs="+", default=None,
+                        help="CPU demands of cells to place")
+    args = parser.parse_args()
+
+    scheduler = CoreScheduler(reserve=args.reserve)
+    print(f"Schedulable CPUs: {format_cpus(scheduler.cpus)} ({len(scheduler.cpus)})"
+          + (f", reserved {format_cpus(scheduler.reserved)}" if scheduler.reserved else ""))
+    for package, cores in scheduler.packages.items():
+        print(f"  package {package}: {len(cores)} cores  "
+              + " ".join(format_cpus(core) for core in cores))
+    for i, n in enumerate(args.cells or []):
+        cpus = scheduler.allocate(n)
+        print(f"  cell {i} ({n} CPUs): "
+              + (format_cpus(cpus) if cpus else "waits for a running cell"))
+
+
+if __name__ == "__main__":
+    main()
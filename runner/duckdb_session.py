@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+DuckDB CLI sessions used by the experiment runners.
+
+Two kinds of session share the same interface:
+  - spawn:      start a fresh duckdb process for every query (the original
+                behaviour, includes process startup and catalog loading)
+  - persistent: keep one duckdb process per (binary, database) alive and
+                feed queries to it over a stdin pipe
+
+Both turn on the CLI's `.timer on`, so every execution reports the in-engine
+run time next to the end-to-end wall time measured from Python, and the
+CPU time, context switches, page faults and I/O of the duckdb process (see
+resource_usage.py). Passing a profile_path to execute() also captures
+DuckDB's JSON profile of the query.
+setup_sql (e.g. SET statements) is applied untimed before any query runs.
+
+result_mode picks what happens to the result set:
+  - print:   the CLI renders it in its box format (the original behaviour;
+             formatting large results is timed as query work)
+  - discard: the CLI fetches the result and throws it away (`.mode trash`)
+  - count:   the engine counts the rows; QueryResult.rows holds the count
+  - hash:    the engine also computes an order-aware MD5 of the rows (in
+             result order, each row cast to text), so results of different
+             binaries and reps can be compared at the cost of one aggregate
+"""
+
+import re
+import shutil
+import subprocess
+import time
+
+from profiles import load_profile, profiling_pragmas
+from resource_usage import difference, read_proc, run_accounted
+
+SESSION_KINDS = ("persistent", "spawn")
+
+RESULT_MODES = ("print", "discard", "count", "hash")
+
+# CLI output settings per result mode; count and hash print one CSV line
+RESULT_SETUP = {
+    "print": None,
+    "discard": ".mode trash",
+    "count": ".mode csv\n.headers off",
+    "hash": ".mode csv\n.headers off",
+}
+
+# Printed by the CLI after every statement when `.timer on` is set, e.g.
+# "Run Time (s): real 0.012 user 0.040000 sys 0.004000"
+TIMER_RE = re.compile(r"^Run Time \(s\): real (\d+(?:\.\d+)?)")
+
+# CLI error messages look like "Binder Error: ..." or "Error: ..."
+ERROR_RE = re.compile(r"^(?:[A-Z][A-Za-z ]*)?Error: ")
+
+
+class QueryResult:
+    """Timing and raw output of one query execution."""
+
+    def __init__(self, wall_seconds, engine_seconds, output, profile=None, resources=None):
+        self.wall_seconds = wall_seconds
+        self.engine_seconds = engine_seconds
+        self.output = output
+        self.profile = profile
+        # OS counters of the execution, None where they cannot be read
+        self.resources = resources
+        # row count and result hash (result modes count and hash)
+        self.rows = None
+        self.result_hash = None
+
+
+def _terminate(sql):
+    """Make sure the CLI sees a complete statement."""
+    sql = sql.strip()
+    if not sql.endswith(";"):
+        sql += ";"
+    return sql
+
+
+def result_query(sql, result_mode):
+    """Wrap a query so the engine counts or hashes its result."""
+    if result_mode not in RESULT_MODES:
+        raise ValueError(f"Unknown result mode: {result_mode}")
+    if result_mode in ("print", "discard"):
+        return sql
+    body = sql.strip().rstrip(";")
+    if result_mode == "count":
+        return f"SELECT count(*) FROM ({body}) AS __result"
+    # row_number() OVER () keeps the order the query produced its rows in
+    return (
+        "SELECT count(*), md5(coalesce(string_agg(__row::VARCHAR, chr(10) ORDER BY __rn), '')) "
+        f"FROM (SELECT row_number() OVER () AS __rn, __result AS __row FROM ({body}) AS __result)"
+    )
+
+
+def read_result(result, result_mode):
+    """Fill in rows/result_hash from the CSV line of a count or hash query."""
+    if result_mode not in ("count", "hash"):
+        return result
+    values = [line for line in result.output if line.strip()]
+    if values:
+        fields = values[-1].split(",")
+        result.rows = int(fields[0])
+        if result_mode == "hash" and len(fields) > 1:
+            result.result_hash = fields[1].strip()
+    return result
+
+
+def _line_buffered(cmd):
+    """Force line-buffered stdout so the persistent session never stalls."""
+    stdbuf = shutil.which("stdbuf")
+    if stdbuf:
+        return [stdbuf, "-oL", "-eL"] + cmd
+    return cmd
+
+
+def parse_output(lines):
+    """Split CLI output into (engine_seconds, output_lines, error)."""
+    engine_seconds = None
+    output = []
+    error = None
+    for line in lines:
+        match = TIMER_RE.match(line)
+        if match:
+            engine_seconds = (engine_seconds or 0.0) + float(match.group(1))
+            continue
+        if error is None and ERROR_RE.match(line):
+            error = line
+        output.append(line)
+    return engine_seconds, output, error
+
+
+class SpawnSession:
+    """Start a new duckdb process for every query."""
+
+    kind = "spawn"
+
+    def __init__(self, bin_path, db_path, read_only=False, setup_sql=None,
+                 result_mode="print"):
+        self.bin_path = bin_path
+        self.db_path = db_path
+        self.read_only = read_only
+        self.setup_sql = setup_sql
+        self.result_mode = result_mode
+
+    def command(self):
+        cmd = [self.bin_path]
+        if self.read_only:
+            cmd.append("-readonly")
+        cmd.append(self.db_path)
+        return cmd
+
+    def execute(self, sql, profile_path=None):
+        cmd = self.command()
+        script = f".timer on\n{_terminate(result_query(sql, self.result_mode))}\n"
+        if RESULT_SETUP[self.result_mode]:
+            script = f"{RESULT_SETUP[self.result_mode]}\n{script}"
+        if profile_path:
+            # enable profiling before the timer so the pragmas are not timed
+            script = f"{profiling_pragmas(profile_path)}\n{script}"
+        if self.setup_sql:
+            script = f"{_terminate(self.setup_sql)}\n{script}"
+        start = time.perf_counter()
+        returncode, stdout, resources = run_accounted(cmd, script)
+        end = time.perf_counter()
+        engine_seconds, output, error = parse_output(stdout.splitlines())
+        if returncode != 0 or error:
+            raise RuntimeError(
+                f"Command failed: {' '.join(cmd)}: {error or returncode}"
+            )
+        profile = load_profile(profile_path) if profile_path else None
+        return read_result(QueryResult(end - start, engine_seconds, output, profile, resources),
+                           self.result_mode)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PersistentSession:
+    """Keep one duckdb process alive and send queries over its stdin."""
+
+    kind = "persistent"
+
+    def __init__(self, bin_path, db_path, read_only=False, setup_sql=None,
+                 result_mode="print"):
+        self.bin_path = bin_path
+        self.db_path = db_path
+        self.read_only = read_only
+        self.setup_sql = setup_sql
+        self.result_mode = result_mode
+        cmd = [bin_path]
+        if read_only:
+            cmd.append("-readonly")
+        cmd.append(db_path)
+        self.process = subprocess.Popen(
+            _line_buffered(cmd),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+        self._seq = 0
+        if setup_sql:
+            _, _, error = parse_output(self._roundtrip(_terminate(setup_sql)))
+            if error:
+                self.close()
+                raise RuntimeError(f"Session setup failed: {error}")
+        if RESULT_SETUP[result_mode]:
+            self._roundtrip(RESULT_SETUP[result_mode])
+        self._roundtrip(".timer on")
+
+    def _roundtrip(self, script):
+        """Send a script followed by a marker and collect output up to it."""
+        self._seq += 1
+        marker = f"__rpt_ssb_done_{self._seq}__"
+        self.process.stdin.write(f"{script}\n.print {marker}\n")
+        self.process.stdin.flush()
+        lines = []
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise RuntimeError(
+                    f"duckdb session exited unexpectedly: {self.bin_path} {self.db_path}"
+                )
+            line = line.rstrip("\n")
+            if line == marker:
+                return lines
+            lines.append(line)
+
+    def execute(self, sql, profile_path=None):
+        if profile_path:
+            self._roundtrip(profiling_pragmas(profile_path))
+        before = read_proc(self.process.pid)
+        start = time.perf_counter()
+        lines = self._roundtrip(_terminate(result_query(sql, self.result_mode)))
+        end = time.perf_counter()
+        resources = difference(before, read_proc(self.process.pid))
+        engine_seconds, output, error = parse_output(lines)
+        profile = None
+        if profile_path:
+            # read the profile before any other statement can overwrite it
+            if not error:
+                profile = load_profile(profile_path)
+            self._roundtrip("PRAGMA disable_profiling;")
+        if error:
+            raise RuntimeError(f"Query failed in persistent session: {error}")
+        return read_result(QueryResult(end - start, engine_seconds, output, profile, resources),
+                           self.result_mode)
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write(".quit\n")
+                self.process.stdin.close()
+                self.process.wait(timeout=10)
+            except (BrokenPipeError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_session(kind, bin_path, db_path, read_only=False, setup_sql=None,
+                 result_mode="print"):
+    """Create a session of the given kind ("persistent" or "spawn")."""
+    if kind == "persistent":
+        return PersistentSession(bin_path, db_path, read_only=read_only,
+                                 setup_sql=setup_sql, result_mode=result_mode)
+    if kind == "spawn":
+        return SpawnSession(bin_path, db_path, read_only=read_only,
+                            setup_sql=setup_sql, result_mode=result_mode)
+    raise ValueError(f"Unknown session kind: {kind}")
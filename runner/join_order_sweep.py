@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Join-order robustness sweep for baseline and RPT.
+
+Each query is run under explicit left-deep join orders with DuckDB's join
+order optimizer (and build/probe side swapping) disabled, so the order is
+exactly the one written in the SQL and can be reproduced from the logged
+seed. By default N orders are sampled per query; with --exhaustive every
+left-deep order of the 4- and 5-relation queries is run. Orders that would
+need a cross product are skipped unless --allow-cross-products is given.
+
+Per query and mode the summary reports the spread of the per-order median
+runtimes as max/min and p95/p5 ratios, the robustness metric used in the
+RPT paper.
+"""
+
+import argparse
+import csv
+import itertools
+import random
+from collections import defaultdict
+from pathlib import Path
+from statistics import median
+
+from ab_scheduler import MODES, run_round
+from duckdb_session import SESSION_KINDS, open_session
+from query_generator import QUERY_SHAPES
+from run_experiments import format_seconds
+
+# Keep the written join order and build sides
+FORCE_ORDER_SQL = "SET disabled_optimizers = 'join_order,build_side_probe_side'"
+
+SWEEP_FIELDS = ["seed", "query", "order_id", "join_order", "mode", "rep",
+                "time_seconds", "engine_seconds"]
+SUMMARY_FIELDS = ["query", "mode", "orders", "min_seconds", "p5_seconds",
+                  "p95_seconds", "max_seconds", "max_min_ratio", "p95_p5_ratio"]
+
+
+def has_cross_product(order):
+    """In a star schema only joins that include lineorder have a predicate."""
+    return "lineorder" not in order[:2]
+
+
+def left_deep_orders(tables, allow_cross_products=False):
+    return [list(order) for order in itertools.permutations(tables)
+            if allow_cross_products or not has_cross_product(order)]
+
+
+def choose_orders(shape, samples, exhaustive, allow_cross_products, rng):
+    """Orders to run for one query: all of them or a seeded sample."""
+    orders = left_deep_orders(shape.tables, allow_cross_products)
+    if exhaustive and len(shape.tables) in (4, 5):
+        return orders
+    if len(orders) <= samples:
+        return orders
+    return rng.sample(orders, samples)
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list (pct in 0..100)."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    pos = (len(ordered) - 1) * pct / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def robustness_summary(query, mode, per_order):
+    """Spread of per-order median runtimes."""
+    values = list(per_order.values())
+    lo, hi = min(values), max(values)
+    p5, p95 = percentile(values, 5), percentile(values, 95)
+    return {
+        "query": query,
+        "mode": mode,
+        "orders": len(values),
+        "min_seconds": f"{lo:.6f}",
+        "p5_seconds": f"{p5:.6f}",
+        "p95_seconds": f"{p95:.6f}",
+        "max_seconds": f"{hi:.6f}",
+        "max_min_ratio": f"{hi / lo:.3f}" if lo > 0 else "",
+        "p95_p5_ratio": f"{p95 / p5:.3f}" if p5 > 0 else "",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run SSB queries under forced join orders for baseline and RPT."
+    )
+    parser.add_argument("--baseline-bin", required=True)
+    parser.add_argument("--rpt-bin", required=True)
+    parser.add_argument("--db", default="db/ssb.duckdb",
+                        help="Path to DuckDB database file (opened read-only)")
+    parser.add_argument("--queries", nargs="+", default=None,
+                        help="Specific queries to run (default: all)")
+    parser.add_argument("--samples", type=int, default=10,
+                        help="Join orders sampled per query")
+    parser.add_argument("--exhaustive", action="store_true",
+                        help="Run every left-deep order of the 4- and 5-relation queries")
+    parser.add_argument("--allow-cross-products", action="store_true",
+                        help="Also consider orders that join two dimensions first")
+    parser.add_argument("--reps", type=int, default=3,
+                        help="Repetitions per order (median is used)")
+    parser.add_argument("--session", choices=SESSION_KINDS, default="persistent")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for order sampling and mode order (default: random)")
+    parser.add_argument("--out", default="join_order_sweep.csv",
+                        help="Per-execution output CSV")
+    parser.add_argument("--summary-out", default=None,
+                        help="Robustness summary CSV (default: <out>_summary.csv)")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    rng = random.Random(seed)
+    print(f"Join order sweep seed: {seed}")
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path = Path(args.summary_out or out_path.with_name(f"{out_path.stem}_summary.csv"))
+    queries_to_run = args.queries if args.queries else list(QUERY_SHAPES.keys())
+    bins = {"baseline": str(Path(args.baseline_bin)), "rpt": str(Path(args.rpt_bin))}
+
+    sessions = {}
+    summaries = []
+    try:
+        for mode in MODES:
+            sessions[mode] = open_session(args.session, bins[mode], str(Path(args.db)),
+                                          read_only=True, setup_sql=FORCE_ORDER_SQL)
+        with out_path.open("w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SWEEP_FIELDS)
+            writer.writeheader()
+            for qname in queries_to_run:
+                if qname not in QUERY_SHAPES:
+                    print(f"Warning: Query {qname} not found, skipping")
+                    continue
+                shape = QUERY_SHAPES[qname]
+                orders = choose_orders(shape, args.samples, args.exhaustive,
+                                       args.allow_cross_products, rng)
+                print(f"\n{qname}: {len(orders)} join orders")
+                per_order = {mode: {} for mode in MODES}
+                for order_id, order in enumerate(orders, 1):
+                    sql = shape.render_join_order(order)
+                    label = ">".join(order)
+                    run_round(sessions, sql, rng)  # warm-up
+                    times = defaultdict(list)
+                    for rep in range(1, args.reps + 1):
+                        for mode, result in run_round(sessions, sql, rng).items():
+                            times[mode].append(result.wall_seconds)
+                            writer.writerow({
+                                "seed": seed, "query": qname, "order_id": order_id,
+                                "join_order": label, "mode": mode, "rep": rep,
+                                "time_seconds": format_seconds(result.wall_seconds),
+                                "engine_seconds": format_seconds(result.engine_seconds),
+                            })
+                    for mode in MODES:
+                        per_order[mode][label] = median(times[mode])
+                    print(f"  {label:<45} baseline {per_order['baseline'][label]:.4f}s  "
+                          f"rpt {per_order['rpt'][label]:.4f}s")
+                for mode in MODES:
+                    summary = robustness_summary(qname, mode, per_order[mode])
+                    summaries.append(summary)
+                    print(f"  {mode:<8} max/min {summary['max_min_ratio']:>7}  "
+                          f"p95/p5 {summary['p95_p5_ratio']:>7}")
+    finally:
+        for session in sessions.values():
+            session.close()
+
+    with summary_path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summaries)
+    print(f"\nResults saved to: {out_path}")
+    print(f"Robustness summary saved to: {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Reusable loaded-database snapshots of the SSB data.
+
+A snapshot is keyed by a fingerprint of the .tbl inputs (size, mtime and a
+hash of the first and last MiB of every file), the table schemas in
+sql/load_ssb.sql and the engine version, and kept read-only under
+duckdb-rpt/db-snapshots/. Loading only happens when no snapshot for the key
+exists; every run then gets its own copy of the snapshot, reflinked when the
+filesystem supports it (btrfs, XFS) and a plain copy otherwise.
+
+When a load is needed the five tables load concurrently: the largest input
+goes straight into the snapshot while the others load into scratch databases
+and are copied in at the end (a DuckDB file has a single writer). Inputs may
+be plain, gzip (.tbl.gz) or zstd (.tbl.zst) compressed, which DuckDB reads
+directly, or Parquet written by ssb_dbgen.py.
+
+Usage:
+    python3 load_ssb.py load --sf 5 --duckdb-bin <bin> --db ../duckdb-rpt/ssb_sf5.db
+    python3 load_ssb.py list
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+LOAD_SQL = PROJECT_ROOT / "sql" / "load_ssb.sql"
+DATA_ROOT = PROJECT_ROOT / "ssb-data"
+SNAPSHOT_DIR = PROJECT_ROOT / "duckdb-rpt" / "db-snapshots"
+
+TABLES = ["customer", "part", "supplier", "date", "lineorder"]
+
+# Input suffix -> DuckDB COPY compression; "parquet" marks Parquet input
+# (a <table>.parquet file or a <table>/ directory of chunks from ssb_dbgen.py)
+COMPRESSIONS = {".tbl": None, ".tbl.gz": "gzip", ".tbl.zst": "zstd",
+                ".parquet": "parquet", "": "parquet"}
+
+SAMPLE_BYTES = 1 << 20
+
+# Not "ssb.db": the catalog would take the file's name and clash with schema ssb
+SNAPSHOT_DB = "database.duckdb"
+
+CREATE_RE = re.compile(r"CREATE TABLE IF NOT EXISTS (\w+) \(.*?\);", re.DOTALL)
+
+
+def table_schemas(load_sql=LOAD_SQL):
+    """{table: CREATE TABLE statement} taken from sql/load_ssb.sql."""
+    text = Path(load_sql).read_text()
+    return {m.group(1): m.group(0) for m in CREATE_RE.finditer(text)}
+
+
+def find_input(data_dir, table):
+    """(path, compression) of a table's input file."""
+    for suffix, compression in COMPRESSIONS.items():
+        path = Path(data_dir) / f"{table}{suffix}"
+        if path.is_file() or (not suffix and path.is_dir()):
+            return path, compression
+    raise RuntimeError(f"No input for {table} in {data_dir} (looked for "
+                       f"{', '.join(table + suffix for suffix in COMPRESSIONS)}/)")
+
+
+def input_files(path):
+    """The files behind an input: itself, or the Parquet chunks of a directory."""
+    return sorted(path.glob("*.parquet")) if path.is_dir() else [path]
+
+
+def input_size(path):
+    return sum(f.stat().st_size for f in input_files(path))
+
+
+def file_fingerprint(path):
+    """Cheap fingerprint of a large file: size, mtime, first and last MiB."""
+    if path.is_dir():
+        return {"dir": path.name, "files": [file_fingerprint(f) for f in input_files(path)]}
+    stat = path.stat()
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.read(SAMPLE_BYTES))
+        if stat.st_size > SAMPLE_BYTES:
+            f.seek(max(stat.st_size - SAMPLE_BYTES, SAMPLE_BYTES))
+            digest.update(f.read(SAMPLE_BYTES))
+    return {"file": path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "sample_sha256": digest.hexdigest()[:16]}
+
+
+def engine_version(bin_path):
+    """Storage compatibility follows the engine version, not the binary flags."""
+    result = subprocess.run([bin_path, "--version"], stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True)
+    return result.stdout.strip()
+
+
+def snapshot_key(inputs, schemas, version):
+    digest = hashlib.sha256(json.dumps(
+        {"inputs": inputs, "schemas": schemas, "version": version}, sort_keys=True
+    ).encode())
+    return digest.hexdigest()[:16]
+
+
+def snapshot_path(scale_factor, key, snapshot_dir=SNAPSHOT_DIR):
+    return Path(snapshot_dir) / f"sf{scale_factor}-{key}"
+
+
+def run_script(bin_path, db_path, script):
+    """Run a script in a fresh CLI; return its output lines."""
+    result = subprocess.run([bin_path, str(db_path)], input=script,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    lines = result.stdout.splitlines()
+    errors = [line for line in lines if "Error" in line.split(":")[0]]
+    if result.returncode != 0 or errors:
+        raise RuntimeError(f"{bin_path} {db_path}: {errors[0] if errors else result.returncode}")
+    return lines
+
+
+def load_table(bin_path, db_path, table, schema_sql, input_path, compression):
+    """Create and COPY one table; return load statistics."""
+    if compression == "parquet":
+        source = input_path.resolve()
+        if input_path.is_dir():
+            source = source / "*.parquet"
+        copy_sql = f"INSERT INTO {table} SELECT * FROM read_parquet('{source}');"
+    else:
+        options = "DELIMITER '|'"
+        if compression:
+            options += f", COMPRESSION '{compression}'"
+        copy_sql = f"COPY {table} FROM '{input_path.resolve()}' ({options});"
+    script = (
+        "CREATE SCHEMA IF NOT EXISTS ssb;\n"
+        "SET schema 'ssb';\n"
+        f"{schema_sql}\n"
+        f"{copy_sql}\n"
+        ".mode csv\n"
+        ".headers off\n"
+        f"SELECT count(*) FROM {table};\n"
+    )
+    start = time.perf_counter()
+    lines = run_script(bin_path, db_path, script)
+    seconds = time.perf_counter() - start
+    rows = int(lines[-1]) if lines and lines[-1].strip().isdigit() else None
+    size = input_size(input_path)
+    return {
+        "table": table,
+        "file": input_path.name,
+        "bytes": size,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "mb_per_s": round(size / (1024 * 1024) / seconds, 1) if seconds > 0 else None,
+        "rows_per_s": round(rows / seconds) if rows and seconds > 0 else None,
+    }
+
+
+def merge_tables(bin_path, db_path, parts):
+    """Copy tables from scratch databases into the snapshot database."""
+    script = ""
+    for i, (table, part_db) in enumerate(parts):
+        script += (
+            f"ATTACH '{part_db}' AS part{i} (READ_ONLY);\n"
+            f"CREATE TABLE ssb.{table} AS SELECT * FROM part{i}.ssb.{table};\n"
+            f"DETACH part{i};\n"
+        )
+    run_script(bin_path, db_path, script + "CHECKPOINT;\n")
+
+
+def part_db(staging, table):
+    return staging / "parts" / f"load_{table}.duckdb"
+
+
+def build_snapshot(bin_path, data_dir, target, inputs, schemas, jobs=None):
+    """Load all tables concurrently into a new snapshot directory."""
+    staging = target.with_name(f".{target.name}.{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    (staging / "parts").mkdir(parents=True)
+    db_path = staging / SNAPSHOT_DB
+    largest = max(TABLES, key=lambda t: input_size(inputs[t][0]))
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=jobs or len(TABLES)) as pool:
+            futures = {}
+            for table in TABLES:
+                path, compression = inputs[table]
+                dest = db_path if table == largest else part_db(staging, table)
+                futures[table] = pool.submit(load_table, bin_path, dest, table,
+                                             schemas[table], path, compression)
+            stats = [futures[table].result() for table in TABLES]
+        merge_tables(bin_path, db_path, [(t, part_db(staging, t))
+                                         for t in TABLES if t != largest])
+        shutil.rmtree(staging / "parts")
+        db_path.chmod(0o444)
+        metadata = {
+            "data_dir": str(data_dir),
+            "inputs": {t: file_fingerprint(inputs[t][0]) for t in TABLES},
+            "tables": stats,
+            "load_seconds": round(time.perf_counter() - start, 1),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        (staging / "snapshot.json").write_text(json.dumps(metadata, indent=2) + "\n")
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return metadata
+
+
+def copy_snapshot(snapshot_db, dest):
+    """Give a run its own writable copy; return "reflink" or "copy"."""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ("", ".wal"):
+        Path(f"{dest}{suffix}").unlink(missing_ok=True)
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    result = subprocess.run(["cp", "--reflink=always", str(snapshot_db), str(tmp)],
+                            stderr=subprocess.DEVNULL)
+    how = "reflink"
+    if result.returncode != 0:
+        shutil.copyfile(snapshot_db, tmp)
+        how = "copy"
+    tmp.chmod(0o644)
+    os.replace(tmp, dest)
+    return how
+
+
+def print_stats(stats):
+    print(f"{'Table':<12} {'Rows':>12} {'Size (MB)':>10} {'Seconds':>8} "
+          f"{'MB/s':>8} {'Rows/s':>12}")
+    print("-" * 67)
+    for s in stats:
+        print(f"{s['table']:<12} {s['rows'] if s['rows'] is not None else '?':>12} "
+              f"{s['bytes'] / (1024 * 1024):>10.1f} {s['seconds']:>8.2f} "
+              f"{s['mb_per_s'] or 0:>8.1f} {s['rows_per_s'] or 0:>12}")
+
+
+def resolve_snapshot(bin_path, scale_factor, data_dir=None, snapshot_dir=SNAPSHOT_DIR):
+    """(data_dir, inputs, schemas, snapshot path) for the current inputs."""
+    data_dir = Path(data_dir or DATA_ROOT / f"sf{scale_factor}")
+    if not data_dir.is_dir():
+        raise RuntimeError(f"Data directory not found: {data_dir}")
+    schemas = table_schemas()
+    inputs = {table: find_input(data_dir, table) for table in TABLES}
+    key = snapshot_key({t: file_fingerprint(inputs[t][0]) for t in TABLES},
+                       schemas, engine_version(bin_path))
+    return data_dir, inputs, schemas, snapshot_path(scale_factor, key, snapshot_dir)
+
+
+def load(bin_path, scale_factor, db_path, data_dir=None, snapshot_dir=SNAPSHOT_DIR,
+         jobs=None, force=False):
+    """Copy the snapshot for the current inputs to db_path, loading if needed."""
+    data_dir, inputs, schemas, target = resolve_snapshot(bin_path, scale_factor, data_dir,
+                                                         snapshot_dir)
+
+    if target.exists() and force:
+        shutil.rmtree(target)
+    if target.exists():
+        print(f"Using snapshot {target.name}", file=sys.stderr)
+    else:
+        print(f"Loading SF={scale_factor} from {data_dir} into snapshot {target.name}...",
+              file=sys.stderr)
+        metadata = build_snapshot(bin_path, data_dir, target, inputs, schemas, jobs)
+        print_stats(metadata["tables"])
+        print(f"Snapshot loaded in {metadata['load_seconds']}s")
+    how = copy_snapshot(target / SNAPSHOT_DB, db_path)
+    print(f"Database: {db_path} ({how} of {target.name})")
+    return target
+
+
+def list_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    snapshot_dir = Path(snapshot_dir)
+    entries = sorted(snapshot_dir.glob("sf*/snapshot.json")) if snapshot_dir.exists() else []
+    if not entries:
+        print(f"No snapshots in {snapshot_dir}")
+        return
+    print(f"{'Snapshot':<25} {'Size (MB)':>10} {'Load (s)':>9} {'Created':<20}")
+    print("-" * 67)
+    for meta_file in entries:
+        meta = json.loads(meta_file.read_text())
+        size = (meta_file.parent / SNAPSHOT_DB).stat().st_size / (1024 * 1024)
+        print(f"{meta_file.parent.name:<25} {size:>10.1f} {meta['load_seconds']:>9} "
+              f"{meta['created_at']:<20}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load SSB data through reusable database snapshots."
+    )
+    parser.add_argument("--snapshot-dir", default=str(SNAPSHOT_DIR),
+                        help="Directory holding database snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    load_parser = sub.add_parser("load", help="Copy the snapshot for a scale factor, "
+                                              "loading it if the inputs changed")
+    load_parser.add_argument("--sf", required=True, help="Scale factor")
+    load_parser.add_argument("--duckdb-bin", required=True,
+                             help="duckdb executable used to load the data")
+    load_parser.add_argument("--db", required=True,
+                             help="Database file to create for this run")
+    load_parser.add_argument("--data-dir", default=None,
+                             help="Directory of .tbl[.gz|.zst] or Parquet inputs "
+                                  "(default: ssb-data/sf<N>)")
+    load_parser.add_argument("--jobs", type=int, default=None,
+                             help="Tables loaded concurrently (default: all five)")
+    load_parser.add_argument("--force", action="store_true",
+                             help="Reload even if a snapshot exists")
+
+    sub.add_parser("list", help="List database snapshots")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "load":
+            load(str(Path(args.duckdb_bin)), args.sf, args.db, data_dir=args.data_dir,
+                 snapshot_dir=args.snapshot_dir, jobs=args.jobs, force=args.force)
+        elif args.command == "list":
+            list_snapshots(args.snapshot_dir)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
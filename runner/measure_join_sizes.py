@@ -1,191 +1,58 @@
 #!/usr/bin/env python3
 """
 Measure intermediate join sizes for SSB queries.
-Uses SQL queries with CTEs to count rows at each join step.
+Runs each query once per rep with DuckDB's JSON profiling enabled and reads
+the operator cardinalities of the plan that actually executed, including the
+rows removed by RPT's transfer filters (USE_BF) before each join.
 """
 
 import argparse
-import subprocess
 import csv
+import tempfile
 from pathlib import Path
 
-# SSB query definitions with intermediate join measurements
-QUERIES = {
-    "q1.1": {
-        "query": """
-            SELECT sum(LO_EXTENDEDPRICE * LO_DISCOUNT) AS revenue
-            FROM ssb.lineorder, ssb.date
-            WHERE LO_ORDERDATE = D_DATEKEY
-              AND D_YEAR = 1993
-              AND LO_DISCOUNT BETWEEN 1 AND 3
-              AND LO_QUANTITY < 25;
-        """,
-        "joins": [
-            ("date_filtered", "SELECT COUNT(*) FROM ssb.date WHERE d_year = 1993"),
-            ("lineorder_filtered", "SELECT COUNT(*) FROM ssb.lineorder WHERE lo_discount BETWEEN 1 AND 3 AND lo_quantity < 25"),
-            ("join1", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.date d
-                WHERE lo.lo_orderdate = d.d_datekey
-                  AND d.d_year = 1993
-                  AND lo.lo_discount BETWEEN 1 AND 3
-                  AND lo.lo_quantity < 25
-            """)
-        ]
-    },
-    "q2.1": {
-        "query": """
-            SELECT sum(LO_REVENUE) AS sum_revenue, D_YEAR, P_BRAND1
-            FROM ssb.lineorder, ssb.date, ssb.part, ssb.supplier
-            WHERE LO_ORDERDATE = D_DATEKEY
-              AND LO_PARTKEY = P_PARTKEY
-              AND LO_SUPPKEY = S_SUPPKEY
-              AND P_CATEGORY = 'MFGR#12'
-              AND S_REGION = 'AMERICA'
-            GROUP BY D_YEAR, P_BRAND1
-            ORDER BY D_YEAR, P_BRAND1;
-        """,
-        "joins": [
-            ("date_all", "SELECT COUNT(*) FROM ssb.date"),
-            ("part_filtered", "SELECT COUNT(*) FROM ssb.part WHERE p_category = 'MFGR#12'"),
-            ("supplier_filtered", "SELECT COUNT(*) FROM ssb.supplier WHERE s_region = 'AMERICA'"),
-            ("lineorder_all", "SELECT COUNT(*) FROM ssb.lineorder"),
-            ("join_date", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.date d
-                WHERE lo.lo_orderdate = d.d_datekey
-            """),
-            ("join_date_part", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.date d, ssb.part p
-                WHERE lo.lo_orderdate = d.d_datekey
-                  AND lo.lo_partkey = p.p_partkey
-                  AND p.p_category = 'MFGR#12'
-            """),
-            ("join_final", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.date d, ssb.part p, ssb.supplier s
-                WHERE lo.lo_orderdate = d.d_datekey
-                  AND lo.lo_partkey = p.p_partkey
-                  AND lo.lo_suppkey = s.s_suppkey
-                  AND p.p_category = 'MFGR#12'
-                  AND s.s_region = 'AMERICA'
-            """)
-        ]
-    },
-    "q3.1": {
-        "query": """
-            SELECT C_NATION, S_NATION, D_YEAR, sum(LO_REVENUE) AS revenue
-            FROM ssb.customer, ssb.lineorder, ssb.supplier, ssb.date
-            WHERE LO_CUSTKEY = C_CUSTKEY
-              AND LO_SUPPKEY = S_SUPPKEY
-              AND LO_ORDERDATE = D_DATEKEY
-              AND C_REGION = 'ASIA'
-              AND S_REGION = 'ASIA'
-              AND D_YEAR BETWEEN 1992 AND 1997
-            GROUP BY C_NATION, S_NATION, D_YEAR
-            ORDER BY D_YEAR ASC, revenue DESC;
-        """,
-        "joins": [
-            ("customer_filtered", "SELECT COUNT(*) FROM ssb.customer WHERE c_region = 'ASIA'"),
-            ("supplier_filtered", "SELECT COUNT(*) FROM ssb.supplier WHERE s_region = 'ASIA'"),
-            ("date_filtered", "SELECT COUNT(*) FROM ssb.date WHERE d_year BETWEEN 1992 AND 1997"),
-            ("lineorder_all", "SELECT COUNT(*) FROM ssb.lineorder"),
-            ("join_customer", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.customer c
-                WHERE lo.lo_custkey = c.c_custkey AND c.c_region = 'ASIA'
-            """),
-            ("join_supplier", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.customer c, ssb.supplier s
-                WHERE lo.lo_custkey = c.c_custkey AND lo.lo_suppkey = s.s_suppkey
-                  AND c.c_region = 'ASIA' AND s.s_region = 'ASIA'
-            """),
-            ("join_final", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.customer c, ssb.supplier s, ssb.date d
-                WHERE lo.lo_custkey = c.c_custkey 
-                  AND lo.lo_suppkey = s.s_suppkey
-                  AND lo.lo_orderdate = d.d_datekey
-                  AND c.c_region = 'ASIA' AND s.s_region = 'ASIA'
-                  AND d.d_year BETWEEN 1992 AND 1997
-            """)
-        ]
-    },
-    "q4.1": {
-        "query": """
-            SELECT D_YEAR, C_NATION,
-                   sum(LO_REVENUE - LO_SUPPLYCOST) AS profit
-            FROM ssb.date, ssb.customer, ssb.supplier, ssb.part, ssb.lineorder
-            WHERE LO_CUSTKEY = C_CUSTKEY
-              AND LO_SUPPKEY = S_SUPPKEY
-              AND LO_PARTKEY = P_PARTKEY
-              AND LO_ORDERDATE = D_DATEKEY
-              AND C_REGION = 'AMERICA'
-              AND S_REGION = 'AMERICA'
-              AND (P_MFGR = 'MFGR#1' OR P_MFGR = 'MFGR#2')
-            GROUP BY D_YEAR, C_NATION
-            ORDER BY D_YEAR, C_NATION;
-        """,
-        "joins": [
-            ("customer_filtered", "SELECT COUNT(*) FROM ssb.customer WHERE c_region = 'AMERICA'"),
-            ("supplier_filtered", "SELECT COUNT(*) FROM ssb.supplier WHERE s_region = 'AMERICA'"),
-            ("part_filtered", "SELECT COUNT(*) FROM ssb.part WHERE p_mfgr IN ('MFGR#1', 'MFGR#2')"),
-            ("date_all", "SELECT COUNT(*) FROM ssb.date"),
-            ("lineorder_all", "SELECT COUNT(*) FROM ssb.lineorder"),
-            ("join_customer", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.customer c
-                WHERE lo.lo_custkey = c.c_custkey AND c.c_region = 'AMERICA'
-            """),
-            ("join_supplier", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.customer c, ssb.supplier s
-                WHERE lo.lo_custkey = c.c_custkey AND lo.lo_suppkey = s.s_suppkey
-                  AND c.c_region = 'AMERICA' AND s.s_region = 'AMERICA'
-            """),
-            ("join_part", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.customer c, ssb.supplier s, ssb.part p
-                WHERE lo.lo_custkey = c.c_custkey 
-                  AND lo.lo_suppkey = s.s_suppkey
-                  AND lo.lo_partkey = p.p_partkey
-                  AND c.c_region = 'AMERICA' AND s.s_region = 'AMERICA'
-                  AND p.p_mfgr IN ('MFGR#1', 'MFGR#2')
-            """),
-            ("join_final", """
-                SELECT COUNT(*) FROM ssb.lineorder lo, ssb.customer c, ssb.supplier s, ssb.part p, ssb.date d
-                WHERE lo.lo_custkey = c.c_custkey 
-                  AND lo.lo_suppkey = s.s_suppkey
-                  AND lo.lo_partkey = p.p_partkey
-                  AND lo.lo_orderdate = d.d_datekey
-                  AND c.c_region = 'AMERICA' AND s.s_region = 'AMERICA'
-                  AND p.p_mfgr IN ('MFGR#1', 'MFGR#2')
-            """)
-        ]
-    }
-}
-
-
-def run_count_query(bin_path, db_path, sql):
-    """Run a COUNT query and return the result."""
-    cmd = [bin_path, db_path, "-c", sql]
-    
-    try:
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=60
-        )
-        
-        if result.returncode != 0:
-            print(f"  Error: {result.stderr[:200]}")
-            return None
-        
-        # Extract number from output
-        output = result.stdout.strip()
-        # Look for the number in the output
-        import re
-        match = re.search(r'(\d+)', output)
-        if match:
-            return int(match.group(1))
-        return None
-    except Exception as e:
-        print(f"  Exception: {e}")
-        return None
+from duckdb_session import SESSION_KINDS, open_session
+from profiles import (node_tables, number_repeats, operator_cardinality, operator_name,
+                      plan_roots, scan_table)
+from run_experiments import QUERIES, threads_setup
+
+CSV_FIELDS = ["mode", "query", "rep", "step", "step_name", "operator",
+              "row_count", "input_rows", "rows_removed"]
+
+
+def join_steps(profile):
+    """Collect scan, transfer filter and join steps in execution order.
+
+    Children are visited before their parent, so steps appear bottom-up the
+    way the pipelines produce them. For hash joins the first child is the
+    probe side and the second the build side. Repeated labels (one
+    filter:<table> per transfer filter stacked on a scan) are numbered.
+    """
+    steps = []
+
+    def visit(node):
+        children = node.get("children", [])
+        for child in children:
+            visit(child)
+        name = operator_name(node).strip().upper()
+        rows = operator_cardinality(node)
+        if "SCAN" in name and scan_table(node):
+            scanned = int(node.get("operator_rows_scanned", 0) or 0) or rows
+            steps.append((f"scan:{scan_table(node)}", name, rows, scanned))
+        elif name == "USE_BF" and children:
+            input_rows = operator_cardinality(children[0])
+            tables = "+".join(node_tables(node))
+            steps.append((f"filter:{tables}", name, rows, input_rows))
+        elif name == "HASH_JOIN" and len(children) == 2:
+            probe, build = children
+            label = f"join:{'+'.join(node_tables(probe))}|{'+'.join(node_tables(build))}"
+            input_rows = operator_cardinality(probe)
+            steps.append((label, name, rows, input_rows))
+
+    for root in plan_roots(profile):
+        visit(root)
+    labels = number_repeats(label for label, *_ in steps)
+    return [(label,) + tuple(step[1:]) for label, step in zip(labels, steps)]
 
 
 def main():
@@ -202,6 +69,21 @@ def main():
                         help="Output CSV file")
     parser.add_argument("--queries", nargs="+", default=None,
                         help="Specific queries to run (default: all)")
+    parser.add_argument("--reps", type=int, default=1,
+                        help="Executions per query (join orders may differ per run)")
+    parser.add_argument("--session", choices=SESSION_KINDS, default="persistent",
+                        help="How to run queries (see run_experiments.py)")
+    parser.add_argument("--read-only", action="store_true",
+                        help="Open the database read-only, so cells running side by side "
+                             "can share it")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="DuckDB threads (default: DuckDB's own, all cores); set by "
+                             "orchestrator.py to the CPUs a cell is pinned to")
+    parser.add_argument("--sf", default=None,
+                        help="Scale factor of the database, recorded with the run")
+    parser.add_argument("--store", default=None,
+                        help="Also record the run in this results store "
+                             "(see results_store.py)")
     args = parser.parse_args()
 
     db_path = str(Path(args.db))
@@ -212,29 +94,58 @@ def main():
 
     queries_to_run = args.queries if args.queries else list(QUERIES.keys())
 
-    with out_path.open("w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["mode", "query", "step", "step_name", "row_count"])
+    run = None
+    if args.store:
+        from results_store import new_run
+        run = new_run("join_sizes", args.mode, args.sf, bin_path, db_path, args.session,
+                      threads=args.threads)
+    rows_out = []
+
+    with out_path.open("w", newline="") as f, \
+            tempfile.TemporaryDirectory(prefix="rpt-ssb-profile-") as tmp_dir, \
+            open_session(args.session, bin_path, db_path, read_only=args.read_only,
+                         setup_sql=threads_setup(args.threads)) as session:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        profile_path = Path(tmp_dir) / "profile.json"
 
         for qname in queries_to_run:
             if qname not in QUERIES:
                 print(f"Warning: Query {qname} not found, skipping")
                 continue
-                
-            query_info = QUERIES[qname]
+
             print(f"\nAnalyzing {args.mode} {qname}...")
-            
-            for step_num, (step_name, count_sql) in enumerate(query_info["joins"], 1):
-                row_count = run_count_query(bin_path, db_path, count_sql)
-                if row_count is not None:
-                    writer.writerow([args.mode, qname, step_num, step_name, row_count])
-                    print(f"  {step_name}: {row_count:,} rows")
-                else:
-                    writer.writerow([args.mode, qname, step_num, step_name, -1])
-                    print(f"  {step_name}: Failed to get count")
-    
+            for rep in range(1, args.reps + 1):
+                try:
+                    result = session.execute(QUERIES[qname], profile_path=profile_path)
+                except RuntimeError as e:
+                    print(f"  Error: {str(e)[:200]}")
+                    continue
+
+                for step_num, (step_name, operator, rows, input_rows) in enumerate(
+                        join_steps(result.profile), 1):
+                    row = {
+                        "mode": args.mode,
+                        "query": qname,
+                        "rep": rep,
+                        "step": step_num,
+                        "step_name": step_name,
+                        "operator": operator,
+                        "row_count": rows,
+                        "input_rows": input_rows,
+                        "rows_removed": input_rows - rows,
+                    }
+                    writer.writerow(row)
+                    rows_out.append(row)
+                    removed = f" ({input_rows - rows:,} removed)" if input_rows > rows else ""
+                    print(f"  {step_name}: {rows:,} rows{removed}")
+
     print(f"\nResults saved to: {out_path}")
 
+    if run is not None:
+        from results_store import record
+        record(run, rows_out, args.store)
+
 
 if __name__ == "__main__":
     main()
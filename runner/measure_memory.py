@@ -2,6 +2,8 @@
 """
 Measure memory utilization for SSB queries.
 Uses /usr/bin/time to track peak memory usage during query execution.
+With --timeline, samples each execution's memory at high frequency instead
+(see memory_sampler.py) and writes the per-query curves to a second CSV.
 """
 
 import argparse
@@ -10,6 +12,11 @@ import csv
 import re
 from pathlib import Path
 
+from memory_sampler import SOURCES, TIMELINE_FIELDS, run_with_timeline, timeline_rows
+
+# Sampling interval of the /proc fallback when /usr/bin/time is missing
+ALT_INTERVAL = 0.001
+
 # SSB query definitions (same as run_experiments.py)
 QUERIES = {
     "q1.1": """
@@ -181,9 +188,11 @@ def parse_time_output(stderr_output):
     return peak_memory_kb
 
 
-def run_query_with_memory(bin_path, db_path, sql):
+def run_query_with_memory(bin_path, db_path, sql, setup_sql=None, read_only=False):
     """Run a query using /usr/bin/time to measure memory."""
-    cmd = ["/usr/bin/time", "-v", bin_path, db_path, "-c", sql]
+    script = f"{setup_sql};\n{sql}" if setup_sql else sql
+    cmd = (["/usr/bin/time", "-v", bin_path, db_path]
+           + (["-readonly"] if read_only else []) + ["-c", script])
     
     try:
         result = subprocess.run(
@@ -208,60 +217,20 @@ def run_query_with_memory(bin_path, db_path, sql):
         return None, "timeout"
     except FileNotFoundError:
         # /usr/bin/time not available, try alternative
-        return run_query_with_memory_alt(bin_path, db_path, sql)
+        return run_query_with_memory_alt(bin_path, db_path, sql, setup_sql, read_only)
     except Exception as e:
         return None, f"exception: {str(e)}"
 
 
-def run_query_with_memory_alt(bin_path, db_path, sql):
-    """Alternative method: use /proc filesystem to monitor memory."""
-    import os
-    import time
-    
-    cmd = [bin_path, db_path, "-c", sql]
-    
-    try:
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.PIPE,
-            preexec_fn=os.setsid
-        )
-        
-        peak_memory = 0
-        pid = process.pid
-        
-        # Monitor /proc/pid/status for VmRSS (Resident Set Size)
-        while process.poll() is None:
-            try:
-                with open(f'/proc/{pid}/status', 'r') as f:
-                    for line in f:
-                        if line.startswith('VmRSS:'):
-                            # Extract KB value
-                            match = re.search(r'(\d+)', line)
-                            if match:
-                                memory_kb = int(match.group(1))
-                                memory_bytes = memory_kb * 1024
-                                if memory_bytes > peak_memory:
-                                    peak_memory = memory_bytes
-                            break
-                time.sleep(0.1)  # Check every 100ms
-            except (FileNotFoundError, ProcessLookupError):
-                break
-        
-        process.wait()
-        
-        if process.returncode != 0:
-            error = process.stderr.read().decode('utf-8', errors='ignore')[:200]
-            return None, f"error: {error}"
-        
-        if peak_memory == 0:
-            return None, "could not measure memory"
-        
-        return peak_memory, None
-        
-    except Exception as e:
-        return None, f"exception: {str(e)}"
+def run_query_with_memory_alt(bin_path, db_path, sql, setup_sql=None, read_only=False):
+    """Alternative method: sample /proc/<pid>/status every millisecond."""
+    timeline = run_with_timeline(bin_path, db_path, sql, ALT_INTERVAL, setup_sql=setup_sql,
+                                 read_only=read_only)
+    if timeline.error:
+        return None, f"error: {timeline.error[:200]}"
+    if not timeline.peak_bytes:
+        return None, "could not measure memory"
+    return timeline.peak_bytes, None
 
 
 def main():
@@ -280,6 +249,26 @@ def main():
                         help="Output CSV file")
     parser.add_argument("--queries", nargs="+", default=None,
                         help="Specific queries to run (default: all)")
+    parser.add_argument("--timeline", default=None,
+                        help="Also record memory timelines to this CSV")
+    parser.add_argument("--interval-ms", type=float, default=1.0,
+                        help="Timeline sampling interval in milliseconds")
+    parser.add_argument("--source", choices=SOURCES, default="status",
+                        help="Timeline source: /proc status, smaps_rollup or a cgroup v2 group")
+    parser.add_argument("--cgroup-parent", default=None,
+                        help="cgroup v2 group to create per-execution groups in "
+                             "(default: this process's group)")
+    parser.add_argument("--read-only", action="store_true",
+                        help="Open the database read-only, so cells running side by side "
+                             "can share it")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="DuckDB threads (default: DuckDB's own, all cores); set by "
+                             "orchestrator.py to the CPUs a cell is pinned to")
+    parser.add_argument("--sf", default=None,
+                        help="Scale factor of the database, recorded with the run")
+    parser.add_argument("--store", default=None,
+                        help="Also record the run in this results store "
+                             "(see results_store.py)")
     args = parser.parse_args()
 
     db_path = str(Path(args.db))
@@ -289,6 +278,24 @@ def main():
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     queries_to_run = args.queries if args.queries else list(QUERIES.keys())
+    setup_sql = f"SET threads = {args.threads}" if args.threads else None
+
+    run = None
+    if args.store:
+        from results_store import new_run
+        run = new_run("memory", args.mode, args.sf, bin_path, db_path, "spawn",
+                      threads=args.threads)
+    rows = []
+
+    timeline_file = None
+    timeline_writer = None
+    if args.timeline:
+        timeline_path = Path(args.timeline)
+        timeline_path.parent.mkdir(parents=True, exist_ok=True)
+        timeline_file = timeline_path.open("w", newline="")
+        timeline_writer = csv.DictWriter(timeline_file, fieldnames=TIMELINE_FIELDS,
+                                         extrasaction="ignore")
+        timeline_writer.writeheader()
 
     with out_path.open("w", newline="") as f:
         writer = csv.writer(f)
@@ -304,10 +311,26 @@ def main():
             
             for rep in range(1, args.reps + 1):
                 print(f"  Rep {rep}/{args.reps}...", end=" ", flush=True)
-                peak_mem, status = run_query_with_memory(
-                    bin_path, db_path, sql
-                )
+                if timeline_writer:
+                    timeline = run_with_timeline(
+                        bin_path, db_path, sql, args.interval_ms / 1000,
+                        args.source, args.cgroup_parent, setup_sql=setup_sql,
+                        read_only=args.read_only
+                    )
+                    timeline_writer.writerows(timeline_rows(args.mode, qname, rep, timeline))
+                    peak_mem = None if timeline.error else timeline.peak_bytes
+                    status = timeline.error or "could not measure memory"
+                else:
+                    peak_mem, status = run_query_with_memory(
+                        bin_path, db_path, sql, setup_sql, args.read_only
+                    )
                 
+                rows.append({
+                    "query": qname,
+                    "rep": rep,
+                    "peak_memory_bytes": int(peak_mem) if peak_mem is not None else None,
+                    "status": "success" if peak_mem is not None else status or "failed",
+                })
                 if peak_mem is not None:
                     peak_mb = peak_mem / (1024 * 1024)
                     writer.writerow([
@@ -315,16 +338,29 @@ def main():
                         int(peak_mem), f"{peak_mb:.2f}",
                         "success"
                     ])
-                    print(f"Peak: {peak_mb:.2f} MB")
+                    print(f"Peak: {peak_mb:.2f} MB", end="")
+                    if timeline_writer:
+                        print(f" ({len(timeline.samples)} samples, "
+                              f"~{timeline.resolution_ms() or 0:.2f} ms apart, query "
+                              f"{timeline.query_start_ms or 0:.1f}-"
+                              f"{timeline.query_end_ms or 0:.1f} ms)", end="")
+                    print()
                 else:
                     writer.writerow([
                         args.mode, qname, rep,
                         -1, -1, status or "failed"
                     ])
                     print(f"Failed: {status}")
-    
+
+    if timeline_file:
+        timeline_file.close()
+        print(f"Memory timelines saved to: {args.timeline}")
     print(f"\nResults saved to: {out_path}")
 
+    if run is not None:
+        from results_store import record
+        record(run, rows, args.store)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+High-frequency memory timeline of a single duckdb execution.
+
+A background thread samples the query process every --interval-ms
+(sub-millisecond intervals work; the achieved resolution depends on the
+source and is reported) from one of:
+
+  - status: /proc/<pid>/status, RSS split into anonymous and file-backed
+            (cheap, ~10 us per sample; the default)
+  - smaps:  /proc/<pid>/smaps_rollup, adds PSS (costs more per sample on
+            processes with many mappings)
+  - cgroup: a per-execution cgroup v2 child group, memory.current plus the
+            kernel-tracked memory.peak, so no spike is missed between samples
+
+The query is framed by `.print` markers so the timeline records when the
+statement started and finished, after process start-up and catalog load.
+Every sample is a dict with t_ms (since process start) and whichever of
+rss_bytes, pss_bytes, anon_bytes, file_bytes, cgroup_bytes the source has.
+
+Used by measure_memory.py --timeline; `plot` overlays the curves of one
+query across modes and shades the query window of each:
+
+  python3 memory_sampler.py plot memory_timeline.csv --query q2.1 --out q2.1.png
+"""
+
+import argparse
+import csv
+import os
+import re
+import subprocess
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from duckdb_session import ERROR_RE, _line_buffered, _terminate
+
+SOURCES = ("status", "smaps", "cgroup")
+
+TIMELINE_FIELDS = ["mode", "query", "rep", "source", "t_ms", "phase", "rss_bytes",
+                   "pss_bytes", "anon_bytes", "file_bytes", "cgroup_bytes"]
+
+START_MARKER = "__rpt_ssb_query_start__"
+END_MARKER = "__rpt_ssb_query_end__"
+
+# "RssAnon:     1234 kB" in status, "Pss_Anon:    1234 kB" in smaps_rollup
+KB_LINE_RE = re.compile(rb"^(\w+):\s+(\d+) kB", re.MULTILINE)
+
+STATUS_FIELDS = {b"VmRSS": "rss_bytes", b"RssAnon": "anon_bytes",
+                 b"RssFile": "file_bytes"}
+SMAPS_FIELDS = {b"Rss": "rss_bytes", b"Pss": "pss_bytes",
+                b"Pss_Anon": "anon_bytes", b"Pss_File": "file_bytes"}
+
+
+def parse_kb_fields(data, fields):
+    """Pick the "<name>: N kB" lines listed in fields, converted to bytes."""
+    sample = {}
+    for name, value in KB_LINE_RE.findall(data):
+        key = fields.get(name)
+        if key:
+            sample[key] = int(value) * 1024
+    return sample
+
+
+def cgroup2_root():
+    """Mount point of the cgroup v2 hierarchy (pure or hybrid layout)."""
+    with open("/proc/self/mountinfo") as f:
+        for line in f:
+            left, _, right = line.partition(" - ")
+            if right.split()[0] == "cgroup2":
+                return Path(left.split()[4])
+    raise RuntimeError("cgroup v2 is not mounted")
+
+
+def default_cgroup_parent():
+    """This process's own cgroup v2 group, where child groups are created."""
+    with open("/proc/self/cgroup") as f:
+        for line in f:
+            if line.startswith("0::"):
+                return cgroup2_root() / line.strip()[3:].lstrip("/")
+    raise RuntimeError("process is not in a cgroup v2 hierarchy")
+
+
+class CgroupGroup:
+    """A throw-away cgroup v2 child group that the query process joins."""
+
+    def __init__(self, parent=None, memory_max=None):
+        parent = Path(parent) if parent else default_cgroup_parent()
+        controllers = (parent / "cgroup.subtree_control").read_text().split()
+        if "memory" not in controllers:
+            raise RuntimeError(
+                f"memory controller not enabled in {parent}/cgroup.subtree_control"
+            )
+        self.path = parent / f"rpt-ssb-{uuid.uuid4().hex[:12]}"
+        self.path.mkdir()
+        if memory_max is not None:
+            # hard cap without swap, so an over-budget query is OOM-killed
+            # instead of paging
+            (self.path / "memory.max").write_text(str(int(memory_max)))
+            swap_max = self.path / "memory.swap.max"
+            if swap_max.exists():
+                swap_max.write_text("0")
+
+    def join(self):
+        """preexec_fn: move the forked child into the group before exec."""
+        (self.path / "cgroup.procs").write_text(str(os.getpid()))
+
+    def read(self, name):
+        try:
+            return int((self.path / name).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def events(self):
+        """memory.events counters, e.g. {"oom_kill": 1}."""
+        try:
+            lines = (self.path / "memory.events").read_text().splitlines()
+        except FileNotFoundError:
+            return {}
+        return {name: int(value) for name, value in (line.split() for line in lines)}
+
+    def remove(self):
+        try:
+            self.path.rmdir()
+        except OSError:
+            pass
+
+
+class MemorySampler(threading.Thread):
+    """Sample a process's memory every interval seconds until stopped."""
+
+    def __init__(self, pid, interval, source="status", cgroup=None, t0=None):
+        super().__init__(daemon=True)
+        if source not in SOURCES:
+            raise ValueError(f"Unknown memory source: {source}")
+        self.pid = pid
+        self.interval = interval
+        self.source = source
+        self.cgroup = cgroup
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.samples = []
+        self._fd = None
+        self._stop_event = threading.Event()
+
+    def _open(self):
+        if self.source == "cgroup":
+            return os.open(self.cgroup.path / "memory.current", os.O_RDONLY)
+        name = "status" if self.source == "status" else "smaps_rollup"
+        return os.open(f"/proc/{self.pid}/{name}", os.O_RDONLY)
+
+    def _read(self, fd):
+        if self.source == "smaps":
+            # smaps_rollup binds to the address space at open time, so reopen
+            # it to follow the exec from the stdbuf wrapper into duckdb
+            os.close(fd)
+            self._fd = None
+            fd = self._fd = self._open()
+        # pread from offset 0 makes procfs/cgroupfs regenerate the file
+        data = os.pread(fd, 8192, 0)
+        if self.source == "cgroup":
+            return {"cgroup_bytes": int(data)}
+        fields = STATUS_FIELDS if self.source == "status" else SMAPS_FIELDS
+        return parse_kb_fields(data, fields)
+
+    def run(self):
+        try:
+            self._fd = self._open()
+        except FileNotFoundError:
+            return
+        try:
+            next_tick = time.perf_counter()
+            while not self._stop_event.is_set():
+                try:
+                    sample = self._read(self._fd)
+                except (OSError, ValueError):
+                    break  # process exited
+                if sample:
+                    sample["t_ms"] = (time.perf_counter() - self.t0) * 1000
+                    self.samples.append(sample)
+                next_tick += self.interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+        finally:
+            if self._fd is not None:
+                os.close(self._fd)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.samples
+
+
+class Timeline:
+    """Samples plus query start/end of one execution."""
+
+    def __init__(self, samples, source, query_start_ms, query_end_ms,
+                 peak_bytes, error=None):
+        self.samples = samples
+        self.source = source
+        self.query_start_ms = query_start_ms
+        self.query_end_ms = query_end_ms
+        self.peak_bytes = peak_bytes
+        self.error = error
+
+    def phase(self, t_ms):
+        """startup (process start, catalog load), query or shutdown."""
+        if self.query_start_ms is None or t_ms < self.query_start_ms:
+            return "startup"
+        if self.query_end_ms is None or t_ms <= self.query_end_ms:
+            return "query"
+        return "shutdown"
+
+    def resolution_ms(self):
+        """Median spacing between samples."""
+        gaps = sorted(b["t_ms"] - a["t_ms"] for a, b in zip(self.samples, self.samples[1:]))
+        return gaps[len(gaps) // 2] if gaps else None
+
+
+def peak_of(samples, source):
+    key = "cgroup_bytes" if source == "cgroup" else "rss_bytes"
+    values = [s[key] for s in samples if key in s]
+    return max(values) if values else None
+
+
+def run_with_timeline(bin_path, db_path, sql, interval, source="status",
+                      cgroup_parent=None, timeout=300, setup_sql=None, memory_max=None,
+                      read_only=False):
+    """Run one query in a fresh duckdb process while sampling its memory.
+
+    setup_sql runs before the start marker; memory_max (bytes) caps the
+    process's cgroup and requires the cgroup source.
+    """
+    if memory_max is not None and source != "cgroup":
+        raise ValueError("memory_max needs the cgroup source")
+    group = CgroupGroup(cgroup_parent, memory_max) if source == "cgroup" else None
+    script = f".print {START_MARKER}\n{_terminate(sql)}\n.print {END_MARKER}\n"
+    if setup_sql:
+        script = _terminate(setup_sql) + "\n" + script
+    t0 = time.perf_counter()
+    try:
+        process = subprocess.Popen(
+            _line_buffered([bin_path, db_path] + (["-readonly"] if read_only else [])),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            preexec_fn=group.join if group else None,
+        )
+        sampler = MemorySampler(process.pid, interval, source, group, t0)
+        sampler.start()
+        timer = threading.Timer(timeout, process.kill)
+        timer.start()
+        start_ms = end_ms = None
+        error = None
+        try:
+            process.stdin.write(script)
+            process.stdin.close()
+            for line in process.stdout:
+                line = line.rstrip("\n")
+                if line == START_MARKER:
+                    start_ms = (time.perf_counter() - t0) * 1000
+                elif line == END_MARKER:
+                    end_ms = (time.perf_counter() - t0) * 1000
+                elif error is None and ERROR_RE.match(line):
+                    error = line
+            process.wait()
+        finally:
+            timer.cancel()
+            samples = sampler.stop()
+        if process.returncode != 0 and error is None:
+            if group and group.events().get("oom_kill"):
+                error = "oom-kill"
+            elif process.returncode == -9:
+                error = "timeout"
+            else:
+                error = f"exit {process.returncode}"
+        peak = peak_of(samples, source)
+        if group:
+            # the kernel's high-water mark also covers spikes between samples
+            peak = max(filter(None, [peak, group.read("memory.peak")]), default=None)
+        return Timeline(samples, source, start_ms, end_ms, peak, error)
+    finally:
+        if group:
+            group.remove()
+
+
+def timeline_rows(mode, query, rep, timeline):
+    for sample in timeline.samples:
+        row = {"mode": mode, "query": query, "rep": rep, "source": timeline.source}
+        row.update(sample)
+        row["t_ms"] = f"{sample['t_ms']:.3f}"
+        row["phase"] = timeline.phase(sample["t_ms"])
+        yield row
+
+
+def load_timeline(csv_path):
+    """{(mode, query, rep): [(t_ms, bytes, phase)]} using RSS or cgroup bytes."""
+    curves = defaultdict(list)
+    with open(csv_path) as f:
+        for row in csv.DictReader(f):
+            value = row["cgroup_bytes"] if row["source"] == "cgroup" else row["rss_bytes"]
+            if value:
+                key = (row["mode"], row["query"], int(row["rep"]))
+                curves[key].append((float(row["t_ms"]), int(value), row["phase"]))
+    return curves
+
+
+def plot_timeline(csv_path, query, out_path, rep=None):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    curves = load_timeline(csv_path)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for (mode, qname, r), points in sorted(curves.items()):
+        if qname != query or (rep is not None and r != rep):
+            continue
+        ts, values, phases = zip(*points)
+        line, = ax.plot(ts, [v / (1024 * 1024) for v in values], label=f"{mode} rep {r}",
+                        linewidth=1)
+        window = [t for t, phase in zip(ts, phases) if phase == "query"]
+        if window:
+            ax.axvspan(window[0], window[-1], color=line.get_color(), alpha=0.08)
+    ax.set_xlabel("Time since process start (ms)")
+    ax.set_ylabel("Memory (MB)")
+    ax.set_title(f"Memory timeline: {query}")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(out_path, dpi=150)
+    plt.close(fig)
+    print(f"Saved: {out_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plot per-query memory timelines.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    plot = sub.add_parser("plot", help="Overlay the memory curves of one query")
+    plot.add_argument("timeline", help="Timeline CSV from measure_memory.py --timeline")
+    plot.add_argument("--query", required=True)
+    plot.add_argument("--rep", type=int, default=None,
+                      help="Only plot this repetition (default: all)")
+    plot.add_argument("--out", required=True, help="Output PNG")
+    args = parser.parse_args()
+
+    if args.command == "plot":
+        plot_timeline(args.timeline, args.query, args.out, args.rep)
+
+
+if __name__ == "__main__":
+    main()
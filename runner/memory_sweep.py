@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Memory-pressure sweep: the smallest memory budget each query completes in.
+
+Per query and mode, one unlimited run gives the runtime and peak memory.
+The budget then bisects between --min-mb and that peak (doubled until a
+query completes, if the peak itself is not enough) until the window is
+narrower than --resolution-mb. Every execution is a fresh duckdb process with
+its own temp_directory, and every step is recorded: budget, status, runtime,
+peak memory and the largest amount of data the query had spilled to the
+temp directory at any one time.
+
+The budget is enforced with
+  memory_limit  SET memory_limit in DuckDB; operators that can spill
+                (or fail with an out-of-memory error) see the limit
+  cgroup        memory.max of a per-execution cgroup v2 group (no swap);
+                an over-budget process is OOM-killed, like on a node
+  both          both at once
+
+Spilling hash joins and aggregates depend on the fork's `External` flag in
+setting.hpp; build binaries with `build_cache.py build --define External`
+to enable it. The flags of cached binaries are recorded with every row.
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from ab_scheduler import MODES
+from memory_sampler import run_with_timeline
+from run_experiments import QUERIES, format_seconds
+
+LIMIT_KINDS = ("memory_limit", "cgroup", "both")
+
+STEP_FIELDS = ["mode", "query", "external", "limit", "step", "budget_mb", "status",
+               "time_seconds", "peak_memory_mb", "spill_bytes"]
+SUMMARY_FIELDS = ["mode", "query", "external", "limit", "unlimited_seconds",
+                  "unlimited_peak_mb", "min_feasible_mb", "seconds_at_min",
+                  "slowdown_at_min", "spill_bytes_at_min", "steps"]
+
+MB = 1024 * 1024
+
+SPILL_INTERVAL = 0.005
+
+
+def binary_flags(bin_path):
+    """setting.hpp flags of a build-cache binary, None for other binaries."""
+    meta = Path(bin_path).with_suffix(".json")
+    try:
+        return json.loads(meta.read_text())["flags"]
+    except (FileNotFoundError, KeyError, ValueError):
+        return None
+
+
+def external_of(bin_path):
+    flags = binary_flags(bin_path)
+    if flags is None:
+        return "unknown"
+    return "yes" if "External" in flags else "no"
+
+
+def directory_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass  # temp file deleted while walking
+    return total
+
+
+class SpillSampler(threading.Thread):
+    """Largest size the temp directory reaches while a query runs.
+
+    DuckDB deletes its temp files when the query finishes, so the directory
+    is polled rather than measured afterwards.
+    """
+
+    def __init__(self, path, interval=SPILL_INTERVAL):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, directory_bytes(self.path))
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, directory_bytes(self.path))
+        return self.peak
+
+
+def run_with_budget(bin_path, db_path, sql, budget_mb, limit, temp_root,
+                    cgroup_parent=None, timeout=600):
+    """One fresh-process execution under a budget (None = unlimited)."""
+    temp_dir = tempfile.mkdtemp(prefix="rpt-ssb-spill-", dir=temp_root)
+    setup = [f"SET temp_directory = '{temp_dir}'"]
+    memory_max = None
+    if budget_mb is not None and limit in ("memory_limit", "both"):
+        setup.append(f"SET memory_limit = '{budget_mb}MB'")
+    if budget_mb is not None and limit in ("cgroup", "both"):
+        memory_max = budget_mb * MB
+    source = "cgroup" if limit in ("cgroup", "both") else "status"
+    spill = SpillSampler(temp_dir)
+    spill.start()
+    try:
+        timeline = run_with_timeline(bin_path, db_path, sql, 0.001, source, cgroup_parent,
+                                     timeout, ";\n".join(setup), memory_max)
+    finally:
+        spill_bytes = spill.stop()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    seconds = None
+    if timeline.query_start_ms is not None and timeline.query_end_ms is not None:
+        seconds = (timeline.query_end_ms - timeline.query_start_ms) / 1000
+    if timeline.error is None and seconds is None:
+        timeline.error = "query did not finish"
+    return {
+        "status": "success" if timeline.error is None else timeline.error[:200],
+        "time_seconds": seconds,
+        "peak_memory_mb": timeline.peak_bytes / MB if timeline.peak_bytes else None,
+        "spill_bytes": spill_bytes,
+    }
+
+
+def find_minimum(measure, min_mb, max_mb, resolution_mb):
+    """Bisect the smallest feasible budget; returns (budget, result) or (None, None).
+
+    measure(budget_mb) returns a result dict. The window never narrows below
+    resolution_mb, so the answer is within resolution_mb of the true minimum.
+    """
+    hi = max(max_mb, min_mb)
+    result = measure(hi)
+    while result["status"] != "success":
+        if hi >= max_mb * 8:
+            return None, None  # not even eight times the unlimited peak suffices
+        hi *= 2
+        result = measure(hi)
+    best = (hi, result)
+    low_result = measure(min_mb)
+    if low_result["status"] == "success":
+        return min_mb, low_result
+    lo = min_mb
+    while hi - lo > resolution_mb:
+        mid = (lo + hi) // 2
+        result = measure(mid)
+        if result["status"] == "success":
+            hi = mid
+            best = (mid, result)
+        else:
+            lo = mid
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find the smallest memory budget each SSB query completes in."
+    )
+    parser.add_argument("--baseline-bin", required=True)
+    parser.add_argument("--rpt-bin", required=True)
+    parser.add_argument("--db", default="db/ssb.duckdb",
+                        help="Path to DuckDB database file")
+    parser.add_argument("--queries", nargs="+", default=None,
+                        help="Specific queries to run (default: all)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--limit", choices=LIMIT_KINDS, default="memory_limit",
+                        help="How the budget is enforced")
+    parser.add_argument("--min-mb", type=int, default=16,
+                        help="Smallest budget tried")
+    parser.add_argument("--max-mb", type=int, default=None,
+                        help="Largest budget tried (default: the unlimited peak)")
+    parser.add_argument("--resolution-mb", type=int, default=16,
+                        help="Stop bisecting when the window is this narrow")
+    parser.add_argument("--temp-dir", default=None,
+                        help="Where the per-execution temp directories are created "
+                             "(default: the system temp directory)")
+    parser.add_argument("--cgroup-parent", default=None,
+                        help="cgroup v2 group to create per-execution groups in "
+                             "(default: this process's group)")
+    parser.add_argument("--timeout", type=float, default=600,
+                        help="Seconds before an execution is killed and counted as failed")
+    parser.add_argument("--out", default="memory_sweep.csv",
+                        help="Per-step output CSV")
+    parser.add_argument("--summary-out", default=None,
+                        help="Minimum-budget summary CSV (default: <out>_summary.csv)")
+    args = parser.parse_args()
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path = Path(args.summary_out or out_path.with_name(f"{out_path.stem}_summary.csv"))
+    queries_to_run = args.queries if args.queries else list(QUERIES.keys())
+    bins = {"baseline": str(Path(args.baseline_bin)), "rpt": str(Path(args.rpt_bin))}
+    db_path = str(Path(args.db))
+
+    summaries = []
+    with out_path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=STEP_FIELDS)
+        writer.writeheader()
+        for qname in queries_to_run:
+            if qname not in QUERIES:
+                print(f"Warning: Query {qname} not found, skipping")
+                continue
+            for mode in args.modes:
+                external = external_of(bins[mode])
+                print(f"\n{mode} {qname} (External: {external}, limit: {args.limit})")
+                steps = []
+
+                def measure(budget_mb):
+                    result = run_with_budget(bins[mode], db_path, QUERIES[qname], budget_mb,
+                                             args.limit, args.temp_dir, args.cgroup_parent,
+                                             args.timeout)
+                    steps.append(budget_mb)
+                    writer.writerow({
+                        "mode": mode, "query": qname, "external": external,
+                        "limit": args.limit, "step": len(steps) - 1,
+                        "budget_mb": "" if budget_mb is None else budget_mb,
+                        "status": result["status"],
+                        "time_seconds": format_seconds(result["time_seconds"]),
+                        "peak_memory_mb": ("" if result["peak_memory_mb"] is None
+                                           else f"{result['peak_memory_mb']:.2f}"),
+                        "spill_bytes": result["spill_bytes"],
+                    })
+                    f.flush()
+                    label = "unlimited" if budget_mb is None else f"{budget_mb} MB"
+                    timing = (f"{result['time_seconds']:.4f}s" if result["time_seconds"]
+                              is not None else "-")
+                    print(f"  {label:>10}: {result['status'][:40]:<10} {timing:>10}  "
+                          f"spilled {result['spill_bytes'] / MB:.1f} MB")
+                    return result
+
+                unlimited = measure(None)
+                if unlimited["status"] != "success":
+                    print(f"  {qname} fails without a budget, skipping")
+                    continue
+                peak_mb = unlimited["peak_memory_mb"] or args.min_mb
+                max_mb = args.max_mb or max(args.min_mb, int(peak_mb) + 1)
+                budget, result = find_minimum(measure, args.min_mb, max_mb, args.resolution_mb)
+                summary = {
+                    "mode": mode, "query": qname, "external": external, "limit": args.limit,
+                    "unlimited_seconds": format_seconds(unlimited["time_seconds"]),
+                    "unlimited_peak_mb": f"{peak_mb:.2f}",
+                    "steps": len(steps),
+                }
+                if budget is not None:
+                    summary.update({
+                        "min_feasible_mb": budget,
+                        "seconds_at_min": format_seconds(result["time_seconds"]),
+                        "slowdown_at_min": (f"{result['time_seconds'] / unlimited['time_seconds']:.3f}"
+                                            if unlimited["time_seconds"] else ""),
+                        "spill_bytes_at_min": result["spill_bytes"],
+                    })
+                    print(f"  minimum: {budget} MB")
+                else:
+                    print(f"  no budget up to {max_mb * 8} MB completed")
+                summaries.append(summary)
+
+    with summary_path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summaries)
+
+    minimum = {(s["mode"], s["query"]): s.get("min_feasible_mb") for s in summaries}
+    if set(args.modes) == set(MODES):
+        print(f"\n{'Query':<6} {'baseline MB':>12} {'rpt MB':>8} {'rpt/base':>9}")
+        for qname in queries_to_run:
+            base, rpt = minimum.get(("baseline", qname)), minimum.get(("rpt", qname))
+            if base and rpt:
+                print(f"{qname:<6} {base:>12} {rpt:>8} {rpt / base:>9.2f}")
+    print(f"\nResults saved to: {out_path}")
+    print(f"Minimum budgets saved to: {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
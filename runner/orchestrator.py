@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+Resumable orchestration of the full experiment suite.
+
+The suite is a DAG of steps:
+
+  build:<mode>                   cached binary of a mode (build_cache.py)
+  load:sf<N>                     database of a scale factor (load_ssb.py),
+                                 loaded with the RPT binary
+  perf:sf<N>:<mode>:<cache>      run_experiments.py, one per cache mode
+  join_sizes:sf<N>:<mode>        measure_join_sizes.py
+  memory:sf<N>:<mode>            measure_memory.py
+  render                         render_graphs.py over all scale factors
+  gate                           regression_gate.py compare (with --gate)
+
+Every finished step is checkpointed in a state file with a fingerprint of
+its inputs: its command line, the source of the runner scripts it executes
+(the script and every runner module it imports) and the outcome of its
+upstream steps. Builds and loads are fingerprinted by their build-cache and
+snapshot keys, so a new rpt-src commit, setting flag or .tbl input
+invalidates exactly the steps downstream of it. On a rerun a step is skipped
+when its fingerprint is unchanged and its outputs still exist; anything
+interrupted, failed or invalidated runs again. The state is written after
+every step, so an interrupted sweep resumes where it stopped.
+
+Steps run one at a time in the order of run_all_scale_factors.sh, so
+measurements never overlap. With --parallel, cells whose inputs are done
+run side by side instead, each pinned to its own CPU set by
+core_scheduler.py with DuckDB threads to match and its output in
+results/logs/; the placement and the cells that overlapped it are
+checkpointed with the cell. A failed step blocks its downstream steps but
+not the rest of the sweep.
+
+    python3 orchestrator.py plan                      # what a run would do
+    python3 orchestrator.py run --sf 5 10
+    python3 orchestrator.py run --force 'memory:*'    # rerun matching steps
+    python3 orchestrator.py run --only 'perf:sf10:*'  # these and their inputs
+    python3 orchestrator.py run --parallel --cell-cores 8
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
+from pathlib import Path
+
+from build_cache import build, config_key, mode_flags
+from cache_control import CACHE_MODES, DEFAULT_CACHE_MODE
+from core_scheduler import CoreScheduler, format_cpus, pinned_command
+from duckdb_session import RESULT_MODES
+from load_ssb import load, resolve_snapshot
+from render_graphs import MANIFEST, read_manifest
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+RESULTS_DIR = PROJECT_ROOT / "results"
+STATE_PATH = RESULTS_DIR / "orchestrator_state.json"
+
+# Same order as run_all_scale_factors.sh: RPT first, it also loads the data
+SUITE_MODES = ["rpt", "baseline"]
+
+
+class Step:
+    """One node of the suite DAG.
+
+    run() does the work; key() returns the fingerprint of the step's own
+    inputs (None when it cannot be known before the upstream steps ran).
+    outputs are files that must still exist for the step to count as done,
+    or a function of the step's checkpoint record returning them. A step
+    with cores is a cell the parallel scheduler may pin to that many CPUs
+    next to other cells; one without has the machine to itself. heavy
+    cells use a lot of memory and are kept apart from each other.
+    """
+
+    def __init__(self, name, deps=(), outputs=(), key=None, run=None, always=False,
+                 cores=None, heavy=False):
+        self.name = name
+        self.deps = list(deps)
+        self._outputs = outputs
+        self._key = key
+        self._run = run
+        self.always = always
+        self.cores = cores
+        self.heavy = heavy
+
+    @property
+    def exclusive(self):
+        return self.cores is None
+
+    def key(self, upstream):
+        return self._key(upstream) if self._key else None
+
+    def run(self, upstream, placement=None):
+        return self._run(upstream, placement)
+
+    def outputs(self, record):
+        outputs = self._outputs(record) if callable(self._outputs) else self._outputs
+        return [Path(p) for p in outputs]
+
+
+def digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def local_imports(path):
+    """Runner modules a script imports, anywhere in its body."""
+    names = set()
+    for node in ast.walk(ast.parse(Path(path).read_text())):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+    return {SCRIPT_DIR / f"{name}.py" for name in names
+            if (SCRIPT_DIR / f"{name}.py").is_file()}
+
+
+def script_sources(script):
+    """Hash of a runner script and everything it imports from the runner."""
+    seen, todo = set(), [SCRIPT_DIR / script]
+    while todo:
+        path = todo.pop()
+        if path not in seen:
+            seen.add(path)
+            todo.extend(local_imports(path))
+    return digest({p.name: hashlib.sha256(p.read_bytes()).hexdigest() for p in sorted(seen)})
+
+
+def rendered_graphs(graphs_dir, scale_factors):
+    """Render manifest of every scale factor and the graphs it lists."""
+    outputs = []
+    for sf in scale_factors:
+        manifest = Path(graphs_dir) / f"sf{sf}" / MANIFEST
+        outputs.append(manifest)
+        outputs.extend(manifest.parent / name for name in read_manifest(manifest.parent))
+    return outputs
+
+
+def script_step(name, deps, script, args, outputs=(), always=False, cores=None, heavy=False):
+    """A step that runs a runner script; the binary and database come from upstream.
+
+    With cores the script gets --threads to match the CPUs it is pinned to,
+    and opens the database read-only as other cells may be reading it.
+    """
+    if cores:
+        args = list(args) + ["--threads", cores, "--read-only"]
+
+    def command(upstream):
+        return [sys.executable, str(SCRIPT_DIR / script)] + [
+            upstream[a[1:]]["result"] if isinstance(a, str) and a.startswith("@") else str(a)
+            for a in args]
+
+    def key(upstream):
+        return digest({"command": command(upstream)[1:], "sources": script_sources(script)})
+
+    def run(upstream, placement):
+        cmd = command(upstream)
+        if placement and placement.get("cpus"):
+            cmd = pinned_command(cmd, placement["cpus"])
+        if placement and placement.get("log"):
+            with open(placement["log"], "w") as log:
+                result = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT)
+        else:
+            result = subprocess.run(cmd)
+        if result.returncode != 0:
+            raise RuntimeError(f"{script} exited with status {result.returncode}")
+        return None
+
+    return Step(name, deps, outputs, key, run, always, cores, heavy)
+
+
+def build_step(mode):
+    flags = mode_flags(mode)
+
+    def key(upstream):
+        return config_key(flags)
+
+    def run(upstream, placement):
+        return str(build(flags))
+
+    return Step(f"build:{mode}", key=key, run=run,
+                outputs=lambda record: [record["result"]])
+
+
+def load_step(scale_factor, db_path):
+    def key(upstream):
+        bin_path = upstream["build:rpt"]["result"]
+        if not Path(bin_path).exists():
+            return None
+        return resolve_snapshot(bin_path, scale_factor)[3].name
+
+    def run(upstream, placement):
+        return load(upstream["build:rpt"]["result"], scale_factor, db_path).name
+
+    return Step(f"load:sf{scale_factor}", deps=["build:rpt"], outputs=[db_path],
+                key=key, run=run)
+
+
+def suite_steps(args, cpu_count=None):
+    """Steps of the suite in execution order.
+
+    With cpu_count (a parallel run) the experiment cells get --cell-cores
+    CPUs each, --join-size-cores for join size counts, capped at cpu_count.
+    Cold and os-warm timings stay exclusive: eviction drops the page cache
+    of the whole machine, and a neighbour reading the same database would
+    warm it again.
+    """
+    cell_cores = join_size_cores = None
+    if cpu_count:
+        cell_cores = min(args.cell_cores, cpu_count)
+        join_size_cores = min(args.join_size_cores, cpu_count)
+    steps = [build_step(mode) for mode in SUITE_MODES]
+    store = ["--store", args.store] if args.store else []
+    cells = []
+    for sf in args.sf:
+        db_path = PROJECT_ROOT / "duckdb-rpt" / f"ssb_sf{sf}.db"
+        load_db = load_step(sf, db_path)
+        steps.append(load_db)
+        sf_dir = Path(args.results_dir) / f"sf{sf}"
+        # at or above --heavy-sf every cell holds a large share of the data in memory
+        large = float(sf) >= args.heavy_sf
+        for mode in SUITE_MODES:
+            deps = [f"build:{mode}", load_db.name]
+            common = ["--mode", mode, "--duckdb-bin", f"@build:{mode}", "--db", db_path,
+                      "--sf", sf] + store
+            for cache in args.cache_modes:
+                suffix = "" if cache == DEFAULT_CACHE_MODE else f"_{cache}"
+                out = sf_dir / f"ssb_{mode}{suffix}.csv"
+                steps.append(script_step(
+                    f"perf:sf{sf}:{mode}:{cache}", deps, "run_experiments.py",
+                    common + ["--reps", args.reps, "--cache", cache,
+                              "--result", args.result, "--out", out]
+                    + (["--plans"] if args.plans else []),
+                    outputs=[out], cores=cell_cores if cache == "fully-warm" else None,
+                    heavy=large))
+            out = sf_dir / f"join_sizes_{mode}.csv"
+            steps.append(script_step(f"join_sizes:sf{sf}:{mode}", deps,
+                                     "measure_join_sizes.py", common + ["--out", out],
+                                     outputs=[out], cores=join_size_cores, heavy=large))
+            # peak memory is what this cell measures; it never shares memory
+            # headroom with another heavy cell
+            out = sf_dir / f"memory_{mode}.csv"
+            steps.append(script_step(f"memory:sf{sf}:{mode}", deps, "measure_memory.py",
+                                     common + ["--out", out], outputs=[out],
+                                     cores=cell_cores, heavy=True))
+            cells.extend(step.name for step in steps[-len(args.cache_modes) - 2:])
+    graphs_dir = Path(args.results_dir) / "graphs"
+    steps.append(script_step("render", cells, "render_graphs.py",
+                             list(args.sf) + store + ["--results-dir", args.results_dir,
+                                                      "--graphs-dir", graphs_dir],
+                             outputs=lambda record: rendered_graphs(graphs_dir, args.sf)))
+    if args.gate:
+        # a check, not a result: it runs every time
+        steps.append(script_step("gate", cells, "regression_gate.py",
+                                 store + ["compare", "--name", args.gate,
+                                          "--out", Path(args.results_dir) / "regression_gate.csv"],
+                                 always=True))
+    return steps
+
+
+def select(steps, only, force):
+    """Names of the steps to consider (--only and their inputs) and to force."""
+    by_name = {step.name: step for step in steps}
+    if only:
+        selected = set()
+        todo = [s.name for s in steps if any(fnmatch(s.name, p) for p in only)]
+        while todo:
+            name = todo.pop()
+            if name not in selected:
+                selected.add(name)
+                todo.extend(by_name[name].deps)
+    else:
+        selected = set(by_name)
+    forced = {s.name for s in steps if any(fnmatch(s.name, p) for p in force or [])}
+    return selected, forced
+
+
+def load_state(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return {"steps": {}}
+
+
+def save_state(path, state):
+    """Write the state file atomically, so an interrupt never corrupts it."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n")
+    os.replace(tmp, path)
+
+
+def fingerprint(step, upstream):
+    """Fingerprint of a step: its own key and the outcome of every upstream step."""
+    own = step.key(upstream)
+    if own is None:
+        return None
+    return digest({"key": own, "upstream": {
+        name: [upstream[name]["fingerprint"], upstream[name]["finished_at"]]
+        for name in step.deps}})
+
+
+def status_of(step, record, current, forced):
+    """(action, reason) of a step given its checkpoint and current fingerprint."""
+    if step.name in forced:
+        return "run", "forced"
+    if step.always:
+        return "run", "always"
+    if record is None:
+        return "run", "not run yet"
+    if record.get("status") == "running":
+        return "run", "interrupted"
+    if record.get("status") != "done":
+        return "run", record["status"]
+    if current is None:
+        return "run", "upstream reruns"
+    if current != record["fingerprint"]:
+        return "run", "inputs changed"
+    missing = [p for p in step.outputs(record) if not p.exists()]
+    if missing:
+        return "run", f"missing {missing[0].name}"
+    return "skip", "up to date"
+
+
+def decide(step, records, outcomes, rerun, forced):
+    """(action, reason, upstream, fingerprint) of a step whose inputs are settled."""
+    blocked = [d for d in step.deps if outcomes.get(d) in ("failed", "blocked")]
+    if blocked:
+        return "blocked", f"{blocked[0]} {outcomes[blocked[0]]}", None, None
+    upstream = {d: records[d] for d in step.deps if d in records}
+    known = (len(upstream) == len(step.deps)
+             and not any(d in rerun for d in step.deps))
+    try:
+        current = fingerprint(step, upstream) if known else None
+    except (RuntimeError, OSError, KeyError) as e:
+        return "failed", str(e), None, None
+    action, reason = status_of(step, records.get(step.name), current, forced)
+    return action, reason, upstream, current
+
+
+def execute(steps, state_path, selected, forced, dry_run=False, fail_fast=False,
+            scheduler=None, log_dir=None):
+    """Run the stale steps; returns {name: outcome}.
+
+    Without a scheduler the steps run one at a time in order. With one, a
+    cell starts as soon as its inputs are done and the scheduler has CPUs
+    for it, pinned to them, with its output in log_dir; an exclusive step
+    waits for the machine to drain and holds back the steps after it.
+    """
+    state = load_state(state_path)
+    records = state["steps"]
+    outcomes = {}
+    # steps that will rerun; their dependents' fingerprints change with them
+    rerun = set()
+    pending = [step for step in steps if step.name in selected]
+    running = {}  # future: (step, upstream, placement, start)
+    # steps that ran at the same time as each running or finished step
+    overlap = {}
+    stop = False
+    with ThreadPoolExecutor(max_workers=max(len(pending), 1)) as pool:
+        while pending or running:
+            active = {step.name for step, *_ in running.values()}
+            for step in list(pending):
+                if stop or (scheduler is None and running):
+                    break
+                waiting = active | {s.name for s in pending if s is not step}
+                if any(d in waiting for d in step.deps):
+                    continue
+                action, reason, upstream, current = decide(step, records, outcomes, rerun,
+                                                           forced)
+                if action != "run":
+                    print(f"[{action}]{' ' * (8 - len(action))}{step.name}: {reason}")
+                    outcomes[step.name] = {"skip": "skipped"}.get(action, action)
+                    pending.remove(step)
+                    continue
+                if dry_run:
+                    print(f"[run]     {step.name}: {reason}")
+                    outcomes[step.name] = "planned"
+                    rerun.add(step.name)
+                    pending.remove(step)
+                    continue
+
+                placement = {}
+                if scheduler is not None:
+                    cpus = scheduler.allocate(step.cores, step.heavy, step.exclusive)
+                    if cpus is None:
+                        if step.exclusive:
+                            break
+                        continue
+                    if not step.exclusive:
+                        log = Path(log_dir) / f"{step.name.replace(':', '_')}.log"
+                        log.parent.mkdir(parents=True, exist_ok=True)
+                        placement = {"cpus": cpus, "log": str(log)}
+                pending.remove(step)
+                where = (f" on CPUs {format_cpus(placement['cpus'])} ({step.cores} threads), "
+                         f"log {placement['log']}" if placement else "")
+                print(f"\n[run]     {step.name}: {reason}{where}", flush=True)
+                for name in active:
+                    overlap[name].add(step.name)
+                overlap[step.name] = set(active)
+                active.add(step.name)
+                records[step.name] = {"status": "running",
+                                      "started_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                save_state(state_path, state)
+                future = pool.submit(step.run, upstream, placement)
+                running[future] = (step, upstream, placement, time.perf_counter())
+
+            if not running:
+                # every selected step is decided in order once nothing runs
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step, upstream, placement, start = running.pop(future)
+                if scheduler is not None:
+                    scheduler.release(placement.get("cpus", ()), step.heavy, step.exclusive)
+                try:
+                    result = future.result()
+                    # the key of a build or load is only final once it ran
+                    current = fingerprint(step, upstream)
+                except (RuntimeError, OSError) as e:
+                    log = f" (log {placement['log']})" if placement else ""
+                    print(f"[failed]  {step.name}: {e}{log}")
+                    records[step.name] = {"status": "failed", "error": str(e)[:500],
+                                          "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                    save_state(state_path, state)
+                    outcomes[step.name] = "failed"
+                    stop = stop or fail_fast
+                    continue
+                records[step.name] = {
+                    "status": "done",
+                    "fingerprint": current,
+                    "result": result,
+                    "outputs": [str(p) for p in step.outputs({"result": result})],
+                    "seconds": round(time.perf_counter() - start, 1),
+                    "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+                if placement:
+                    records[step.name].update({
+                        "cpus": format_cpus(placement["cpus"]),
+                        "threads": step.cores,
+                        "concurrent": sorted(overlap[step.name]),
+                        "log": placement["log"],
+                    })
+                save_state(state_path, state)
+                outcomes[step.name] = "done"
+                print(f"[done]    {step.name} in {records[step.name]['seconds']}s", flush=True)
+    return outcomes
+
+
+def print_state(state_path):
+    records = load_state(state_path)["steps"]
+    if not records:
+        print(f"No steps recorded in {state_path}")
+        return
+    print(f"{'Step':<32} {'Status':<8} {'Seconds':>9} {'Finished':<20} {'CPUs':<10} "
+          f"Fingerprint")
+    print("-" * 99)
+    for name, r in records.items():
+        print(f"{name:<32} {r['status']:<8} {r.get('seconds', ''):>9} "
+              f"{r.get('finished_at', ''):<20} {r.get('cpus', 'all'):<10} "
+              f"{r.get('fingerprint') or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the experiment suite as a resumable DAG of checkpointed steps."
+    )
+    parser.add_argument("--state", default=str(STATE_PATH),
+                        help="Checkpoint file of finished steps")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in (("run", "Run every step whose inputs changed"),
+                               ("plan", "Show which steps a run would execute")):
+        p = sub.add_parser(command, help=help_text)
+        p.add_argument("--sf", nargs="+", default=["5", "10"], help="Scale factors")
+        p.add_argument("--cache-modes", nargs="+", choices=CACHE_MODES,
+                       default=[DEFAULT_CACHE_MODE], help="Cache modes of the performance steps")
+        p.add_argument("--result", choices=RESULT_MODES, default="print")
+        p.add_argument("--plans", action="store_true",
+                       help="Record the join order of every timed rep (profiles the "
+                            "timed executions, so their timings include the profiler)")
+        p.add_argument("--reps", type=int, default=5)
+        p.add_argument("--store", default=str(RESULTS_DIR / "warehouse.duckdb"),
+                       help="Results store every run is recorded in")
+        p.add_argument("--gate", default=None,
+                       help="Pinned reference to gate the new runs against")
+        p.add_argument("--results-dir", default=str(RESULTS_DIR))
+        p.add_argument("--only", nargs="+", default=None,
+                       help="Step name patterns to run, with the steps they depend on")
+        p.add_argument("--force", nargs="+", default=None,
+                       help="Step name patterns to rerun even if up to date")
+        p.add_argument("--parallel", action="store_true",
+                       help="Run independent cells side by side on disjoint CPU sets")
+        p.add_argument("--cell-cores", type=int, default=8,
+                       help="CPUs (and DuckDB threads) of a performance or memory cell "
+                            "with --parallel")
+        p.add_argument("--join-size-cores", type=int, default=1,
+                       help="CPUs of a join size cell with --parallel")
+        p.add_argument("--reserve-cpus", type=int, default=1,
+                       help="CPUs left to the orchestrator and the OS with --parallel")
+        p.add_argument("--max-heavy", type=int, default=1,
+                       help="Memory-heavy cells running at once with --parallel")
+        p.add_argument("--heavy-sf", type=float, default=10,
+                       help="Cells at this scale factor and above are memory-heavy")
+        if command == "run":
+            p.add_argument("--fail-fast", action="store_true",
+                           help="Stop at the first failed step")
+
+    sub.add_parser("status", help="List the checkpointed steps")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print_state(args.state)
+        return
+
+    scheduler = None
+    if args.parallel:
+        try:
+            scheduler = CoreScheduler(reserve=args.reserve_cpus,
+                                      max_heavy=max(args.max_heavy, 1))
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(2)
+        print(f"Packing cells onto CPUs {format_cpus(scheduler.cpus)} "
+              f"({len(scheduler.cpus)} CPUs, {args.cell_cores} per cell)")
+    steps = suite_steps(args, len(scheduler.cpus) if scheduler else None)
+    selected, forced = select(steps, args.only, args.force)
+    if not selected:
+        print("Error: no step matches --only")
+        sys.exit(2)
+    dry_run = args.command == "plan"
+    outcomes = execute(steps, args.state, selected, forced, dry_run=dry_run,
+                       fail_fast=not dry_run and args.fail_fast, scheduler=scheduler,
+                       log_dir=Path(args.results_dir) / "logs")
+    counts = {o: sum(v == o for v in outcomes.values())
+              for o in ("done", "planned", "skipped", "failed", "blocked")}
+    print("\n" + ", ".join(f"{n} {o}" for o, n in counts.items() if n))
+    print(f"State: {args.state}")
+    if counts["failed"] or counts["blocked"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
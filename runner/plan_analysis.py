@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Runtime per physical plan, and plan differences between baseline and RPT.
+
+With RandomLeftDeep every execution may pick another join order, so a slow
+repetition can be a slow run or a bad plan. run_experiments.py --plans
+records a signature of every rep's join tree ("(A*B)" joins probe side A
+with build side B, see profiles.plan_signature) and its fingerprint. This
+script groups the reps of each query by plan and reports, per mode, the
+median runtime of every plan and how much of the runtime variance the plan
+explains (between-plan share of the total sum of squares). It then diffs
+the plans of the two modes: plans only one mode chose, and for the most
+frequent plan of each, the join sequence and the subtrees whose build and
+probe sides are swapped.
+
+    python3 plan_analysis.py ../results/sf10/ssb_baseline.csv ../results/sf10/ssb_rpt.csv
+    python3 plan_analysis.py --store ../results/warehouse.duckdb --sf 10
+"""
+
+import argparse
+import csv
+import sys
+from collections import defaultdict
+from pathlib import Path
+from statistics import mean, median
+
+from ab_scheduler import MODES
+from cache_control import CACHE_MODES, DEFAULT_CACHE_MODE
+from profiles import plan_fingerprint
+from run_experiments import format_seconds
+
+GROUP_FIELDS = ["mode", "query", "plan_fingerprint", "plan", "reps", "share",
+                "median_seconds", "min_seconds", "max_seconds"]
+
+
+def load_plan_csv(csv_file):
+    """{query: [(time_seconds, plan)]} of the reps that recorded a plan."""
+    plans = defaultdict(list)
+    with open(csv_file) as f:
+        for row in csv.DictReader(f):
+            if row.get("plan"):
+                plans[row["query"]].append((float(row["time_seconds"]), row["plan"]))
+    return plans
+
+
+def parse_plan(signature):
+    """Nested (probe, build) tuples of a signature; tables are strings."""
+    pos = 0
+
+    def node():
+        nonlocal pos
+        if signature[pos] == "(":
+            pos += 1
+            probe = node()
+            pos += 1  # "*"
+            build = node()
+            pos += 1  # ")"
+            return (probe, build)
+        if signature[pos] == "{":
+            pos += 1
+            parts = [node()]
+            while signature[pos] == ",":
+                pos += 1
+                parts.append(node())
+            pos += 1  # "}"
+            return frozenset(parts)
+        end = pos
+        while end < len(signature) and signature[end] not in "()*{},":
+            end += 1
+        name, pos = signature[pos:end], end
+        return name
+
+    return node()
+
+
+def tables_of(tree):
+    if isinstance(tree, str):
+        return frozenset([tree])
+    return frozenset().union(*(tables_of(part) for part in tree))
+
+
+def join_sequence(tree):
+    """Tables in join order (probe side first); left-deep plans read as a chain."""
+    if isinstance(tree, str):
+        return [tree]
+    if isinstance(tree, frozenset):
+        return [t for part in sorted(tree, key=str) for t in join_sequence(part)]
+    return join_sequence(tree[0]) + join_sequence(tree[1])
+
+
+def join_sides(tree, sides=None):
+    """{tables of a join input: "probe" or "build"} over all joins of a tree."""
+    sides = {} if sides is None else sides
+    if isinstance(tree, tuple):
+        sides[tables_of(tree[0])] = "probe"
+        sides[tables_of(tree[1])] = "build"
+        for part in tree:
+            join_sides(part, sides)
+    elif isinstance(tree, frozenset):
+        for part in tree:
+            join_sides(part, sides)
+    return sides
+
+
+def group_by_plan(reps):
+    """Plan groups of one query, fastest median first."""
+    by_plan = defaultdict(list)
+    for seconds, plan in reps:
+        by_plan[plan].append(seconds)
+    groups = [{
+        "plan": plan,
+        "plan_fingerprint": plan_fingerprint(plan),
+        "reps": len(times),
+        "share": len(times) / len(reps),
+        "median_seconds": median(times),
+        "min_seconds": min(times),
+        "max_seconds": max(times),
+        "times": times,
+    } for plan, times in by_plan.items()]
+    return sorted(groups, key=lambda g: g["median_seconds"])
+
+
+def explained_variance(groups):
+    """Share of the runtime variance between plan groups (eta squared)."""
+    times = [t for g in groups for t in g["times"]]
+    grand = mean(times)
+    total = sum((t - grand) ** 2 for t in times)
+    if total == 0:
+        return None
+    between = sum(len(g["times"]) * (mean(g["times"]) - grand) ** 2 for g in groups)
+    return between / total
+
+
+def print_groups(mode, groups):
+    variance = explained_variance(groups) if len(groups) > 1 else None
+    spread = groups[-1]["median_seconds"] / groups[0]["median_seconds"]
+    explained = f"{variance:.0%}" if variance is not None else "-"
+    print(f"  {mode:<9} {len(groups)} plan(s), slowest/fastest plan {spread:.2f}x, "
+          f"plan explains {explained} of the variance")
+    for g in groups:
+        print(f"    {g['plan_fingerprint']}  {g['reps']:>3} reps  median "
+              f"{g['median_seconds']:.4f}s  [{g['min_seconds']:.4f}-{g['max_seconds']:.4f}]  "
+              f"{g['plan']}")
+
+
+def print_diff(groups):
+    """Plans chosen by only one mode and the difference of the most common ones."""
+    chosen = {mode: {g["plan"] for g in groups[mode]} for mode in MODES}
+    shared = chosen["baseline"] & chosen["rpt"]
+    print(f"  diff      {len(shared)} shared, "
+          f"{len(chosen['baseline'] - shared)} baseline-only, "
+          f"{len(chosen['rpt'] - shared)} rpt-only plan(s)")
+    common = {mode: max(groups[mode], key=lambda g: g["reps"]) for mode in MODES}
+    if common["baseline"]["plan"] == common["rpt"]["plan"]:
+        print("    most common plan is the same in both modes")
+        return
+    trees = {mode: parse_plan(common[mode]["plan"]) for mode in MODES}
+    for mode in MODES:
+        print(f"    {mode:<9} {common[mode]['plan_fingerprint']}  "
+              + " -> ".join(join_sequence(trees[mode])))
+    sides = {mode: join_sides(trees[mode]) for mode in MODES}
+    swapped = [tables for tables, side in sides["baseline"].items()
+               if sides["rpt"].get(tables, side) != side]
+    for tables in sorted(swapped, key=lambda t: (len(t), sorted(t))):
+        print(f"    {'+'.join(sorted(tables))}: {sides['baseline'][tables]} side in baseline, "
+              f"{sides['rpt'][tables]} side in rpt")
+
+
+def analyze_plans(plans, out=None):
+    """plans: {mode: {query: [(seconds, plan)]}}; returns the group rows."""
+    rows = []
+    queries = sorted(set().union(*(plans[mode] for mode in MODES)))
+    for query in queries:
+        print(f"\n{query}")
+        groups = {}
+        for mode in MODES:
+            reps = plans[mode].get(query)
+            if not reps:
+                print(f"  {mode:<9} no plans recorded")
+                continue
+            groups[mode] = group_by_plan(reps)
+            print_groups(mode, groups[mode])
+            for g in groups[mode]:
+                rows.append({
+                    "mode": mode, "query": query,
+                    "plan_fingerprint": g["plan_fingerprint"], "plan": g["plan"],
+                    "reps": g["reps"], "share": f"{g['share']:.3f}",
+                    "median_seconds": format_seconds(g["median_seconds"]),
+                    "min_seconds": format_seconds(g["min_seconds"]),
+                    "max_seconds": format_seconds(g["max_seconds"]),
+                })
+        if len(groups) == len(MODES):
+            print_diff(groups)
+    if out:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=GROUP_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\nPlan groups saved to: {out}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Group reps by physical plan and diff the plans of baseline and RPT."
+    )
+    parser.add_argument("baseline_csv", nargs="?", default=None)
+    parser.add_argument("rpt_csv", nargs="?", default=None)
+    parser.add_argument("--store", default=None,
+                        help="Read the runs from this results store instead of CSVs")
+    parser.add_argument("--sf", default=None,
+                        help="Scale factor of the runs to compare (with --store)")
+    parser.add_argument("--baseline-run", default=None,
+                        help="Baseline run id (default: latest)")
+    parser.add_argument("--rpt-run", default=None,
+                        help="RPT run id (default: latest)")
+    parser.add_argument("--cache", choices=CACHE_MODES, default=DEFAULT_CACHE_MODE,
+                        help="Cache mode of the runs to compare (with --store)")
+    parser.add_argument("--out", default=None,
+                        help="Also write the plan groups to this CSV")
+    args = parser.parse_args()
+
+    if args.store:
+        from results_store import load_plans
+        plans = {"baseline": load_plans(args.store, "baseline", args.sf, args.baseline_run,
+                                        args.cache),
+                 "rpt": load_plans(args.store, "rpt", args.sf, args.rpt_run, args.cache)}
+    elif args.baseline_csv and args.rpt_csv:
+        for path in (args.baseline_csv, args.rpt_csv):
+            if not Path(path).exists():
+                print(f"Error: Results file not found: {path}")
+                sys.exit(1)
+        plans = {"baseline": load_plan_csv(args.baseline_csv),
+                 "rpt": load_plan_csv(args.rpt_csv)}
+    else:
+        parser.error("give a baseline and an RPT CSV, or --store")
+
+    if not any(plans.values()):
+        print("Error: no plans recorded; run run_experiments.py with --plans")
+        sys.exit(1)
+    analyze_plans(plans, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Helpers for DuckDB JSON query profiles.
+
+run_experiments.py --profile stores one JSON profile per execution and a
+flattened per-operator CSV next to the timing CSV. This module flattens the
+profile tree and, when run as a script, compares operator time between a
+baseline and an RPT operators CSV:
+
+    python3 profiles.py ssb_baseline_operators.csv ssb_rpt_operators.csv
+"""
+
+import csv
+import hashlib
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# Operators added by the predicate transfer phase of the RPT fork
+TRANSFER_OPERATORS = ("CREATE_BF", "USE_BF")
+
+OPERATOR_FIELDS = [
+    "mode", "query", "rep", "node_id", "parent_id", "depth",
+    "operator", "timing_seconds", "cardinality", "rows_scanned", "extra_info",
+]
+
+
+def profiling_pragmas(output_path):
+    """SQL that turns on JSON profiling into the given file."""
+    return (
+        "PRAGMA enable_profiling='json';\n"
+        f"PRAGMA profiling_output='{output_path}';"
+    )
+
+
+def load_profile(path):
+    """Load a JSON profile written by DuckDB."""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def operator_name(node):
+    """Operator name across DuckDB profile format versions."""
+    return node.get("operator_name") or node.get("operator_type") or node.get("name") or ""
+
+
+def operator_timing(node):
+    return float(node.get("operator_timing", node.get("timing", 0.0)) or 0.0)
+
+
+def operator_cardinality(node):
+    return int(node.get("operator_cardinality", node.get("cardinality", 0)) or 0)
+
+
+def plan_roots(profile):
+    """Return the operator nodes below the query-level root."""
+    if operator_name(profile) and operator_name(profile) != "Query":
+        return [profile]
+    return profile.get("children", [])
+
+
+def is_transfer_operator(name):
+    return name.upper() in TRANSFER_OPERATORS
+
+
+def scan_table(node):
+    """Table read by a scan node, or None for other operators."""
+    if "SCAN" not in operator_name(node).upper():
+        return None
+    extra = node.get("extra_info", {})
+    if isinstance(extra, dict):
+        table = extra.get("Table") or extra.get("Table Name")
+    else:
+        table = extra.strip().split("\n")[0] if extra else None
+    return table.split(".")[-1].lower() if table else None
+
+
+def node_tables(node):
+    """Sorted base tables scanned anywhere below (and including) a node."""
+    tables = set()
+    table = scan_table(node)
+    if table:
+        tables.add(table)
+    for child in node.get("children", []):
+        tables.update(node_tables(child))
+    return sorted(tables)
+
+
+def number_repeats(labels):
+    """labels with the 2nd, 3rd, ... occurrence of a label suffixed #2, #3, ...
+
+    Stacked transfer filters over one scan all read filter:<table>, so the
+    step labels of a plan are only unique once numbered.
+    """
+    seen = defaultdict(int)
+    numbered = []
+    for label in labels:
+        seen[label] += 1
+        numbered.append(label if seen[label] == 1 else f"{label}#{seen[label]}")
+    return numbered
+
+
+def is_join(node):
+    name = operator_name(node).upper()
+    return ("JOIN" in name or name == "CROSS_PRODUCT") and len(node.get("children", [])) >= 2
+
+
+def plan_signature(profile):
+    """Join tree of a plan as text, e.g. "((lineorder*date)*supplier)".
+
+    "(A*B)" joins probe side A with build side B (DuckDB builds the hash
+    table on the right child). Scans become their table name; every other
+    operator, including the transfer operators, is transparent, so only the
+    join order and the build/probe sides remain.
+    """
+    return _combine([_signature(root) for root in plan_roots(profile)])
+
+
+def _signature(node):
+    children = [part for part in (_signature(child) for child in node.get("children", []))
+                if part]
+    if is_join(node) and len(children) == 2:
+        return f"({children[0]}*{children[1]})"
+    return scan_table(node) or _combine(children)
+
+
+def _combine(parts):
+    """One subtree as is; several unrelated ones (e.g. a CTE) as {a,b}."""
+    parts = [part for part in parts if part]
+    if len(parts) == 1:
+        return parts[0]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def plan_fingerprint(signature):
+    """Short stable id of a plan signature."""
+    return hashlib.sha1(signature.encode()).hexdigest()[:12] if signature else ""
+
+
+def flatten_profile(profile):
+    """Flatten the operator tree in pre-order.
+
+    Every node gets a node_id and the node_id of its parent (-1 for roots),
+    which is enough to rebuild the tree shape from the CSV.
+    """
+    nodes = []
+
+    def visit(node, parent_id, depth):
+        node_id = len(nodes)
+        extra = node.get("extra_info", {})
+        nodes.append({
+            "node_id": node_id,
+            "parent_id": parent_id,
+            "depth": depth,
+            "operator": operator_name(node).strip(),
+            "timing_seconds": operator_timing(node),
+            "cardinality": operator_cardinality(node),
+            "rows_scanned": int(node.get("operator_rows_scanned", 0) or 0),
+            "extra_info": extra if isinstance(extra, str) else json.dumps(extra, sort_keys=True),
+        })
+        for child in node.get("children", []):
+            visit(child, node_id, depth + 1)
+
+    for root in plan_roots(profile):
+        visit(root, -1, 0)
+    return nodes
+
+
+def summarize_profile(profile):
+    """Per-execution totals: join time, transfer time and engine latency."""
+    summary = {"latency": profile.get("latency"), "hash_join_seconds": 0.0,
+               "transfer_seconds": 0.0, "operators": 0}
+    for node in flatten_profile(profile):
+        summary["operators"] += 1
+        if node["operator"].upper() == "HASH_JOIN":
+            summary["hash_join_seconds"] += node["timing_seconds"]
+        elif is_transfer_operator(node["operator"]):
+            summary["transfer_seconds"] += node["timing_seconds"]
+    return summary
+
+
+def load_operator_csv(csv_file):
+    """Load operator rows grouped by query."""
+    by_query = defaultdict(list)
+    with open(csv_file, "r") as f:
+        for row in csv.DictReader(f):
+            by_query[row["query"]].append(row)
+    return by_query
+
+
+def operator_times(rows):
+    """Average time per operator type over all reps of a query."""
+    reps = {row["rep"] for row in rows} or {"1"}
+    totals = defaultdict(float)
+    for row in rows:
+        totals[row["operator"]] += float(row["timing_seconds"])
+    return {op: t / len(reps) for op, t in totals.items()}
+
+
+def compare_operator_times(baseline_file, rpt_file):
+    """Print hash join and transfer time per query for both modes."""
+    baseline = load_operator_csv(baseline_file)
+    rpt = load_operator_csv(rpt_file)
+    queries = sorted(set(baseline) | set(rpt))
+
+    print("=" * 80)
+    print("Operator Time: Baseline vs RPT (seconds, mean per execution)")
+    print("=" * 80)
+    print(f"{'Query':<8} {'Base join':>12} {'RPT join':>12} {'RPT transfer':>14} {'Net saving':>12}")
+    print("-" * 80)
+    for query in queries:
+        base_ops = operator_times(baseline.get(query, []))
+        rpt_ops = operator_times(rpt.get(query, []))
+        base_join = base_ops.get("HASH_JOIN", 0.0)
+        rpt_join = rpt_ops.get("HASH_JOIN", 0.0)
+        transfer = sum(t for op, t in rpt_ops.items() if is_transfer_operator(op))
+        saving = base_join - (rpt_join + transfer)
+        print(f"{query:<8} {base_join:>12.6f} {rpt_join:>12.6f} {transfer:>14.6f} {saving:>+12.6f}")
+    print("=" * 80)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python3 profiles.py <baseline_operators.csv> <rpt_operators.csv>")
+        sys.exit(1)
+    baseline_file, rpt_file = Path(sys.argv[1]), Path(sys.argv[2])
+    for path in (baseline_file, rpt_file):
+        if not path.exists():
+            print(f"Error: Operators file not found: {path}")
+            sys.exit(1)
+    compare_operator_times(baseline_file, rpt_file)
+
+
+if __name__ == "__main__":
+    main()
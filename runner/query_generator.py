@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Template-based SSB query generator for selectivity sweeps.
+
+The 13 SSB queries are described as structured shapes (select list, tables,
+per-table filters, grouping). A sweep replaces the filter on one dimension
+with predicates of controlled selectivity (D_YEAR ranges, region/nation/city
+sets, P_CATEGORY/P_BRAND sets) and keeps the other filters at the standard
+constants, QGEN-style.
+
+Usage:
+    python3 query_generator.py list --dimensions d_year
+    python3 query_generator.py run --baseline-bin <bin> --rpt-bin <bin> \\
+        --db ../duckdb-rpt/ssb_sf5.db --out ../results/sf5/selectivity_sweep.csv
+    python3 query_generator.py plot --results ../results/sf5/selectivity_sweep.csv \\
+        --out ../results/graphs/sf5/selectivity_sweep.png
+"""
+
+import argparse
+import csv
+import random
+from collections import defaultdict
+from pathlib import Path
+from statistics import median
+
+import ssb_domains as dom
+from ab_scheduler import MODES, run_round
+from duckdb_session import SESSION_KINDS, open_session
+from run_experiments import format_seconds
+
+# lineorder foreign key and dimension primary key per dimension table
+JOIN_KEYS = {
+    "customer": ("LO_CUSTKEY", "C_CUSTKEY"),
+    "supplier": ("LO_SUPPKEY", "S_SUPPKEY"),
+    "part": ("LO_PARTKEY", "P_PARTKEY"),
+    "date": ("LO_ORDERDATE", "D_DATEKEY"),
+}
+
+
+class QueryShape:
+    """One SSB query as select list, tables, filters and grouping."""
+
+    def __init__(self, name, select, tables, filters, group_by=None, order_by=None):
+        self.name = name
+        self.select = select
+        self.tables = tables
+        self.filters = filters
+        self.group_by = group_by
+        self.order_by = order_by
+
+    def dimensions(self):
+        return [t for t in self.tables if t != "lineorder"]
+
+    def join_predicates(self):
+        return [f"{JOIN_KEYS[t][0]} = {JOIN_KEYS[t][1]}" for t in self.dimensions()]
+
+    def filter_predicates(self, filters=None):
+        merged = dict(self.filters)
+        merged.update(filters or {})
+        return [merged[t] for t in self.tables if merged.get(t)]
+
+    def render(self, filters=None):
+        """SQL in the comma-join style of run_experiments.QUERIES."""
+        where = self.join_predicates() + self.filter_predicates(filters)
+        sql = (f"SELECT {self.select}\n"
+               f"FROM {', '.join(f'ssb.{t}' for t in self.tables)}\n"
+               f"WHERE " + "\n  AND ".join(where))
+        if self.group_by:
+            sql += f"\nGROUP BY {self.group_by}"
+        if self.order_by:
+            sql += f"\nORDER BY {self.order_by}"
+        return sql + ";"
+
+    def render_join_order(self, order, filters=None):
+        """SQL with explicit JOINs in the given left-deep order.
+
+        With the join order optimizer disabled DuckDB keeps this order and
+        builds the hash table on the right side of each join. A dimension
+        joined before lineorder (other than the first table) has no join
+        predicate yet and becomes a CROSS JOIN.
+        """
+        if sorted(order) != sorted(self.tables):
+            raise ValueError(f"Join order {order} does not match tables of {self.name}")
+        lines = [f"FROM ssb.{order[0]}"]
+        joined = {order[0]}
+        for table in order[1:]:
+            if table == "lineorder":
+                preds = [f"{JOIN_KEYS[t][0]} = {JOIN_KEYS[t][1]}" for t in order if t in joined]
+            elif "lineorder" in joined:
+                preds = [f"{JOIN_KEYS[table][0]} = {JOIN_KEYS[table][1]}"]
+            else:
+                preds = []
+            if preds:
+                lines.append(f"JOIN ssb.{table} ON " + " AND ".join(preds))
+            else:
+                lines.append(f"CROSS JOIN ssb.{table}")
+            joined.add(table)
+        sql = f"SELECT {self.select}\n" + "\n".join(lines)
+        where = self.filter_predicates(filters)
+        if where:
+            sql += "\nWHERE " + "\n  AND ".join(where)
+        if self.group_by:
+            sql += f"\nGROUP BY {self.group_by}"
+        if self.order_by:
+            sql += f"\nORDER BY {self.order_by}"
+        return sql + ";"
+
+
+Q1_SELECT = "sum(LO_EXTENDEDPRICE * LO_DISCOUNT) AS revenue"
+Q2_SELECT = "sum(LO_REVENUE) AS sum_revenue, D_YEAR, P_BRAND"
+Q2_TABLES = ["lineorder", "date", "part", "supplier"]
+Q3_TABLES = ["customer", "lineorder", "supplier", "date"]
+Q3_ORDER = "D_YEAR ASC, revenue DESC"
+Q4_TABLES = ["date", "customer", "supplier", "part", "lineorder"]
+Q4_PROFIT = "sum(LO_REVENUE - LO_SUPPLYCOST) AS profit"
+
+QUERY_SHAPES = {shape.name: shape for shape in [
+    QueryShape("q1.1", Q1_SELECT, ["lineorder", "date"], {
+        "date": "D_YEAR = 1993",
+        "lineorder": "LO_DISCOUNT BETWEEN 1 AND 3 AND LO_QUANTITY < 25"}),
+    QueryShape("q1.2", Q1_SELECT, ["lineorder", "date"], {
+        "date": "D_YEARMONTHNUM = 199401",
+        "lineorder": "LO_DISCOUNT BETWEEN 4 AND 6 AND LO_QUANTITY BETWEEN 26 AND 35"}),
+    QueryShape("q1.3", Q1_SELECT, ["lineorder", "date"], {
+        "date": "D_WEEKNUMINYEAR = 6 AND D_YEAR = 1994",
+        "lineorder": "LO_DISCOUNT BETWEEN 5 AND 7 AND LO_QUANTITY BETWEEN 26 AND 35"}),
+    QueryShape("q2.1", Q2_SELECT, Q2_TABLES, {
+        "part": "P_CATEGORY = 'MFGR#12'",
+        "supplier": "S_REGION = 'AMERICA'"},
+        "D_YEAR, P_BRAND", "D_YEAR, P_BRAND"),
+    QueryShape("q2.2", Q2_SELECT, Q2_TABLES, {
+        "part": "P_BRAND BETWEEN 'MFGR#2221' AND 'MFGR#2228'",
+        "supplier": "S_REGION = 'ASIA'"},
+        "D_YEAR, P_BRAND", "D_YEAR, P_BRAND"),
+    QueryShape("q2.3", Q2_SELECT, Q2_TABLES, {
+        "part": "P_BRAND = 'MFGR#2221'",
+        "supplier": "S_REGION = 'EUROPE'"},
+        "D_YEAR, P_BRAND", "D_YEAR, P_BRAND"),
+    QueryShape("q3.1", "C_NATION, S_NATION, D_YEAR, sum(LO_REVENUE) AS revenue", Q3_TABLES, {
+        "customer": "C_REGION = 'ASIA'",
+        "supplier": "S_REGION = 'ASIA'",
+        "date": "D_YEAR BETWEEN 1992 AND 1997"},
+        "C_NATION, S_NATION, D_YEAR", Q3_ORDER),
+    QueryShape("q3.2", "C_CITY, S_CITY, D_YEAR, sum(LO_REVENUE) AS revenue", Q3_TABLES, {
+        "customer": "C_NATION = 'UNITED STATES'",
+        "supplier": "S_NATION = 'UNITED STATES'",
+        "date": "D_YEAR BETWEEN 1992 AND 1997"},
+        "C_CITY, S_CITY, D_YEAR", Q3_ORDER),
+    QueryShape("q3.3", "C_CITY, S_CITY, D_YEAR, sum(LO_REVENUE) AS revenue", Q3_TABLES, {
+        "customer": "(C_CITY = 'UNITED KI1' OR C_CITY = 'UNITED KI5')",
+        "supplier": "(S_CITY = 'UNITED KI1' OR S_CITY = 'UNITED KI5')",
+        "date": "D_YEAR BETWEEN 1992 AND 1997"},
+        "C_CITY, S_CITY, D_YEAR", Q3_ORDER),
+    QueryShape("q3.4", "C_CITY, S_CITY, D_YEAR, sum(LO_REVENUE) AS revenue", Q3_TABLES, {
+        "customer": "(C_CITY = 'UNITED KI1' OR C_CITY = 'UNITED KI5')",
+        "supplier": "(S_CITY = 'UNITED KI1' OR S_CITY = 'UNITED KI5')",
+        "date": "D_YEARMONTH = 'Dec1997'"},
+        "C_CITY, S_CITY, D_YEAR", Q3_ORDER),
+    QueryShape("q4.1", f"D_YEAR, C_NATION, {Q4_PROFIT}", Q4_TABLES, {
+        "customer": "C_REGION = 'AMERICA'",
+        "supplier": "S_REGION = 'AMERICA'",
+        "part": "(P_MFGR = 'MFGR#1' OR P_MFGR = 'MFGR#2')"},
+        "D_YEAR, C_NATION", "D_YEAR, C_NATION"),
+    QueryShape("q4.2", f"D_YEAR, S_NATION, P_CATEGORY, {Q4_PROFIT}", Q4_TABLES, {
+        "customer": "C_REGION = 'AMERICA'",
+        "supplier": "S_REGION = 'AMERICA'",
+        "date": "D_YEAR IN (1997, 1998)",
+        "part": "(P_MFGR = 'MFGR#1' OR P_MFGR = 'MFGR#2')"},
+        "D_YEAR, S_NATION, P_CATEGORY", "D_YEAR, S_NATION, P_CATEGORY"),
+    QueryShape("q4.3", f"D_YEAR, S_CITY, P_BRAND, {Q4_PROFIT}", Q4_TABLES, {
+        "customer": "C_REGION = 'AMERICA'",
+        "supplier": "S_NATION = 'UNITED STATES'",
+        "date": "D_YEAR IN (1997, 1998)",
+        "part": "P_CATEGORY = 'MFGR#14'"},
+        "D_YEAR, S_CITY, P_BRAND", "D_YEAR, S_CITY, P_BRAND"),
+]}
+
+
+def sql_list(values):
+    return ", ".join(f"'{v}'" for v in values)
+
+
+def in_levels(column, values, counts, total):
+    """Predicates selecting the first k values for each k in counts."""
+    return [(f"{k}", f"{column} IN ({sql_list(values[:k])})", k / total)
+            for k in counts if k <= len(values)]
+
+
+def year_levels():
+    return [(f"{k}y", f"D_YEAR BETWEEN {dom.YEARS[0]} AND {dom.YEARS[k - 1]}",
+             dom.year_fraction(dom.YEARS[0], dom.YEARS[k - 1]))
+            for k in range(1, len(dom.YEARS) + 1)]
+
+
+def region_order():
+    # start with AMERICA, the region most standard queries use
+    return ["AMERICA"] + [r for r in dom.REGIONS if r != "AMERICA"]
+
+
+def nation_order():
+    return [n for region in region_order() for n in dom.nations_in(region)]
+
+
+def city_order():
+    return [c for n in nation_order() for c in dom.cities(n)]
+
+
+def sweep_levels(prefix, table_total):
+    """Region, nation and city sweeps for customer (C_) or supplier (S_)."""
+    return {
+        f"{prefix.lower()}_region": in_levels(f"{prefix}_REGION", region_order(),
+                                              range(1, 6), len(dom.REGIONS)),
+        f"{prefix.lower()}_nation": in_levels(f"{prefix}_NATION", nation_order(),
+                                              [1, 2, 3, 5, 10, 15, 25], len(dom.NATIONS)),
+        f"{prefix.lower()}_city": in_levels(f"{prefix}_CITY", city_order(),
+                                            [1, 2, 5, 10, 25, 50, 125, 250], table_total),
+    }
+
+
+def build_sweeps():
+    """Map sweep dimension -> (table, [(label, predicate, selectivity)])."""
+    n_cities = len(dom.NATIONS) * dom.CITIES_PER_NATION
+    n_brands = len(dom.brands())
+    sweeps = {"d_year": ("date", year_levels())}
+    for dim, levels in sweep_levels("C", n_cities).items():
+        sweeps[dim] = ("customer", levels)
+    for dim, levels in sweep_levels("S", n_cities).items():
+        sweeps[dim] = ("supplier", levels)
+    sweeps["p_category"] = ("part", in_levels("P_CATEGORY", dom.categories(),
+                                              [1, 2, 5, 10, 25], len(dom.categories())))
+    sweeps["p_brand"] = ("part", in_levels("P_BRAND", dom.brands("MFGR#22"),
+                                           [1, 2, 5, 10, 20, 40], n_brands))
+    return sweeps
+
+
+SWEEPS = build_sweeps()
+
+
+def generate(queries=None, dimensions=None):
+    """Yield (query_id, shape, dimension, label, selectivity, sql)."""
+    for name, shape in QUERY_SHAPES.items():
+        if queries and name not in queries:
+            continue
+        for dim, (table, levels) in SWEEPS.items():
+            if dimensions and dim not in dimensions:
+                continue
+            if table not in shape.tables:
+                continue
+            for label, predicate, selectivity in levels:
+                yield (f"{name}:{dim}={label}", name, dim, label, selectivity,
+                       shape.render({table: predicate}))
+
+
+SWEEP_FIELDS = ["query_id", "query", "dimension", "level", "selectivity",
+                "mode", "rep", "time_seconds", "engine_seconds"]
+
+
+def run_sweep(args):
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    rng = random.Random(seed)
+    print(f"Sweep seed: {seed}")
+    bins = {"baseline": str(Path(args.baseline_bin)), "rpt": str(Path(args.rpt_bin))}
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    sessions = {}
+    try:
+        for mode in MODES:
+            sessions[mode] = open_session(args.session, bins[mode], str(Path(args.db)),
+                                          read_only=True)
+        with out_path.open("w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SWEEP_FIELDS)
+            writer.writeheader()
+            for query_id, name, dim, label, selectivity, sql in generate(args.queries,
+                                                                         args.dimensions):
+                run_round(sessions, sql, rng)  # warm-up
+                times = defaultdict(list)
+                for rep in range(1, args.reps + 1):
+                    for mode, result in run_round(sessions, sql, rng).items():
+                        times[mode].append(result.wall_seconds)
+                        writer.writerow({
+                            "query_id": query_id, "query": name, "dimension": dim,
+                            "level": label, "selectivity": f"{selectivity:.6f}",
+                            "mode": mode, "rep": rep,
+                            "time_seconds": format_seconds(result.wall_seconds),
+                            "engine_seconds": format_seconds(result.engine_seconds),
+                        })
+                speedup = median(times["baseline"]) / median(times["rpt"])
+                print(f"{query_id:<28} sel {selectivity:8.4%}  speedup {speedup:.3f}x")
+    finally:
+        for session in sessions.values():
+            session.close()
+    print(f"\nResults saved to: {out_path}")
+
+
+def load_sweep(results_file):
+    """Median speedup per (dimension, query, selectivity)."""
+    times = defaultdict(lambda: defaultdict(list))
+    with open(results_file, "r") as f:
+        for row in csv.DictReader(f):
+            key = (row["dimension"], row["query"], float(row["selectivity"]))
+            times[key][row["mode"]].append(float(row["time_seconds"]))
+    speedups = defaultdict(lambda: defaultdict(list))
+    for (dim, query, sel), by_mode in sorted(times.items()):
+        if by_mode.get("baseline") and by_mode.get("rpt"):
+            speedups[dim][query].append((sel, median(by_mode["baseline"]) / median(by_mode["rpt"])))
+    return speedups
+
+
+def plot_sweep(results_file, output_file):
+    """Plot RPT speedup against filter selectivity, one panel per dimension."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    speedups = load_sweep(results_file)
+    dims = sorted(speedups)
+    if not dims:
+        print("No sweep data available")
+        return
+    cols = min(3, len(dims))
+    rows = (len(dims) + cols - 1) // cols
+    fig, axes = plt.subplots(rows, cols, figsize=(6 * cols, 4.5 * rows), squeeze=False)
+    for ax, dim in zip(axes.flat, dims):
+        for query, points in sorted(speedups[dim].items()):
+            xs, ys = zip(*points)
+            ax.plot(xs, ys, marker="o", label=query)
+        ax.axhline(y=1.0, color="black", linestyle="--", linewidth=1, alpha=0.5)
+        ax.set_xscale("log")
+        ax.set_xlabel(f"{dim} selectivity", fontsize=10, fontweight="bold")
+        ax.set_ylabel("Speedup (Baseline / RPT)", fontsize=10, fontweight="bold")
+        ax.set_title(dim, fontsize=11, fontweight="bold")
+        ax.grid(True, alpha=0.3)
+        ax.legend(fontsize=8)
+    for ax in list(axes.flat)[len(dims):]:
+        ax.set_visible(False)
+    plt.suptitle("RPT Speedup vs Dimension Filter Selectivity", fontsize=14, fontweight="bold")
+    plt.tight_layout()
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    plt.savefig(output_file, dpi=300, bbox_inches="tight")
+    plt.close()
+    print(f"Created selectivity sweep graph: {output_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate SSB queries over controlled dimension selectivities."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("list", "run"):
+        p = sub.add_parser(name)
+        p.add_argument("--queries", nargs="+", default=None,
+                       help="Query shapes to sweep (default: all)")
+        p.add_argument("--dimensions", nargs="+", default=None, choices=sorted(SWEEPS),
+                       help="Dimensions to sweep (default: all)")
+    list_parser = sub.choices["list"]
+    list_parser.add_argument("--sql", action="store_true", help="Print the generated SQL")
+
+    run_parser = sub.choices["run"]
+    run_parser.add_argument("--baseline-bin", required=True)
+    run_parser.add_argument("--rpt-bin", required=True)
+    run_parser.add_argument("--db", default="db/ssb.duckdb",
+                            help="Path to DuckDB database file (opened read-only)")
+    run_parser.add_argument("--reps", type=int, default=5)
+    run_parser.add_argument("--session", choices=SESSION_KINDS, default="persistent")
+    run_parser.add_argument("--seed", type=int, default=None)
+    run_parser.add_argument("--out", default="selectivity_sweep.csv")
+
+    plot_parser = sub.add_parser("plot")
+    plot_parser.add_argument("--results", required=True, help="CSV written by 'run'")
+    plot_parser.add_argument("--out", default="selectivity_sweep.png")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for query_id, _, _, _, selectivity, sql in generate(args.queries, args.dimensions):
+            print(f"{query_id:<28} {selectivity:8.4%}")
+            if args.sql:
+                print(sql + "\n")
+    elif args.command == "run":
+        run_sweep(args)
+    else:
+        plot_sweep(args.results, args.out)
+
+
+if __name__ == "__main__":
+    main()
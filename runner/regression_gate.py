@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate against pinned reference runs.
+
+A reference is a performance run in the results store pinned under a name
+for its mode, scale factor and cache mode. `compare` checks the latest run
+of every pinned (mode, scale factor) against its reference, query by query:
+
+  slowdown   statistic(new) / statistic(reference), with a bootstrap CI and
+             a two-sided Mann-Whitney test (see speedup_stats.py)
+  tolerance  max(--min-tolerance, --noise-k * robust CV of the reference),
+             the robust CV being 1.4826 * MAD / median of its reps, so a
+             noisy query needs a larger slowdown to fail than a stable one
+
+A query regresses when its slowdown exceeds 1 + tolerance and the difference
+is significant (p < alpha and the CI excludes 1); it improved in the mirror
+case. A query of the reference the new run has no timings for fails too.
+The command prints a per-query table and exits 1 when anything regressed,
+so it can gate upgrades of the RPT engine.
+
+Only runs measured like the reference are gated against it: same session
+kind, DuckDB threads, CPU count, result mode (--result) and plan capture
+(--plans). The latest such run is the candidate; newer runs measured
+differently are reported and skipped, and when every run since the
+reference differs, the pair fails as incomparable.
+
+    python3 regression_gate.py pin --sf 10                  # latest runs of both modes
+    python3 regression_gate.py pin --run <run_id> --name v1.4.0
+    python3 regression_gate.py pins
+    python3 regression_gate.py compare --sf 10 --out gate.csv
+"""
+
+import argparse
+import sys
+from statistics import median
+
+from ab_scheduler import MODES
+from cache_control import CACHE_MODES, DEFAULT_CACHE_MODE
+from results_store import (STORE_PATH, configuration_differences, connect, latest_run_id,
+                           load_times, pin_run, pinned_run_id, print_rows, run_configuration,
+                           run_ids)
+from speedup_stats import add_stats_arguments, compare, sort_key, write_rows
+
+GATE_FIELDS = ["scale_factor", "mode", "query", "reference_run", "run", "n_reference",
+               "n_run", "reference_seconds", "run_seconds", "slowdown", "ci_low",
+               "ci_high", "p_value", "reference_cv", "tolerance", "status", "detail"]
+
+# MAD of a normal sample times this estimates its standard deviation
+MAD_SCALE = 1.4826
+
+
+def robust_cv(values):
+    """1.4826 * MAD / median; 0 for fewer than two values."""
+    if len(values) < 2:
+        return 0.0
+    mid = median(values)
+    if mid <= 0:
+        return 0.0
+    return MAD_SCALE * median(abs(v - mid) for v in values) / mid
+
+
+def gate_status(slowdown, ci_low, ci_high, p_value, tolerance, alpha):
+    """regressed / improved / ok for one query (CI is of the slowdown)."""
+    significant = p_value < alpha
+    if slowdown > 1 + tolerance and significant and ci_low > 1:
+        return "regressed"
+    if slowdown < 1 / (1 + tolerance) and significant and ci_high < 1:
+        return "improved"
+    return "ok"
+
+
+def gate(reference, candidate, min_tolerance=0.05, noise_k=3.0, alpha=0.05, **stats_options):
+    """Per-query gate rows of one run against its reference.
+
+    reference, candidate: {query: [seconds]}
+    """
+    rows, _ = compare({(None, "reference"): reference, (None, "run"): candidate},
+                      reference="reference", alpha=alpha, **stats_options)
+    stats = {row["query"]: row for row in rows}
+    results = []
+    for query in sorted(reference):
+        cv = robust_cv(reference[query])
+        tolerance = max(min_tolerance, noise_k * cv)
+        row = {"query": query, "n_reference": len(reference[query]),
+               "n_run": len(candidate.get(query, [])), "reference_cv": cv,
+               "tolerance": tolerance}
+        if query not in stats:
+            row["status"] = "missing"
+            results.append(row)
+            continue
+        s = stats[query]
+        # speedup is reference / run; the gate reads it the other way round
+        row.update({
+            "reference_seconds": s["reference_seconds"],
+            "run_seconds": s["mode_seconds"],
+            "slowdown": 1 / s["speedup"],
+            "ci_low": 1 / s["ci_high"],
+            "ci_high": 1 / s["ci_low"],
+            "p_value": s["p_value"],
+        })
+        row["status"] = gate_status(row["slowdown"], row["ci_low"], row["ci_high"],
+                                    row["p_value"], tolerance, alpha)
+        results.append(row)
+    return results
+
+
+def comparable_run(con, reference, mode, scale_factor, cache):
+    """(latest run measured like reference, [(newer run, differences)]);
+    only runs after the reference count, None when there is none."""
+    config = run_configuration(con, reference)
+    skipped = []
+    for run_id in run_ids(con, "performance", mode, scale_factor, cache):
+        if run_id == reference:
+            break
+        differences = configuration_differences(config, run_configuration(con, run_id))
+        if not differences:
+            return run_id, skipped
+        skipped.append((run_id, differences))
+    return None, skipped
+
+
+def pinned_pairs(store_path, name, modes, scale_factors, cache):
+    """[(scale_factor, mode, reference run, candidate run, skipped runs)] with
+    a pin; see comparable_run."""
+    with connect(store_path, read_only=True) as con:
+        if scale_factors is None:
+            scale_factors = [sf for (sf,) in con.execute(
+                "SELECT DISTINCT scale_factor FROM pins WHERE name = ? AND cache = ?",
+                [name, cache]).fetchall()]
+        pairs = []
+        for sf in scale_factors:
+            for mode in modes:
+                reference = pinned_run_id(con, name, mode, sf, cache)
+                if reference:
+                    pairs.append((float(sf), mode, reference)
+                                 + comparable_run(con, reference, mode, sf, cache))
+    return sorted(pairs, key=lambda p: sort_key(p[0], p[1]))
+
+
+def print_gate(rows):
+    print(f"{'SF':<6} {'Mode':<9} {'Query':<7} {'Ref (s)':>10} {'New (s)':>10} "
+          f"{'Slowdown':>9} {'CI':>17} {'p':>7} {'Tol':>6} {'Status':>10}")
+    print("-" * 100)
+    for r in rows:
+        if r["status"] == "missing":
+            print(f"{r['scale_factor']:<6g} {r['mode']:<9} {r['query']:<7} {'':>10} {'':>10} "
+                  f"{'':>9} {'':>17} {'':>7} {r['tolerance']:>6.1%} {'missing':>10}")
+            continue
+        if r["status"] == "incomparable":
+            print(f"{r['scale_factor']:<6g} {r['mode']:<9} {'-':<7} {r['detail']}")
+            continue
+        status = r["status"]
+        if status == "regressed":
+            status = f"\033[91m{status:>10}\033[0m"
+        elif status == "improved":
+            status = f"\033[92m{status:>10}\033[0m"
+        ci = f"[{r['ci_low']:.3f}, {r['ci_high']:.3f}]"
+        print(f"{r['scale_factor']:<6g} {r['mode']:<9} {r['query']:<7} "
+              f"{r['reference_seconds']:>10.4f} {r['run_seconds']:>10.4f} "
+              f"{r['slowdown']:>8.3f}x {ci:>17} {r['p_value']:>7.4f} "
+              f"{r['tolerance']:>6.1%} {status:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gate runs against pinned reference runs.")
+    parser.add_argument("--store", default=str(STORE_PATH), help="Path to the results store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pin_parser = sub.add_parser("pin", help="Pin runs as references")
+    pin_parser.add_argument("--run", nargs="+", default=None,
+                            help="Run ids to pin (default: the latest run of each mode)")
+    pin_parser.add_argument("--sf", default=None,
+                            help="Scale factor of the latest runs to pin")
+    pin_parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    pin_parser.add_argument("--cache", choices=CACHE_MODES, default=DEFAULT_CACHE_MODE)
+    pin_parser.add_argument("--name", default="reference")
+
+    sub.add_parser("pins", help="List pinned reference runs")
+
+    compare_parser = sub.add_parser("compare", help="Check the latest runs against their pins")
+    compare_parser.add_argument("--sf", nargs="+", default=None,
+                                help="Scale factors to check (default: every pinned one)")
+    compare_parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    compare_parser.add_argument("--cache", choices=CACHE_MODES, default=DEFAULT_CACHE_MODE)
+    compare_parser.add_argument("--name", default="reference",
+                                help="Name the references were pinned under")
+    compare_parser.add_argument("--run", default=None,
+                                help="Check this run instead of the latest (one mode and SF)")
+    compare_parser.add_argument("--min-tolerance", type=float, default=0.05,
+                                help="Smallest slowdown that can fail (0.05 = 5%%)")
+    compare_parser.add_argument("--noise-k", type=float, default=3.0,
+                                help="Tolerance in multiples of the reference's robust CV")
+    compare_parser.add_argument("--out", default=None, help="Per-query gate CSV")
+    add_stats_arguments(compare_parser)
+    args = parser.parse_args()
+
+    if args.command == "pin":
+        pin_ids = args.run
+        if pin_ids is None:
+            with connect(args.store, read_only=True) as con:
+                pin_ids = [latest_run_id(con, "performance", mode, args.sf, args.cache)
+                           for mode in args.modes]
+            if None in pin_ids:
+                print(f"Error: no {args.cache} run of every mode in {args.store} "
+                      f"for SF={args.sf}")
+                sys.exit(2)
+        for run_id in pin_ids:
+            pin = pin_run(args.store, run_id, args.name)
+            print(f"Pinned {run_id} as {args.name} for {pin['mode']} SF={pin['scale_factor']:g} "
+                  f"({pin['cache']})")
+        return
+
+    if args.command == "pins":
+        with connect(args.store, read_only=True) as con:
+            print_rows(con.execute(
+                "SELECT p.name, p.mode, p.scale_factor, p.cache, p.run_id, p.pinned_at, "
+                "r.binary_fingerprint FROM pins p LEFT JOIN runs r USING (run_id) "
+                "ORDER BY p.name, p.scale_factor, p.mode, p.pinned_at"))
+        return
+
+    pairs = pinned_pairs(args.store, args.name, args.modes, args.sf, args.cache)
+    if not pairs:
+        print(f"Error: no {args.cache} runs pinned as {args.name} in {args.store}")
+        sys.exit(2)
+    if args.run:
+        if len(pairs) != 1:
+            print("Error: --run needs a single pinned mode and scale factor")
+            sys.exit(2)
+        with connect(args.store, read_only=True) as con:
+            differences = configuration_differences(run_configuration(con, pairs[0][2]),
+                                                    run_configuration(con, args.run))
+        pairs = [pairs[0][:3] + ((None, [(args.run, differences)]) if differences
+                                 else (args.run, []))]
+    stats_options = {"statistic": args.statistic, "confidence": args.confidence,
+                     "resamples": args.resamples, "correction": args.correction,
+                     "seed": args.seed}
+
+    rows = []
+    for sf, mode, reference_run, run_id, skipped in pairs:
+        for skipped_run, differences in skipped:
+            print(f"SF={sf:g} {mode}: skipping {skipped_run}, measured unlike the reference "
+                  f"{reference_run} ({', '.join(differences)})")
+        if run_id is None and skipped:
+            rows.append({"scale_factor": sf, "mode": mode, "reference_run": reference_run,
+                         "run": skipped[0][0], "status": "incomparable",
+                         "detail": f"incomparable with {reference_run}: "
+                                   + ", ".join(skipped[0][1])})
+            continue
+        if run_id is None:
+            print(f"SF={sf:g} {mode}: no run newer than the reference {reference_run}")
+            continue
+        reference = load_times(args.store, mode, run_id=reference_run)
+        candidate = load_times(args.store, mode, run_id=run_id)
+        for row in gate(reference, candidate, args.min_tolerance, args.noise_k, args.alpha,
+                        **stats_options):
+            rows.append(dict(row, scale_factor=sf, mode=mode, reference_run=reference_run,
+                             run=run_id))
+    if not rows:
+        print("Error: nothing to compare")
+        sys.exit(2)
+
+    print_gate(rows)
+    failed = [r for r in rows if r["status"] in ("regressed", "missing", "incomparable")]
+    improved = sum(r["status"] == "improved" for r in rows)
+    print(f"\n{len(rows)} queries checked: {len(failed)} failed, {improved} improved "
+          f"(alpha={args.alpha}, tolerance >= {args.min_tolerance:.0%}, "
+          f"{args.noise_k:g} x reference CV)")
+    if args.out:
+        write_rows(args.out, GATE_FIELDS, rows)
+        print(f"Gate results saved to: {args.out}")
+    if failed:
+        for r in failed:
+            if r["status"] == "incomparable":
+                print(f"FAIL SF={r['scale_factor']:g} {r['mode']}: run {r['run']} "
+                      f"{r['detail']}; pin a reference measured the same way")
+                continue
+            detail = (f"{r['slowdown']:.3f}x slower" if r["status"] == "regressed"
+                      else "no timings")
+            print(f"FAIL SF={r['scale_factor']:g} {r['mode']} {r['query']}: {detail}")
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main()
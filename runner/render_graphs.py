@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Render the baseline vs RPT comparison graphs, incrementally and in parallel.
+
+For every target (a scale factor, or the flat results/ layout) the inputs are
+loaded once and split into one job per figure:
+
+  performance_comparison.png  execution time per query
+  speedup_comparison.png      baseline / RPT per query
+  memory_comparison.png       peak memory per query
+  join_size_comparison.png    row counts per plan step
+  summary_comparison.png      performance and memory side by side
+
+Each job is keyed by a hash of exactly the data it draws (plus this file, so
+style changes re-render everything) and recorded in a .render_manifest.json
+next to the PNGs. Jobs whose hash is unchanged and whose PNG exists are
+skipped; the rest render in a process pool across all targets. matplotlib
+is only imported in the workers, so a run with nothing to draw never loads
+it.
+
+Usage:
+    python3 render_graphs.py              # every results/sf* directory
+    python3 render_graphs.py 5 10 --jobs 4
+    python3 render_graphs.py 10 --store ../results/warehouse.duckdb
+    python3 render_graphs.py --flat       # results/*.csv -> results/graphs
+    python3 render_graphs.py --results-dir /tmp/run/results   # -> /tmp/run/results/graphs
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from statistics import mean
+
+from profiles import number_repeats
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = PROJECT_ROOT / "results"
+
+MANIFEST = ".render_manifest.json"
+DPI = 300
+
+BASELINE_COLOR = '#3498db'
+RPT_COLOR = '#e74c3c'
+FASTER_COLOR = '#27ae60'
+EQUAL_COLOR = '#95a5a6'
+
+FIGURES = {
+    "performance": "performance_comparison.png",
+    "speedup": "speedup_comparison.png",
+    "memory": "memory_comparison.png",
+    "join_size": "join_size_comparison.png",
+    "summary": "summary_comparison.png",
+}
+
+FIGURE_DESCRIPTIONS = {
+    "performance": "Execution time comparison",
+    "speedup": "Speedup ratio (Baseline/RPT)",
+    "memory": "Memory utilization comparison",
+    "join_size": "Intermediate join sizes",
+    "summary": "Combined performance and memory",
+}
+
+
+def load_performance_data(baseline_file, rpt_file):
+    """Load performance timing data."""
+    baseline_times = defaultdict(list)
+    rpt_times = defaultdict(list)
+
+    for filename, times_dict in [(baseline_file, baseline_times), (rpt_file, rpt_times)]:
+        if not Path(filename).exists():
+            continue
+        with open(filename, 'r') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                query = row['query']
+                time_val = float(row['time_seconds'])
+                times_dict[query].append(time_val)
+
+    # Calculate averages
+    baseline_avg = {q: mean(baseline_times[q]) for q in baseline_times}
+    rpt_avg = {q: mean(rpt_times[q]) for q in rpt_times}
+
+    return baseline_avg, rpt_avg
+
+def load_join_size_data(baseline_file, rpt_file, key='step_name'):
+    """Load intermediate join size data, keyed by step number or step name."""
+    baseline_sizes = defaultdict(dict)
+    rpt_sizes = defaultdict(dict)
+
+    for filename, sizes_dict in [(baseline_file, baseline_sizes), (rpt_file, rpt_sizes)]:
+        if not Path(filename).exists():
+            continue
+        steps = defaultdict(list)
+        with open(filename, 'r') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                # Only the first repetition, like results_store.load_join_sizes
+                if row.get('rep') not in (None, '', '1'):
+                    continue
+                steps[row['query']].append((row[key], int(row['row_count'])))
+        for query, query_steps in steps.items():
+            # CSVs from before step names were numbered may repeat them
+            labels = number_repeats(label for label, _ in query_steps)
+            sizes_dict[query] = {label: count for label, (_, count) in zip(labels, query_steps)}
+
+    return baseline_sizes, rpt_sizes
+
+def load_memory_data(baseline_file, rpt_file):
+    """Load memory utilization data (MB) of successful repetitions."""
+    baseline_mem = defaultdict(list)
+    rpt_mem = defaultdict(list)
+
+    for filename, mem_dict in [(baseline_file, baseline_mem), (rpt_file, rpt_mem)]:
+        if not Path(filename).exists():
+            continue
+        with open(filename, 'r') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                if row.get('status', 'success') != 'success':
+                    continue
+                # Handle both peak_memory_mb and peak_memory_kb
+                if row.get('peak_memory_mb') not in (None, '', '-1'):
+                    mem_val = float(row['peak_memory_mb'])
+                elif row.get('peak_memory_kb') not in (None, '', '-1'):
+                    mem_val = float(row['peak_memory_kb']) / 1024
+                else:
+                    continue
+                mem_dict[row['query']].append(mem_val)
+
+    baseline_avg = {q: mean(baseline_mem[q]) for q in baseline_mem}
+    rpt_avg = {q: mean(rpt_mem[q]) for q in rpt_mem}
+
+    return baseline_avg, rpt_avg
+
+def load_csv_inputs(results_dir, join_key='step_name'):
+    """((baseline_perf, rpt_perf), (baseline_mem, rpt_mem), (baseline_joins, rpt_joins))"""
+    results_dir = Path(results_dir)
+    perf = load_performance_data(results_dir / "ssb_baseline.csv",
+                                 results_dir / "ssb_rpt.csv")
+    memory = load_memory_data(results_dir / "memory_baseline.csv",
+                              results_dir / "memory_rpt.csv")
+    joins = load_join_size_data(results_dir / "join_sizes_baseline.csv",
+                                results_dir / "join_sizes_rpt.csv", join_key)
+    return perf, memory, joins
+
+
+def figure_inputs(perf, memory, joins):
+    """{figure: JSON-able data it draws}; figures without data are left out."""
+    (baseline_perf, rpt_perf), (baseline_mem, rpt_mem), (baseline_joins, rpt_joins) = perf, memory, joins
+    inputs = {}
+    if baseline_perf or rpt_perf:
+        inputs["performance"] = {"baseline": baseline_perf, "rpt": rpt_perf}
+        inputs["speedup"] = {"baseline": baseline_perf, "rpt": rpt_perf}
+    if baseline_mem and rpt_mem:
+        inputs["memory"] = {"baseline": baseline_mem, "rpt": rpt_mem}
+        inputs["summary"] = {"baseline": baseline_perf, "rpt": rpt_perf,
+                             "baseline_mem": baseline_mem, "rpt_mem": rpt_mem}
+    if baseline_joins and rpt_joins:
+        inputs["join_size"] = {"baseline": {q: dict(s) for q, s in baseline_joins.items()},
+                               "rpt": {q: dict(s) for q, s in rpt_joins.items()}}
+    return inputs
+
+
+def _style_hash():
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+def input_hash(figure, scale_factor, data, style):
+    payload = json.dumps([figure, scale_factor, data], sort_keys=True, default=str)
+    return hashlib.sha256((style + payload).encode()).hexdigest()
+
+
+def read_manifest(graphs_dir):
+    try:
+        return json.loads((Path(graphs_dir) / MANIFEST).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_manifest(graphs_dir, manifest):
+    path = Path(graphs_dir) / MANIFEST
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def _pyplot():
+    """Import matplotlib on first use (in the worker that draws)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    plt.style.use('seaborn-v0_8-darkgrid' if 'seaborn-v0_8-darkgrid' in plt.style.available else 'default')
+    plt.rcParams['figure.figsize'] = (14, 10)
+    plt.rcParams['font.size'] = 10
+    return plt
+
+
+def _title(text, scale_factor):
+    return f"{text} (SF={scale_factor})" if scale_factor is not None else text
+
+
+def create_performance_graph(baseline_avg, rpt_avg, output_file, scale_factor=None):
+    """Create performance comparison graph."""
+    plt = _pyplot()
+    import numpy as np
+    queries = sorted(set(baseline_avg.keys()) | set(rpt_avg.keys()))
+    baseline_values = [baseline_avg.get(q, 0) * 1000 for q in queries]  # Convert to ms
+    rpt_values = [rpt_avg.get(q, 0) * 1000 for q in queries]
+
+    x = np.arange(len(queries))
+    width = 0.35
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+
+    bars1 = ax.bar(x - width/2, baseline_values, width, label='Baseline (no RPT)',
+                    color=BASELINE_COLOR, alpha=0.8)
+    bars2 = ax.bar(x + width/2, rpt_values, width, label='RPT',
+                    color=RPT_COLOR, alpha=0.8)
+
+    ax.set_xlabel('Query', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Execution Time (ms)', fontsize=12, fontweight='bold')
+    ax.set_title(_title('SSB Query Performance: Baseline vs RPT', scale_factor),
+                 fontsize=14, fontweight='bold')
+    ax.set_xticks(x)
+    ax.set_xticklabels(queries, rotation=45, ha='right')
+    ax.legend(fontsize=11)
+    ax.grid(True, alpha=0.3, axis='y')
+
+    # Add value labels on bars
+    for bars in [bars1, bars2]:
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                   f'{height:.1f}',
+                   ha='center', va='bottom', fontsize=8)
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=DPI, bbox_inches='tight')
+    plt.close()
+    print(f"Created performance graph: {output_file}")
+
+def create_speedup_graph(baseline_avg, rpt_avg, output_file, scale_factor=None):
+    """Create speedup comparison graph."""
+    plt = _pyplot()
+    import matplotlib.patches as mpatches
+    import numpy as np
+    queries = sorted(set(baseline_avg.keys()) | set(rpt_avg.keys()))
+    speedups = []
+    for q in queries:
+        if q in baseline_avg and q in rpt_avg and rpt_avg[q] > 0:
+            speedup = baseline_avg[q] / rpt_avg[q]
+            speedups.append(speedup)
+        else:
+            speedups.append(1.0)
+
+    x = np.arange(len(queries))
+    colors = [FASTER_COLOR if s > 1.0 else RPT_COLOR if s < 1.0 else EQUAL_COLOR for s in speedups]
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+
+    bars = ax.bar(x, speedups, color=colors, alpha=0.8)
+
+    # Add horizontal line at 1.0x
+    ax.axhline(y=1.0, color='black', linestyle='--', linewidth=1, alpha=0.5)
+
+    ax.set_xlabel('Query', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Speedup (Baseline / RPT)', fontsize=12, fontweight='bold')
+    ax.set_title(_title('Query Speedup: RPT vs Baseline', scale_factor)
+                 + '\n(Speedup > 1.0 means RPT is faster)', fontsize=14, fontweight='bold')
+    ax.set_xticks(x)
+    ax.set_xticklabels(queries, rotation=45, ha='right')
+    ax.grid(True, alpha=0.3, axis='y')
+
+    # Add value labels
+    for bar, speedup in zip(bars, speedups):
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+               f'{speedup:.2f}x',
+               ha='center', va='bottom' if speedup > 1.0 else 'top', fontsize=9, fontweight='bold')
+
+    # Add legend
+    green_patch = mpatches.Patch(color=FASTER_COLOR, label='RPT Faster')
+    red_patch = mpatches.Patch(color=RPT_COLOR, label='RPT Slower')
+    gray_patch = mpatches.Patch(color=EQUAL_COLOR, label='Equal')
+    ax.legend(handles=[green_patch, red_patch, gray_patch], fontsize=10)
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=DPI, bbox_inches='tight')
+    plt.close()
+    print(f"Created speedup graph: {output_file}")
+
+def create_memory_graph(baseline_avg, rpt_avg, output_file, scale_factor=None):
+    """Create memory utilization comparison graph."""
+    plt = _pyplot()
+    import numpy as np
+    queries = sorted(set(baseline_avg.keys()) | set(rpt_avg.keys()))
+    baseline_values = [baseline_avg.get(q, 0) for q in queries]
+    rpt_values = [rpt_avg.get(q, 0) for q in queries]
+
+    x = np.arange(len(queries))
+    width = 0.35
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+
+    bars1 = ax.bar(x - width/2, baseline_values, width, label='Baseline (no RPT)',
+                    color=BASELINE_COLOR, alpha=0.8)
+    bars2 = ax.bar(x + width/2, rpt_values, width, label='RPT',
+                    color=RPT_COLOR, alpha=0.8)
+
+    ax.set_xlabel('Query', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Peak Memory Usage (MB)', fontsize=12, fontweight='bold')
+    ax.set_title(_title('Memory Utilization: Baseline vs RPT', scale_factor),
+                 fontsize=14, fontweight='bold')
+    ax.set_xticks(x)
+    ax.set_xticklabels(queries, rotation=45, ha='right')
+    ax.legend(fontsize=11)
+    ax.grid(True, alpha=0.3, axis='y')
+
+    # Add value labels
+    for bars in [bars1, bars2]:
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                   f'{height:.1f}',
+                   ha='center', va='bottom', fontsize=8)
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=DPI, bbox_inches='tight')
+    plt.close()
+    print(f"Created memory graph: {output_file}")
+
+def _step_order(step):
+    return (0, int(step), "") if str(step).isdigit() else (1, 0, str(step))
+
+def _merged_steps(baseline_steps, rpt_steps):
+    """Steps of both modes in execution order.
+
+    Steps are matched by name, as RPT plans have transfer filter steps
+    (filter:*) that baseline plans lack; a step of one mode only goes right
+    after the step it follows in that mode.
+    """
+    if all(str(s).isdigit() for s in list(baseline_steps) + list(rpt_steps)):
+        return sorted(set(baseline_steps) | set(rpt_steps), key=_step_order)
+    merged = list(baseline_steps)
+    previous = None
+    for step in rpt_steps:
+        if step not in merged:
+            merged.insert(merged.index(previous) + 1 if previous is not None else 0, step)
+        previous = step
+    return merged
+
+def create_join_size_graph(baseline_sizes, rpt_sizes, output_file, scale_factor=None):
+    """Create intermediate join size comparison graph."""
+    plt = _pyplot()
+    import numpy as np
+    # Only queries measured in both modes
+    all_queries = sorted(set(baseline_sizes.keys()) & set(rpt_sizes.keys()))
+
+    if not all_queries:
+        print("No join size data available, skipping join size graph")
+        return
+
+    # For each query, plot the join sizes at each step
+    fig, axes = plt.subplots(len(all_queries), 1, figsize=(14, 4 * len(all_queries)))
+    if len(all_queries) == 1:
+        axes = [axes]
+
+    for ax, query in zip(axes, all_queries):
+        steps = _merged_steps(baseline_sizes[query], rpt_sizes[query])
+        baseline_vals = [baseline_sizes[query].get(s, 0) for s in steps]
+        rpt_vals = [rpt_sizes[query].get(s, 0) for s in steps]
+
+        x = np.arange(len(steps))
+        width = 0.35
+
+        ax.bar(x - width/2, baseline_vals, width, label='Baseline',
+               color=BASELINE_COLOR, alpha=0.8)
+        ax.bar(x + width/2, rpt_vals, width, label='RPT',
+               color=RPT_COLOR, alpha=0.8)
+
+        ax.set_ylabel('Row Count', fontsize=10)
+        ax.set_title(f'{query} - Intermediate Join Sizes', fontsize=11, fontweight='bold')
+        ax.set_xticks(x)
+        ax.set_xticklabels([f'Step {s}' if str(s).isdigit() else s for s in steps],
+                           rotation=45, ha='right')
+        ax.legend()
+        ax.grid(True, alpha=0.3, axis='y')
+        ax.set_yscale('log')
+
+    plt.suptitle(_title('Intermediate Join Size Comparison', scale_factor),
+                 fontsize=14, fontweight='bold', y=0.995)
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=DPI, bbox_inches='tight')
+    plt.close()
+    print(f"Created join size graph: {output_file}")
+
+def create_summary_graph(baseline_avg, rpt_avg, baseline_mem, rpt_mem, output_file, scale_factor=None):
+    """Create combined summary graph."""
+    plt = _pyplot()
+    import numpy as np
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+
+    queries = sorted(set(baseline_avg.keys()) | set(rpt_avg.keys()))
+    x = np.arange(len(queries))
+    width = 0.35
+
+    # Performance subplot
+    baseline_perf = [baseline_avg.get(q, 0) * 1000 for q in queries]
+    rpt_perf = [rpt_avg.get(q, 0) * 1000 for q in queries]
+
+    ax1.bar(x - width/2, baseline_perf, width, label='Baseline', color=BASELINE_COLOR, alpha=0.8)
+    ax1.bar(x + width/2, rpt_perf, width, label='RPT', color=RPT_COLOR, alpha=0.8)
+    ax1.set_xlabel('Query', fontsize=11, fontweight='bold')
+    ax1.set_ylabel('Execution Time (ms)', fontsize=11, fontweight='bold')
+    ax1.set_title('Performance', fontsize=12, fontweight='bold')
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(queries, rotation=45, ha='right')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3, axis='y')
+
+    # Memory subplot
+    baseline_mem_vals = [baseline_mem.get(q, 0) for q in queries]
+    rpt_mem_vals = [rpt_mem.get(q, 0) for q in queries]
+
+    ax2.bar(x - width/2, baseline_mem_vals, width, label='Baseline', color=BASELINE_COLOR, alpha=0.8)
+    ax2.bar(x + width/2, rpt_mem_vals, width, label='RPT', color=RPT_COLOR, alpha=0.8)
+    ax2.set_xlabel('Query', fontsize=11, fontweight='bold')
+    ax2.set_ylabel('Peak Memory (MB)', fontsize=11, fontweight='bold')
+    ax2.set_title('Memory Utilization', fontsize=12, fontweight='bold')
+    ax2.set_xticks(x)
+    ax2.set_xticklabels(queries, rotation=45, ha='right')
+    ax2.legend()
+    ax2.grid(True, alpha=0.3, axis='y')
+
+    plt.suptitle(_title('Performance and Memory Summary', scale_factor),
+                 fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=DPI, bbox_inches='tight')
+    plt.close()
+    print(f"Created summary graph: {output_file}")
+
+
+def render_job(job):
+    """Draw one figure; runs in a pool worker."""
+    figure, data, output_file, scale_factor = job
+    if figure == "performance":
+        create_performance_graph(data["baseline"], data["rpt"], output_file, scale_factor)
+    elif figure == "speedup":
+        create_speedup_graph(data["baseline"], data["rpt"], output_file, scale_factor)
+    elif figure == "memory":
+        create_memory_graph(data["baseline"], data["rpt"], output_file, scale_factor)
+    elif figure == "join_size":
+        create_join_size_graph(data["baseline"], data["rpt"], output_file, scale_factor)
+    elif figure == "summary":
+        create_summary_graph(data["baseline"], data["rpt"], data["baseline_mem"],
+                             data["rpt_mem"], output_file, scale_factor)
+    else:
+        raise ValueError(f"Unknown figure: {figure}")
+    return output_file
+
+
+def render(targets, jobs=None, force=False):
+    """Render the stale figures of every target.
+
+    targets: [(scale_factor or None, graphs_dir, (perf, memory, joins))]
+    Returns (rendered, skipped) counts.
+    """
+    style = _style_hash()
+    pending = []
+    manifests = {}
+    skipped = 0
+    for scale_factor, graphs_dir, inputs in targets:
+        graphs_dir = Path(graphs_dir)
+        graphs_dir.mkdir(parents=True, exist_ok=True)
+        manifest = manifests.setdefault(graphs_dir, read_manifest(graphs_dir))
+        for figure, data in figure_inputs(*inputs).items():
+            output_file = graphs_dir / FIGURES[figure]
+            digest = input_hash(figure, scale_factor, data, style)
+            if not force and manifest.get(FIGURES[figure]) == digest and output_file.exists():
+                skipped += 1
+                continue
+            pending.append(((figure, data, str(output_file), scale_factor),
+                            graphs_dir, FIGURES[figure], digest))
+
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(pending)))
+    if workers == 1:
+        results = [render_job(job) for job, *_ in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render_job, [job for job, *_ in pending]))
+
+    for _, graphs_dir, name, digest in pending:
+        manifests[graphs_dir][name] = digest
+    # every target gets a manifest, even one with nothing to draw, so it
+    # marks the graphs of a target as rendered
+    for graphs_dir, manifest in manifests.items():
+        write_manifest(graphs_dir, manifest)
+    return len(results), skipped
+
+
+def scale_factor_dirs(results_dir=RESULTS_DIR):
+    """Scale factors with a results/sf<N> directory, in numeric order."""
+    found = []
+    for path in Path(results_dir).glob("sf*"):
+        if path.is_dir() and re.fullmatch(r"sf\d+(?:\.\d+)?", path.name):
+            found.append(path.name[2:])
+    return sorted(found, key=float)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Render baseline vs RPT graphs, skipping figures whose data did not change."
+    )
+    parser.add_argument("scale_factors", nargs="*",
+                        help="Scale factors to render (default: every results/sf* directory)")
+    parser.add_argument("--flat", action="store_true",
+                        help="Render <results-dir>/*.csv into the graphs directory itself")
+    parser.add_argument("--store", default=None,
+                        help="Read the latest runs from this results store instead of CSVs")
+    parser.add_argument("--sf", default=None,
+                        help="Scale factor of the runs to plot with --flat --store")
+    parser.add_argument("--results-dir", default=str(RESULTS_DIR),
+                        help="Directory with the sf<N> result CSVs")
+    parser.add_argument("--graphs-dir", default=None,
+                        help="Directory the graphs go to (default: <results-dir>/graphs)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-render every figure")
+    args = parser.parse_args(argv)
+    results_dir = Path(args.results_dir)
+    graphs_dir = Path(args.graphs_dir) if args.graphs_dir else results_dir / "graphs"
+
+    if args.store:
+        from results_store import load_comparison
+
+    targets = []
+    if args.flat:
+        print("Loading data...")
+        if args.store:
+            inputs = load_comparison(args.store, args.sf)
+        else:
+            inputs = load_csv_inputs(results_dir)
+        targets.append((None, graphs_dir, inputs))
+    else:
+        for scale_factor in args.scale_factors or scale_factor_dirs(results_dir):
+            print(f"Loading data for SF={scale_factor}...")
+            if args.store:
+                inputs = load_comparison(args.store, scale_factor)
+            else:
+                inputs = load_csv_inputs(results_dir / f"sf{scale_factor}")
+            targets.append((scale_factor, graphs_dir / f"sf{scale_factor}", inputs))
+
+    rendered, skipped = render(targets, args.jobs, args.force)
+    print(f"\nRendered {rendered} graph(s), {skipped} unchanged")
+    for _, target_dir, _ in targets:
+        print(f"Graphs in: {target_dir}")
+    print("\nGraphs:")
+    for i, figure in enumerate(FIGURES, 1):
+        print(f"  {i}. {FIGURES[figure]} - {FIGURE_DESCRIPTIONS[figure]}")
+
+
+if __name__ == "__main__":
+    main()
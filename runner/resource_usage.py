@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Operating-system resource accounting of duckdb executions.
+
+Every measured execution can report the CPU time, context switches, page
+faults and storage I/O the duckdb process spent on it:
+
+  spawn sessions       the process is waited for with os.wait4, whose
+                       rusage covers every thread of the process over its
+                       whole life (start-up and catalog load included);
+                       /proc/<pid>/io is read while the process is still
+                       an unreaped zombie
+  persistent sessions  /proc/<pid>/stat, task/*/status and io are read
+                       right before and after the query and differenced;
+                       user/sys only tick every 10 ms, so cpu_seconds comes
+                       from the nanosecond task/*/schedstat run time instead
+
+CPU seconds summed over threads next to the wall time tell whether a
+faster query did less work or only overlapped it better (cpu / wall is the
+average number of busy cores). read_bytes/write_bytes are bytes that hit
+storage, so they stay at zero for a query served from the page cache.
+"""
+
+import os
+import subprocess
+
+RESOURCE_FIELDS = ["cpu_seconds", "user_seconds", "sys_seconds", "voluntary_switches",
+                   "involuntary_switches", "major_faults", "minor_faults",
+                   "read_bytes", "write_bytes"]
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+
+
+def read_io(pid):
+    """Storage read_bytes/write_bytes of a process, {} without /proc access."""
+    data = _read(f"/proc/{pid}/io")
+    if data is None:
+        return {}
+    values = dict(line.split(": ") for line in data.splitlines() if ": " in line)
+    return {"read_bytes": int(values["read_bytes"]),
+            "write_bytes": int(values["write_bytes"])}
+
+
+def read_proc(pid):
+    """Cumulative counters of a running process, None without /proc."""
+    stat = _read(f"/proc/{pid}/stat")
+    if stat is None:
+        return None
+    # the command name may contain spaces, so split after its closing paren
+    fields = stat[stat.rindex(")") + 2:].split()
+    usage = {
+        "minor_faults": int(fields[7]),
+        "major_faults": int(fields[9]),
+        "user_seconds": int(fields[11]) / CLOCK_TICKS,
+        "sys_seconds": int(fields[12]) / CLOCK_TICKS,
+        "voluntary_switches": 0,
+        "involuntary_switches": 0,
+    }
+    # context switches in /proc/<pid>/status are the main thread's only
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except FileNotFoundError:
+        tasks = []
+    run_ns = 0
+    for tid in tasks:
+        schedstat = _read(f"/proc/{pid}/task/{tid}/schedstat")
+        if schedstat is None:
+            run_ns = None
+        elif run_ns is not None:
+            run_ns += int(schedstat.split()[0])
+        status = _read(f"/proc/{pid}/task/{tid}/status") or ""
+        for line in status.splitlines():
+            if line.startswith("voluntary_ctxt_switches:"):
+                usage["voluntary_switches"] += int(line.split()[1])
+            elif line.startswith("nonvoluntary_ctxt_switches:"):
+                usage["involuntary_switches"] += int(line.split()[1])
+    if tasks and run_ns is not None:
+        usage["cpu_seconds"] = run_ns / 1e9
+    usage.update(read_io(pid))
+    return usage
+
+
+def difference(before, after):
+    """Counters spent between two read_proc snapshots."""
+    if before is None or after is None:
+        return None
+    usage = {key: after[key] - before[key] for key in after if key in before}
+    return usage if "cpu_seconds" in usage else with_cpu(usage)
+
+
+def from_rusage(rusage):
+    return with_cpu({
+        "user_seconds": rusage.ru_utime,
+        "sys_seconds": rusage.ru_stime,
+        "voluntary_switches": rusage.ru_nvcsw,
+        "involuntary_switches": rusage.ru_nivcsw,
+        "major_faults": rusage.ru_majflt,
+        "minor_faults": rusage.ru_minflt,
+    })
+
+
+def with_cpu(usage):
+    usage["cpu_seconds"] = usage["user_seconds"] + usage["sys_seconds"]
+    return usage
+
+
+def run_accounted(cmd, script):
+    """Run cmd with script on stdin; returns (returncode, stdout, usage).
+
+    stderr goes to stdout. usage is None when wait4 is not available.
+    """
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT, text=True)
+    if not hasattr(os, "wait4"):
+        output, _ = process.communicate(script)
+        return process.returncode, output, None
+    try:
+        process.stdin.write(script)
+        process.stdin.close()
+        output = process.stdout.read()
+        process.stdout.close()
+        # wait without reaping so /proc/<pid>/io is still there, then reap
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        io = read_io(process.pid)
+        _, status, rusage = os.wait4(process.pid, 0)
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    process.returncode = os.waitstatus_to_exitcode(status)
+    usage = from_rusage(rusage)
+    usage.update(io)
+    return process.returncode, output, usage
+
+
+def format_resources(usage):
+    """CSV values of a usage dict (empty strings when not measured)."""
+    row = {}
+    for field in RESOURCE_FIELDS:
+        value = (usage or {}).get(field)
+        if value is None:
+            row[field] = ""
+        elif field.endswith("_seconds"):
+            row[field] = f"{value:.6f}"
+        else:
+            row[field] = int(value)
+    return row
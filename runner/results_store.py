@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Columnar results warehouse shared by all runners.
+
+Every invocation of a runner is one run with a unique run id; its metadata
+(kind, mode, scale factor, binary fingerprint, host, timestamps, command,
+the CPUs it may run on and its DuckDB threads) goes to the `runs` table and
+its measurements to one table per kind:
+
+  performance  run_experiments.py     time_seconds, engine_seconds and OS
+                                      counters (CPU, faults, I/O) per rep
+  memory       measure_memory.py      peak_memory_bytes per rep
+  join_sizes   measure_join_sizes.py  row counts per plan step
+  throughput   throughput.py          latency of every query of every stream
+
+The store is a single DuckDB file (results/warehouse.duckdb by default),
+written once per run in a single transaction, so reruns add new runs next to
+old ones instead of mixing into them. Readers pick the latest run per mode
+unless given a run id. Columns missing from an older store are added on
+open, so new measurements need no migration step.
+
+Usage:
+    python3 results_store.py ingest ../results/sf5/ssb_rpt.csv --sf 5
+    python3 results_store.py runs --sf 10
+    python3 results_store.py history --query q4.1 --sf 10 --days 30
+    python3 results_store.py sql "SELECT mode, median(time_seconds) FROM performance JOIN runs USING (run_id) GROUP BY mode"
+"""
+
+import argparse
+import csv
+import getpass
+import hashlib
+import socket
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from statistics import mean
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STORE_PATH = PROJECT_ROOT / "results" / "warehouse.duckdb"
+
+KINDS = ("performance", "memory", "join_sizes", "throughput")
+
+# Column types per table; run_id links measurements to runs
+TABLE_COLUMNS = {
+    "runs": {
+        "run_id": "VARCHAR PRIMARY KEY",
+        "kind": "VARCHAR",
+        "mode": "VARCHAR",
+        "scale_factor": "DOUBLE",
+        "binary_path": "VARCHAR",
+        "binary_fingerprint": "VARCHAR",
+        "db_path": "VARCHAR",
+        "session": "VARCHAR",
+        "host": "VARCHAR",
+        "user_name": "VARCHAR",
+        "started_at": "TIMESTAMP",
+        "finished_at": "TIMESTAMP",
+        "command": "VARCHAR",
+        "source": "VARCHAR",
+        "cache": "VARCHAR",
+        "cpus": "VARCHAR",
+        "threads": "INTEGER",
+    },
+    "performance": {
+        "run_id": "VARCHAR",
+        "query": "VARCHAR",
+        "rep": "INTEGER",
+        "time_seconds": "DOUBLE",
+        "engine_seconds": "DOUBLE",
+        "profile": "VARCHAR",
+        "eviction": "VARCHAR",
+        "plan_fingerprint": "VARCHAR",
+        "plan": "VARCHAR",
+        "result_mode": "VARCHAR",
+        "result_rows": "BIGINT",
+        "result_hash": "VARCHAR",
+        "cpu_seconds": "DOUBLE",
+        "user_seconds": "DOUBLE",
+        "sys_seconds": "DOUBLE",
+        "voluntary_switches": "BIGINT",
+        "involuntary_switches": "BIGINT",
+        "major_faults": "BIGINT",
+        "minor_faults": "BIGINT",
+        "read_bytes": "BIGINT",
+        "write_bytes": "BIGINT",
+    },
+    "memory": {
+        "run_id": "VARCHAR",
+        "query": "VARCHAR",
+        "rep": "INTEGER",
+        "peak_memory_bytes": "BIGINT",
+        "status": "VARCHAR",
+    },
+    "join_sizes": {
+        "run_id": "VARCHAR",
+        "query": "VARCHAR",
+        "rep": "INTEGER",
+        "step": "INTEGER",
+        "step_name": "VARCHAR",
+        "operator": "VARCHAR",
+        "row_count": "BIGINT",
+        "input_rows": "BIGINT",
+        "rows_removed": "BIGINT",
+    },
+    "throughput": {
+        "run_id": "VARCHAR",
+        "streams": "INTEGER",
+        "stream": "INTEGER",
+        "seq": "INTEGER",
+        "permutation": "INTEGER",
+        "query": "VARCHAR",
+        "start_seconds": "DOUBLE",
+        "latency_seconds": "DOUBLE",
+        "status": "VARCHAR",
+    },
+    # reference runs pinned by regression_gate.py; the latest pin of a
+    # name, mode, scale factor and cache mode wins
+    "pins": {
+        "name": "VARCHAR",
+        "run_id": "VARCHAR",
+        "mode": "VARCHAR",
+        "scale_factor": "DOUBLE",
+        "cache": "VARCHAR",
+        "pinned_at": "TIMESTAMP",
+    },
+}
+
+INDEXES = {
+    "runs_sf_started": ("runs", "scale_factor, started_at"),
+    "performance_query": ("performance", "query"),
+    "memory_query": ("memory", "query"),
+    "join_sizes_query": ("join_sizes", "query"),
+    "throughput_query": ("throughput", "query"),
+}
+
+LOCK_RETRIES = 20
+
+# Cache mode of performance runs recorded without one (see cache_control.py)
+DEFAULT_CACHE = "fully-warm"
+
+
+def connect(store_path=STORE_PATH, read_only=False):
+    """Open the store, creating tables and missing columns when writable."""
+    import duckdb
+
+    store_path = Path(store_path)
+    if read_only and not store_path.exists():
+        raise RuntimeError(f"Results store not found: {store_path}")
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    # another runner may be writing; its transaction is short, so wait for it
+    for attempt in range(LOCK_RETRIES):
+        try:
+            con = duckdb.connect(str(store_path), read_only=read_only)
+            break
+        except duckdb.IOException as e:
+            if "lock" not in str(e).lower() or attempt == LOCK_RETRIES - 1:
+                raise
+            time.sleep(0.5)
+    if not read_only:
+        ensure_schema(con)
+    return con
+
+
+def ensure_schema(con):
+    for table, columns in TABLE_COLUMNS.items():
+        defs = ", ".join(f"{name} {ctype}" for name, ctype in columns.items())
+        con.execute(f"CREATE TABLE IF NOT EXISTS {table} ({defs})")
+        existing = {row[0] for row in con.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = ?",
+            [table]).fetchall()}
+        for name, ctype in columns.items():
+            if name not in existing:
+                con.execute(f"ALTER TABLE {table} ADD COLUMN {name} "
+                            f"{ctype.replace(' PRIMARY KEY', '')}")
+    for name, (table, columns) in INDEXES.items():
+        con.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def new_run(kind, mode, scale_factor=None, bin_path=None, db_path=None, session=None,
+            source="runner", cache=None, threads=None):
+    """Metadata of a run that starts now; cpus is the CPU set it may run on."""
+    from build_cache import binary_fingerprint
+    from core_scheduler import available_cpus, format_cpus
+
+    if kind not in KINDS:
+        raise ValueError(f"Unknown result kind: {kind}")
+    host = socket.gethostname()
+    started = datetime.now()
+    return {
+        "run_id": f"{started:%Y%m%dT%H%M%S}-{host}-{uuid.uuid4().hex[:8]}",
+        "kind": kind,
+        "mode": mode,
+        "scale_factor": float(scale_factor) if scale_factor is not None else None,
+        "binary_path": str(bin_path) if bin_path else None,
+        "binary_fingerprint": (binary_fingerprint(bin_path)
+                               if bin_path and Path(bin_path).is_file() else None),
+        "db_path": str(db_path) if db_path else None,
+        "session": session,
+        "host": host,
+        "user_name": getpass.getuser(),
+        "started_at": started,
+        "finished_at": None,
+        "command": " ".join(sys.argv),
+        "source": source,
+        "cache": cache,
+        "cpus": format_cpus(available_cpus()),
+        "threads": threads,
+    }
+
+
+def _insert(con, table, rows):
+    columns = list(TABLE_COLUMNS[table])
+    values = [[row.get(c) if row.get(c) != "" else None for c in columns] for row in rows]
+    if values:
+        con.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})", values)
+
+
+def record(run, rows, store_path=STORE_PATH):
+    """Write a finished run and its measurements in one transaction."""
+    run = dict(run, finished_at=run.get("finished_at") or datetime.now())
+    rows = [dict(row, run_id=run["run_id"]) for row in rows]
+    con = connect(store_path)
+    try:
+        con.execute("BEGIN TRANSACTION")
+        _insert(con, "runs", [run])
+        _insert(con, run["kind"], rows)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.close()
+    print(f"Recorded run {run['run_id']} ({len(rows)} rows) in {store_path}")
+    return run["run_id"]
+
+
+def kind_of_csv(fieldnames):
+    if "latency_seconds" in fieldnames:
+        return "throughput"
+    if "time_seconds" in fieldnames:
+        return "performance"
+    if "peak_memory_bytes" in fieldnames:
+        return "memory"
+    if "row_count" in fieldnames:
+        return "join_sizes"
+    raise ValueError(f"Unrecognized results CSV columns: {', '.join(fieldnames)}")
+
+
+def ingest_csv(csv_path, scale_factor=None, store_path=STORE_PATH):
+    """Import a legacy per-mode CSV; re-ingesting the same file is a no-op."""
+    csv_path = Path(csv_path)
+    content = csv_path.read_bytes()
+    with csv_path.open() as f:
+        reader = csv.DictReader(f)
+        kind = kind_of_csv(reader.fieldnames or [])
+        rows = list(reader)
+    by_mode = defaultdict(list)
+    for row in rows:
+        by_mode[row.get("mode", "")].append(row)
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    started = datetime.fromtimestamp(csv_path.stat().st_mtime)
+    ingested = []
+    sf = float(scale_factor) if scale_factor is not None else None
+    for mode, mode_rows in sorted(by_mode.items()):
+        # identical files of different scale factors are different runs
+        run_id = f"csv-{digest}-sf{sf:g}-{mode}" if sf is not None else f"csv-{digest}-{mode}"
+        with connect(store_path) as con:
+            # csv-{digest}-{mode} is the id stores ingested into before
+            if con.execute("SELECT 1 FROM runs WHERE run_id IN (?, ?) "
+                           "AND scale_factor IS NOT DISTINCT FROM ?",
+                           [run_id, f"csv-{digest}-{mode}", sf]).fetchone():
+                print(f"Already ingested: {csv_path} ({mode})")
+                continue
+        run = new_run(kind, mode, scale_factor, source=str(csv_path),
+                      cache=mode_rows[0].get("cache") or None)
+        run.update(run_id=run_id, started_at=started, finished_at=started, host=None,
+                   user_name=None, command=None, cpus=None)
+        for row in mode_rows:
+            row.setdefault("rep", 1)
+        ingested.append(record(run, mode_rows, store_path))
+    return ingested
+
+
+def run_ids(con, kind, mode, scale_factor=None, cache=DEFAULT_CACHE, limit=None):
+    """Run ids of a kind, mode and scale factor, newest first."""
+    sql = "SELECT run_id FROM runs WHERE kind = ? AND mode = ?"
+    params = [kind, mode]
+    if kind == "performance":
+        # runs from before cache modes existed were fully warm
+        sql += f" AND coalesce(cache, '{DEFAULT_CACHE}') = ?"
+        params.append(cache)
+    if scale_factor is not None:
+        sql += " AND scale_factor = ?"
+        params.append(float(scale_factor))
+    sql += " ORDER BY started_at DESC" + (f" LIMIT {int(limit)}" if limit else "")
+    return [run_id for (run_id,) in con.execute(sql, params).fetchall()]
+
+
+def latest_run_id(con, kind, mode, scale_factor=None, cache=DEFAULT_CACHE):
+    ids = run_ids(con, kind, mode, scale_factor, cache, limit=1)
+    return ids[0] if ids else None
+
+
+def run_configuration(con, run_id):
+    """Settings of a performance run its timings depend on, None where unknown.
+
+    threads is the effective DuckDB thread count (DuckDB's default is one
+    per CPU the process may use); plans tells whether the timed executions
+    were profiled (run_experiments.py --plans).
+    """
+    from core_scheduler import parse_cpus
+    session, threads, cpus = con.execute(
+        "SELECT session, threads, cpus FROM runs WHERE run_id = ?", [run_id]).fetchone()
+    # runs from before result modes existed printed their results
+    result_mode, plans = con.execute(
+        "SELECT coalesce(any_value(result_mode), 'print'), bool_or(plan IS NOT NULL) "
+        "FROM performance WHERE run_id = ?", [run_id]).fetchone()
+    cpu_count = len(parse_cpus(cpus)) if cpus else None
+    return {"session": session, "threads": threads or cpu_count, "cpus": cpu_count,
+            "result_mode": result_mode, "plans": bool(plans)}
+
+
+def configuration_differences(reference, candidate):
+    """["setting: reference value vs candidate value"] of two run_configuration
+    dicts; settings unknown on either side are not compared."""
+    return [f"{key} {reference[key]} vs {candidate[key]}" for key in reference
+            if None not in (reference[key], candidate[key])
+            and reference[key] != candidate[key]]
+
+
+def load_times(store_path, mode, scale_factor=None, run_id=None, cache=DEFAULT_CACHE,
+               column="time_seconds"):
+    """{query: [time_seconds]} of one performance run (default: the latest
+    in the given cache mode); column picks another measurement, e.g.
+    cpu_seconds, skipping reps that did not record it."""
+    if column not in TABLE_COLUMNS["performance"]:
+        raise ValueError(f"Unknown performance column: {column}")
+    with connect(store_path, read_only=True) as con:
+        run_id = run_id or latest_run_id(con, "performance", mode, scale_factor, cache)
+        times = defaultdict(list)
+        if run_id:
+            for query, seconds in con.execute(
+                    f"SELECT query, {column} FROM performance WHERE run_id = ? "
+                    f"AND {column} IS NOT NULL ORDER BY query, rep", [run_id]).fetchall():
+                times[query].append(seconds)
+    return times
+
+
+def pin_run(store_path, run_id, name="reference"):
+    """Pin a performance run as the reference of its mode, scale factor and
+    cache mode under name; returns the pin row."""
+    with connect(store_path) as con:
+        run = con.execute(
+            "SELECT mode, scale_factor, coalesce(cache, ?) FROM runs "
+            "WHERE run_id = ? AND kind = 'performance'", [DEFAULT_CACHE, run_id]).fetchone()
+        if run is None:
+            raise ValueError(f"No performance run {run_id} in {store_path}")
+        pin = {"name": name, "run_id": run_id, "mode": run[0], "scale_factor": run[1],
+               "cache": run[2], "pinned_at": datetime.now()}
+        _insert(con, "pins", [pin])
+    return pin
+
+
+def pinned_run_id(con, name, mode, scale_factor, cache=DEFAULT_CACHE):
+    row = con.execute(
+        "SELECT run_id FROM pins WHERE name = ? AND mode = ? AND scale_factor = ? "
+        "AND cache = ? ORDER BY pinned_at DESC LIMIT 1",
+        [name, mode, float(scale_factor), cache]).fetchone()
+    return row[0] if row else None
+
+
+def load_plans(store_path, mode, scale_factor=None, run_id=None, cache=DEFAULT_CACHE):
+    """{query: [(time_seconds, plan)]} of the reps of one performance run that
+    recorded their plan (run_experiments.py --plans)."""
+    with connect(store_path, read_only=True) as con:
+        run_id = run_id or latest_run_id(con, "performance", mode, scale_factor, cache)
+        plans = defaultdict(list)
+        if run_id:
+            for query, seconds, plan in con.execute(
+                    "SELECT query, time_seconds, plan FROM performance WHERE run_id = ? "
+                    "AND plan IS NOT NULL ORDER BY query, rep", [run_id]).fetchall():
+                plans[query].append((seconds, plan))
+    return plans
+
+
+def load_latest(store_path, kind="performance", column="time_seconds", cache=DEFAULT_CACHE):
+    """{(scale_factor, mode): {query: [column]}} of the latest run of every
+    scale factor and mode of one kind (failed memory reps excluded;
+    performance runs of the given cache mode only)."""
+    if column not in TABLE_COLUMNS[kind]:
+        raise ValueError(f"Unknown {kind} column: {column}")
+    status = "AND m.status = 'success'" if kind == "memory" else ""
+    with connect(store_path, read_only=True) as con:
+        values = defaultdict(lambda: defaultdict(list))
+        for sf, mode, query, value in con.execute(f"""
+                WITH latest AS (
+                    SELECT run_id, scale_factor, mode FROM runs
+                    WHERE kind = ? AND (kind <> 'performance'
+                                        OR coalesce(cache, '{DEFAULT_CACHE}') = ?)
+                    QUALIFY row_number() OVER (
+                        PARTITION BY scale_factor, mode ORDER BY started_at DESC) = 1)
+                SELECT l.scale_factor, l.mode, m.query, m.{column}
+                FROM {kind} m JOIN latest l USING (run_id)
+                WHERE m.{column} IS NOT NULL {status}
+                ORDER BY l.scale_factor, l.mode, m.query, m.rep""", [kind, cache]).fetchall():
+            values[(sf, mode)][query].append(value)
+    return values
+
+
+def load_latest_times(store_path, cache=DEFAULT_CACHE):
+    """{(scale_factor, mode): {query: [time_seconds]}} of the latest
+    performance run of every scale factor and mode."""
+    return load_latest(store_path, "performance", "time_seconds", cache)
+
+
+def load_memory(store_path, mode, scale_factor=None, run_id=None):
+    """{query: [peak MB]} of successful reps of one memory run."""
+    with connect(store_path, read_only=True) as con:
+        run_id = run_id or latest_run_id(con, "memory", mode, scale_factor)
+        memory = defaultdict(list)
+        if run_id:
+            for query, peak in con.execute(
+                    "SELECT query, peak_memory_bytes FROM memory WHERE run_id = ? "
+                    "AND status = 'success' ORDER BY query, rep", [run_id]).fetchall():
+                memory[query].append(peak / (1024 * 1024))
+    return memory
+
+
+def load_join_sizes(store_path, mode, scale_factor=None, run_id=None, key="step_name"):
+    """{query: {step key: row_count}} of the first rep of one join size run."""
+    if key not in ("step", "step_name"):
+        raise ValueError(f"Unknown join size key: {key}")
+    with connect(store_path, read_only=True) as con:
+        run_id = run_id or latest_run_id(con, "join_sizes", mode, scale_factor)
+        steps = defaultdict(list)
+        if run_id:
+            for query, step, count in con.execute(
+                    f"SELECT query, {key}, row_count FROM join_sizes WHERE run_id = ? "
+                    "AND coalesce(rep, 1) = 1 ORDER BY query, step", [run_id]).fetchall():
+                steps[query].append((str(step), count))
+    # runs from before step names were numbered may repeat them
+    from profiles import number_repeats
+    sizes = defaultdict(dict)
+    for query, query_steps in steps.items():
+        labels = number_repeats(step for step, _ in query_steps)
+        sizes[query] = dict(zip(labels, (count for _, count in query_steps)))
+    return sizes
+
+
+def averages(per_query):
+    return {q: mean(values) for q, values in per_query.items() if values}
+
+
+def load_comparison(store_path, scale_factor=None, join_key="step_name"):
+    """Inputs of the graph scripts from the latest baseline and RPT runs:
+    ((baseline_perf, rpt_perf), (baseline_mem, rpt_mem), (baseline_joins, rpt_joins))."""
+    modes = ("baseline", "rpt")
+    perf = tuple(averages(load_times(store_path, m, scale_factor)) for m in modes)
+    memory = tuple(averages(load_memory(store_path, m, scale_factor)) for m in modes)
+    joins = tuple(load_join_sizes(store_path, m, scale_factor, key=join_key) for m in modes)
+    return perf, memory, joins
+
+
+def print_rows(cursor):
+    columns = [d[0] for d in cursor.description]
+    rows = cursor.fetchall()
+    widths = [max([len(c)] + [len(str(r[i])) for r in rows]) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and fill the results warehouse.")
+    parser.add_argument("--store", default=str(STORE_PATH), help="Path to the results store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = sub.add_parser("ingest", help="Import existing results CSVs")
+    ingest_parser.add_argument("csv", nargs="+")
+    ingest_parser.add_argument("--sf", default=None, help="Scale factor of the CSVs")
+
+    runs_parser = sub.add_parser("runs", help="List runs")
+    runs_parser.add_argument("--sf", default=None)
+    runs_parser.add_argument("--kind", choices=KINDS, default=None)
+
+    history_parser = sub.add_parser("history", help="Per-run timings of one query")
+    history_parser.add_argument("--query", required=True)
+    history_parser.add_argument("--sf", default=None)
+    history_parser.add_argument("--days", type=int, default=None,
+                                help="Only runs from the last N days")
+
+    sql_parser = sub.add_parser("sql", help="Run a SQL query against the store")
+    sql_parser.add_argument("sql")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "ingest":
+            for path in args.csv:
+                ingest_csv(path, args.sf, args.store)
+            return
+        with connect(args.store, read_only=True) as con:
+            if args.command == "runs":
+                sql = ("SELECT run_id, kind, mode, scale_factor, cache, binary_fingerprint, "
+                       "host, started_at FROM runs WHERE 1 = 1")
+                params = []
+                if args.sf is not None:
+                    sql += " AND scale_factor = ?"
+                    params.append(float(args.sf))
+                if args.kind:
+                    sql += " AND kind = ?"
+                    params.append(args.kind)
+                print_rows(con.execute(sql + " ORDER BY started_at", params))
+            elif args.command == "history":
+                sql = ("SELECT r.run_id, r.mode, r.scale_factor, r.cache, r.binary_fingerprint, r.host, "
+                       "r.started_at, count(*) AS reps, "
+                       "round(median(p.time_seconds), 6) AS median_seconds, "
+                       "round(min(p.time_seconds), 6) AS min_seconds "
+                       "FROM performance p JOIN runs r USING (run_id) WHERE p.query = ?")
+                params = [args.query]
+                if args.sf is not None:
+                    sql += " AND r.scale_factor = ?"
+                    params.append(float(args.sf))
+                if args.days is not None:
+                    sql += " AND r.started_at >= now()::TIMESTAMP - to_days(?)"
+                    params.append(args.days)
+                sql += " GROUP BY ALL ORDER BY r.started_at"
+                print_rows(con.execute(sql, params))
+            elif args.command == "sql":
+                print_rows(con.execute(args.sql))
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
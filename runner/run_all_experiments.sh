@@ -7,10 +7,12 @@ PROJECT_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
 
 # Paths (absolute)
 RPT_SRC_DIR="${PROJECT_ROOT}/duckdb-rpt/rpt-src"
-SETTING_FILE="${RPT_SRC_DIR}/src/include/duckdb/optimizer/predicate_transfer/setting.hpp"
-RPT_BIN="${RPT_SRC_DIR}/build/duckdb"
 DB_PATH="${PROJECT_ROOT}/duckdb-rpt/ssb.db"
 RESULTS_DIR="${PROJECT_ROOT}/results"
+# Results store every run is recorded in (see results_store.py)
+STORE="${STORE:-${RESULTS_DIR}/warehouse.duckdb}"
+# Scale factor the runs are recorded under (default: read from the database)
+SF="${SF:-}"
 
 # Check if RPT source exists
 if [ ! -d "$RPT_SRC_DIR" ]; then
@@ -27,89 +29,26 @@ fi
 
 mkdir -p "$RESULTS_DIR"
 
-# Function to configure setting.hpp
-configure_setting() {
+# Function to get the binary for a mode from the build cache.
+# build_cache.py only runs make when no binary exists for the current
+# rpt-src commit and setting flags, and keeps each configuration separately.
+binary_for_mode() {
     local mode=$1
-    local setting_file="$SETTING_FILE"
-    
-    if [ ! -f "$setting_file" ]; then
-        echo "Error: Setting file not found: $setting_file"
-        exit 1
-    fi
-    
-    # Backup original (only once)
-    if [ ! -f "${setting_file}.bak" ]; then
-        cp "$setting_file" "${setting_file}.bak"
-        echo "Backed up original setting.hpp"
-    fi
-    
-    if [ "$mode" = "rpt" ]; then
-        # RPT mode: enable PredicateTransfer and RandomLeftDeep
-        cat > "$setting_file" << 'EOF'
-// Exclusive
-// #define BloomJoin
-#define PredicateTransfer
-
-// Exclusive
-// #define ExactLeftDeep
-// #define RandomBushy
-#define RandomLeftDeep
-
-// #define SmalltoLarge
-
-// #define External
-EOF
-        echo "Configured setting.hpp for RPT mode (PredicateTransfer + RandomLeftDeep)"
-    elif [ "$mode" = "baseline" ]; then
-        # Baseline mode: disable PredicateTransfer, keep RandomLeftDeep
-        cat > "$setting_file" << 'EOF'
-// Exclusive
-// #define BloomJoin
-// #define PredicateTransfer
-
-// Exclusive
-// #define ExactLeftDeep
-// #define RandomBushy
-#define RandomLeftDeep
-
-// #define SmalltoLarge
-
-// #define External
-EOF
-        echo "Configured setting.hpp for baseline mode (RandomLeftDeep only, no PredicateTransfer)"
-    else
-        echo "Error: Unknown mode: $mode"
-        exit 1
-    fi
+    python3 "${SCRIPT_DIR}/build_cache.py" build --mode "$mode"
 }
 
-# Function to rebuild DuckDB
-rebuild_duckdb() {
-    local mode=$1
-    local original_dir=$(pwd)
-    echo ""
-    echo "=========================================="
-    echo "Rebuilding DuckDB for $mode mode..."
-    echo "=========================================="
-    
-    cd "$RPT_SRC_DIR/build"
-    
-    # Rebuild
-    make -j$(nproc)
-    
-    if [ ! -f "$RPT_BIN" ]; then
-        echo "Error: Build failed, binary not found: $RPT_BIN"
-        cd "$original_dir"
-        exit 1
-    fi
-    
-    echo "Build successful!"
-    cd "$original_dir"
+# Scale factor of $DB_PATH: SSB has 30,000 customers per unit of scale factor
+scale_factor_of_db() {
+    local bin_path=$1
+    echo "SELECT count(*) / 30000 FROM ssb.customer;" \
+        | "$bin_path" -readonly -csv -noheader "$DB_PATH" \
+        | python3 -c 'import sys; print(f"{float(sys.stdin.read()):g}")'
 }
 
 # Function to run experiments
 run_experiments() {
     local mode=$1
+    local bin_path=$2
     local output_file="$RESULTS_DIR/ssb_${mode}.csv"
     
     echo ""
@@ -119,9 +58,11 @@ run_experiments() {
     
     python3 "${SCRIPT_DIR}/run_experiments.py" \
         --mode "$mode" \
-  --duckdb-bin "$RPT_BIN" \
+  --duckdb-bin "$bin_path" \
   --db "$DB_PATH" \
   --reps 5 \
+        --store "$STORE" \
+        --sf "$SF" \
         --out "$output_file"
     
     echo "Results saved to: $output_file"
@@ -135,18 +76,20 @@ echo "Database: $DB_PATH"
 echo "Results directory: $RESULTS_DIR"
 echo ""
 
-# Step 1: Configure and build for RPT mode
+# Step 1: Get (or build) the RPT mode binary
 echo "Step 1: Setting up RPT mode..."
-configure_setting "rpt"
-rebuild_duckdb "rpt"
-run_experiments "rpt"
+RPT_MODE_BIN="$(binary_for_mode "rpt")"
+if [ -z "$SF" ]; then
+    SF="$(scale_factor_of_db "$RPT_MODE_BIN")"
+fi
+echo "Scale factor: $SF"
+run_experiments "rpt" "$RPT_MODE_BIN"
 
-# Step 2: Configure and build for baseline mode
+# Step 2: Get (or build) the baseline mode binary
 echo ""
 echo "Step 2: Setting up baseline mode..."
-configure_setting "baseline"
-rebuild_duckdb "baseline"
-run_experiments "baseline"
+BASELINE_BIN="$(binary_for_mode "baseline")"
+run_experiments "baseline" "$BASELINE_BIN"
 
 echo ""
 echo "=========================================="
@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 import argparse
-import subprocess
-import time
 import csv
+import tempfile
 from pathlib import Path
 
+from cache_control import CACHE_MODES, DEFAULT_CACHE_MODE, EVICTION_METHODS, evict, warm
+from duckdb_session import RESULT_MODES, SESSION_KINDS, SpawnSession, open_session
+from profiles import (OPERATOR_FIELDS, flatten_profile, plan_fingerprint, plan_signature,
+                      summarize_profile)
+from resource_usage import RESOURCE_FIELDS, format_resources
+
+# Columns written to the results CSV
+CSV_FIELDS = ["mode", "query", "rep", "time_seconds", "engine_seconds", "session",
+              "profile", "cache", "eviction", "plan_fingerprint", "plan",
+              "result_mode", "result_rows", "result_hash"] + RESOURCE_FIELDS
+
 # SSB query definitions (standard star-schema versions)
 QUERIES = {
     "q1.1": """
@@ -161,18 +171,34 @@ QUERIES = {
 
 
 def run_query(bin_path: str, db_path: str, sql: str) -> float:
-    """Run a single query via DuckDB CLI and return elapsed seconds."""
-    cmd = [bin_path, db_path, "-c", sql]
-    start = time.perf_counter()
-    result = subprocess.run(
-        cmd,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-    end = time.perf_counter()
-    if result.returncode != 0:
-        raise RuntimeError(f"Command failed: {' '.join(cmd)}")
-    return end - start
+    """Run a single query in a fresh DuckDB CLI and return elapsed seconds."""
+    return SpawnSession(bin_path, db_path).execute(sql).wall_seconds
+
+
+def threads_setup(threads):
+    """Setup SQL pinning DuckDB's thread count, None to keep its default."""
+    return f"SET threads = {threads}" if threads else None
+
+
+def format_seconds(value):
+    """Format an optional duration for the CSV."""
+    return "" if value is None else f"{value:.6f}"
+
+
+def profile_outputs(out_path):
+    """Profile directory and operators CSV stored next to the results CSV."""
+    profile_dir = out_path.with_name(f"{out_path.stem}_profiles")
+    operators_path = out_path.with_name(f"{out_path.stem}_operators.csv")
+    return profile_dir, operators_path
+
+
+def write_operators(writer, mode, qname, rep, profile):
+    """Write one row per operator of a captured profile."""
+    for node in flatten_profile(profile):
+        row = {"mode": mode, "query": qname, "rep": rep}
+        row.update(node)
+        row["timing_seconds"] = f"{node['timing_seconds']:.6f}"
+        writer.writerow(row)
 
 
 def main():
@@ -189,7 +215,47 @@ def main():
                         help="Number of repetitions per query")
     parser.add_argument("--out", default="results.csv",
                         help="Output CSV file")
+    parser.add_argument("--session", choices=SESSION_KINDS, default=None,
+                        help="spawn: new duckdb process per query; "
+                             "persistent: one long-lived process per binary and database. "
+                             "Set by --cache (persistent for fully-warm, spawn otherwise); "
+                             "any other combination is an error")
+    parser.add_argument("--cache", choices=CACHE_MODES, default=DEFAULT_CACHE_MODE,
+                        help="cold: evict the database and use a fresh process per rep; "
+                             "os-warm: page cache warm, fresh process per rep; "
+                             "fully-warm: warm-up run, then reps in the session")
+    parser.add_argument("--eviction", choices=EVICTION_METHODS, default="auto",
+                        help="How --cache cold evicts the database (auto: drop_caches "
+                             "when permitted, else posix_fadvise)")
+    parser.add_argument("--result", choices=RESULT_MODES, default="print",
+                        help="print: CLI renders the result (timed); discard: fetched and "
+                             "dropped; count: rows counted in the engine; hash: rows counted "
+                             "and hashed in the engine, recorded per rep")
+    parser.add_argument("--profile", action="store_true",
+                        help="Capture DuckDB JSON profiles and per-operator timings "
+                             "next to the output CSV, from an extra untimed execution "
+                             "after every rep")
+    parser.add_argument("--plans", action="store_true",
+                        help="Record the join order and build/probe sides of every rep "
+                             "(profiles the timed executions themselves)")
+    parser.add_argument("--read-only", action="store_true",
+                        help="Open the database read-only, so cells running side by side "
+                             "can share it")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="DuckDB threads (default: DuckDB's own, all cores); set by "
+                             "orchestrator.py to the CPUs a cell is pinned to")
+    parser.add_argument("--sf", default=None,
+                        help="Scale factor of the database, recorded with the run")
+    parser.add_argument("--store", default=None,
+                        help="Also record the run in this results store "
+                             "(see results_store.py)")
     args = parser.parse_args()
+    # fully-warm times the reps in the session its warm-up ran in, so the
+    # buffer pool stays warm; the other cache modes need a fresh process for
+    # every repetition
+    session_kind = "persistent" if args.cache == "fully-warm" else "spawn"
+    if args.session and args.session != session_kind:
+        parser.error(f"--cache {args.cache} needs --session {session_kind}")
 
     db_path = str(Path(args.db))
     bin_path = str(Path(args.duckdb_bin))
@@ -197,19 +263,94 @@ def main():
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with out_path.open("a", newline="") as f:
-        writer = csv.writer(f)
-        # header only if file is empty
-        if out_path.stat().st_size == 0:
-            writer.writerow(["mode", "query", "rep", "time_seconds"])
+    operators_file = None
+    operators_writer = None
+    if args.profile:
+        profile_dir, operators_path = profile_outputs(out_path)
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        operators_file = operators_path.open("w", newline="")
+        operators_writer = csv.DictWriter(operators_file, fieldnames=OPERATOR_FIELDS)
+        operators_writer.writeheader()
+
+    run = None
+    if args.store:
+        from results_store import new_run
+        run = new_run("performance", args.mode, args.sf, bin_path, db_path, session_kind,
+                      cache=args.cache, threads=args.threads)
+    rows = []
+
+    # every run starts a fresh CSV; history is kept in the results store
+    with out_path.open("w", newline="") as f, tempfile.TemporaryDirectory() as plan_dir, \
+            open_session(session_kind, bin_path, db_path, read_only=args.read_only,
+                         setup_sql=threads_setup(args.threads),
+                         result_mode=args.result) as session:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
 
         for qname, sql in QUERIES.items():
-            # optional warm-up
-            _ = run_query(bin_path, db_path, sql)
+            if args.cache == "fully-warm":
+                # optional warm-up
+                _ = session.execute(sql)
+            elif args.cache == "os-warm":
+                warm(db_path)
             for rep in range(1, args.reps + 1):
-                t = run_query(bin_path, db_path, sql)
-                writer.writerow([args.mode, qname, rep, f"{t:.6f}"])
-                print(f"{args.mode} {qname} rep {rep}: {t:.3f}s")
+                eviction = evict(db_path, args.eviction) if args.cache == "cold" else ""
+                profile_path = None
+                if args.profile:
+                    profile_path = (profile_dir / f"{args.mode}_{qname}_rep{rep}.json").resolve()
+                # a rep's plan has to come from the timed execution, as every
+                # execution may choose another; --profile alone keeps the
+                # profiler out of the timings
+                timed_profile = (profile_path or Path(plan_dir) / "plan.json"
+                                 if args.plans else None)
+                result = session.execute(sql, profile_path=timed_profile)
+                plan = plan_signature(result.profile) if result.profile is not None else ""
+                profile = result.profile
+                if args.profile and not args.plans:
+                    if args.cache == "cold":
+                        evict(db_path, args.eviction)
+                    profile = session.execute(sql, profile_path=profile_path).profile
+                row = {
+                    "mode": args.mode,
+                    "query": qname,
+                    "rep": rep,
+                    "time_seconds": format_seconds(result.wall_seconds),
+                    "engine_seconds": format_seconds(result.engine_seconds),
+                    "session": session.kind,
+                    "profile": str(profile_path) if args.profile else "",
+                    "cache": args.cache,
+                    "eviction": eviction,
+                    "plan_fingerprint": plan_fingerprint(plan),
+                    "plan": plan,
+                    "result_mode": args.result,
+                    "result_rows": "" if result.rows is None else result.rows,
+                    "result_hash": result.result_hash or "",
+                }
+                row.update(format_resources(result.resources))
+                writer.writerow(row)
+                rows.append(row)
+                engine = (f" (engine {result.engine_seconds:.3f}s)"
+                          if result.engine_seconds is not None else "")
+                cpu = (f", cpu {result.resources['cpu_seconds']:.3f}s"
+                       if result.resources else "")
+                print(f"{args.mode} {qname} rep {rep} ({args.cache}): "
+                      f"{result.wall_seconds:.3f}s{engine}{cpu}")
+                if plan:
+                    print(f"    plan {plan_fingerprint(plan)}: {plan}")
+                if args.profile:
+                    write_operators(operators_writer, args.mode, qname, rep, profile)
+                    summary = summarize_profile(profile)
+                    print(f"    hash joins {summary['hash_join_seconds']:.3f}s, "
+                          f"transfer {summary['transfer_seconds']:.3f}s "
+                          f"({summary['operators']} operators)")
+
+    if operators_file is not None:
+        operators_file.close()
+        print(f"Operator profiles saved to: {operators_path}")
+
+    if run is not None:
+        from results_store import record
+        record(run, rows, args.store)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Fit runtime and peak memory against scale factor, per query and mode, and
+extrapolate to scale factors that have not been generated yet.
+
+Two models are fitted to the per-SF means of every (metric, mode, query):
+
+  linear  y = fixed + per_sf * SF    fixed overhead (process start-up,
+                                     catalog, plan) plus a per-row cost
+  power   y = coeff * SF ** exponent exponent 1 is linear scaling, below 1
+                                     means the fixed part still dominates
+
+The per-row component is reported per million lineorder rows (SSB has
+6,000,000 lineorder rows per SF). Uncertainty comes from a bootstrap over
+the repetitions of every scale factor: each resample refits both models, and
+the percentiles of the refitted parameters and predictions are the CIs. The
+bootstrap covers measurement noise only; where the two models disagree at a
+target SF, that spread is the model uncertainty and is reported next to it.
+
+From the runtime fits the baseline / RPT speedup at each target SF follows,
+with its own CI, and a trend against the largest measured SF: "grows",
+"shrinks" or "flat" when the CI covers the measured speedup.
+
+Usage:
+    python3 scaling_model.py ../results/sf1 ../results/sf5 ../results/sf10 \\
+        --targets 30 100 --out ../results/scaling
+    python3 scaling_model.py --store ../results/warehouse.duckdb
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from cache_control import CACHE_MODES, DEFAULT_CACHE_MODE
+from speedup_stats import format_value, load_result_dirs, write_rows
+
+MODELS = ("linear", "power")
+
+METRICS = {
+    # metric: (results CSV prefix, column, store kind, unit scale, unit)
+    "runtime": ("ssb", "time_seconds", "performance", 1000.0, "ms"),
+    "memory": ("memory", "peak_memory_bytes", "memory", 1 / (1024 * 1024), "MB"),
+}
+
+LINEORDER_ROWS_PER_SF = 6_000_000
+
+FIT_FIELDS = ["metric", "unit", "mode", "query", "scale_factors", "model", "fixed",
+              "fixed_ci_low", "fixed_ci_high", "per_sf", "per_sf_ci_low", "per_sf_ci_high",
+              "per_million_rows", "exponent", "exponent_ci_low", "exponent_ci_high",
+              "r_squared", "preferred"]
+
+PREDICTION_FIELDS = ["metric", "unit", "mode", "query", "scale_factor", "model", "predicted",
+                     "ci_low", "ci_high", "model_spread"]
+
+SPEEDUP_FIELDS = ["query", "scale_factor", "model", "measured", "speedup", "ci_low",
+                  "ci_high", "trend"]
+
+
+def bootstrap_means(per_sf, resamples, rng):
+    """(resamples, n_sf) means of the reps of every SF, resampled per SF."""
+    columns = []
+    for values in per_sf:
+        values = np.asarray(values, dtype=float)
+        idx = rng.integers(0, len(values), size=(resamples, len(values)))
+        columns.append(values[idx].mean(axis=1))
+    return np.stack(columns, axis=1)
+
+
+def fit_lines(x, y):
+    """Least-squares intercept and slope of y (..., n) against x (n,)."""
+    xm = x.mean()
+    ym = y.mean(axis=-1, keepdims=True)
+    slope = ((x - xm) * (y - ym)).sum(axis=-1) / ((x - xm) ** 2).sum()
+    return ym[..., 0] - slope * xm, slope
+
+
+def fit_models(sfs, means):
+    """{model: (a, b)} for means (..., n_sf): linear (fixed, per_sf) and
+    power (coeff, exponent)."""
+    x = np.asarray(sfs, dtype=float)
+    fits = {"linear": fit_lines(x, means)}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_a, exponent = fit_lines(np.log(x), np.log(means))
+    fits["power"] = (np.exp(log_a), exponent)
+    return fits
+
+
+def predict(model, params, sf):
+    a, b = params
+    return a + b * sf if model == "linear" else a * sf ** b
+
+
+def r_squared(model, params, sfs, means):
+    x = np.asarray(sfs, dtype=float)
+    residual = ((means - predict(model, params, x)) ** 2).sum()
+    total = ((means - means.mean()) ** 2).sum()
+    return 1 - residual / total if total > 0 else 1.0
+
+
+def quantiles(values, confidence):
+    tail = (1 - confidence) / 2
+    low, high = np.nanquantile(values, [tail, 1 - tail], axis=0)
+    return float(low), float(high)
+
+
+def fit_group(per_sf_values, targets, resamples, confidence, rng):
+    """Fit both models to {sf: [values]}; returns (fit rows, predictions,
+    bootstrap predictions {model: (resamples, n_targets)})."""
+    sfs = sorted(per_sf_values)
+    means = np.array([np.mean(per_sf_values[sf]) for sf in sfs])
+    boot_means = bootstrap_means([per_sf_values[sf] for sf in sfs], resamples, rng)
+    point = fit_models(sfs, means)
+    boot = fit_models(sfs, boot_means)
+    target_x = np.asarray(targets, dtype=float)
+
+    fits, predictions, boot_predictions = [], {}, {}
+    scores = {model: r_squared(model, point[model], sfs, means) for model in MODELS}
+    preferred = max(MODELS, key=lambda m: scores[m])
+    for model in MODELS:
+        a, b = point[model]
+        row = {"model": model, "r_squared": scores[model], "preferred": model == preferred}
+        if model == "linear":
+            row.update(fixed=a, per_sf=b, per_million_rows=b * 1e6 / LINEORDER_ROWS_PER_SF)
+            row["fixed_ci_low"], row["fixed_ci_high"] = quantiles(boot[model][0], confidence)
+            row["per_sf_ci_low"], row["per_sf_ci_high"] = quantiles(boot[model][1], confidence)
+        else:
+            row.update(exponent=b)
+            row["exponent_ci_low"], row["exponent_ci_high"] = quantiles(boot[model][1], confidence)
+        fits.append(row)
+        predictions[model] = predict(model, (a, b), target_x)
+        boot_predictions[model] = predict(model, (boot[model][0][:, None], boot[model][1][:, None]),
+                                          target_x[None, :])
+    return fits, predictions, boot_predictions, preferred
+
+
+def scaling_analysis(samples, targets, resamples=2000, confidence=0.95, seed=0,
+                     metric="runtime"):
+    """Fit every (mode, query) of one metric.
+
+    samples: {(scale_factor, mode): {query: [values]}} in the metric's unit.
+    Returns (fit rows, prediction rows, {(mode, query): (preferred model,
+    {model: (resamples, n_targets) bootstrap predictions}, measured means)}).
+    """
+    rng = np.random.default_rng(seed)
+    unit = METRICS[metric][4]
+    by_group = {}
+    for (sf, mode), per_query in samples.items():
+        if not isinstance(sf, (int, float)):
+            continue
+        for query, values in per_query.items():
+            if values:
+                by_group.setdefault((mode, query), {})[float(sf)] = values
+
+    fit_rows, prediction_rows, boots = [], [], {}
+    for (mode, query) in sorted(by_group):
+        per_sf = by_group[(mode, query)]
+        if len(per_sf) < 2:
+            print(f"Skipping {metric} {mode} {query}: measured at a single scale factor")
+            continue
+        fits, predictions, boot_predictions, preferred = fit_group(
+            per_sf, targets, resamples, confidence, rng)
+        sf_list = " ".join(format_value(sf) for sf in sorted(per_sf))
+        for row in fits:
+            fit_rows.append(dict(row, metric=metric, unit=unit, mode=mode, query=query,
+                                 scale_factors=sf_list))
+        for i, target in enumerate(targets):
+            values = [predictions[m][i] for m in MODELS]
+            spread = (max(values) - min(values)) / np.mean(values) if np.mean(values) else 0.0
+            for model in MODELS:
+                low, high = quantiles(boot_predictions[model][:, i], confidence)
+                prediction_rows.append({
+                    "metric": metric, "unit": unit, "mode": mode, "query": query,
+                    "scale_factor": target, "model": model,
+                    "predicted": float(predictions[model][i]), "ci_low": low, "ci_high": high,
+                    "model_spread": float(spread),
+                })
+        largest = max(per_sf)
+        boots[(mode, query)] = (preferred, boot_predictions,
+                                (largest, float(np.mean(per_sf[largest]))))
+    return fit_rows, prediction_rows, boots
+
+
+def speedup_projection(boots, targets, confidence=0.95, reference="baseline", mode="rpt"):
+    """Baseline / mode runtime speedup at each target from the runtime fits,
+    using the model preferred for the baseline of each query."""
+    rows = []
+    queries = sorted({q for m, q in boots if m == reference} & {q for m, q in boots if m == mode})
+    for query in queries:
+        ref_model, ref_boot, (ref_sf, ref_measured) = boots[(reference, query)]
+        _, mode_boot, (mode_sf, mode_measured) = boots[(mode, query)]
+        measured = ref_measured / mode_measured if ref_sf == mode_sf else float("nan")
+        ratio = ref_boot[ref_model] / mode_boot[ref_model]
+        for i, target in enumerate(targets):
+            low, high = quantiles(ratio[:, i], confidence)
+            if np.isnan(measured) or low <= measured <= high:
+                trend = "flat"
+            else:
+                trend = "grows" if low > measured else "shrinks"
+            rows.append({
+                "query": query, "scale_factor": target, "model": ref_model,
+                "measured": measured, "speedup": float(np.nanmedian(ratio[:, i])),
+                "ci_low": low, "ci_high": high, "trend": trend,
+            })
+    return rows
+
+
+def load_samples(args, metric):
+    prefix, column, kind, scale, _ = METRICS[metric]
+    if args.store:
+        from results_store import load_latest
+        samples = load_latest(args.store, kind, column, args.cache)
+    else:
+        samples = load_result_dirs(args.results_dirs, prefix, column,
+                                   args.cache if metric == "runtime" else DEFAULT_CACHE_MODE)
+    return {key: {q: [v * scale for v in values] for q, values in per_query.items()}
+            for key, per_query in samples.items()}
+
+
+def print_report(fit_rows, prediction_rows, speedup_rows, confidence):
+    ci = f"{confidence:.0%} CI"
+    print(f"{'Metric':<8} {'Mode':<9} {'Query':<6} {'Fixed':>10} {'Per SF':>10} "
+          f"{'Exponent':>9} {'R2 lin/pow':>12}")
+    print("-" * 72)
+    by_key = {}
+    for row in fit_rows:
+        by_key.setdefault((row["metric"], row["mode"], row["query"]), {})[row["model"]] = row
+    for (metric, mode, query), fits in by_key.items():
+        lin, pow_ = fits["linear"], fits["power"]
+        print(f"{metric:<8} {mode:<9} {query:<6} {lin['fixed']:>8.1f}{lin['unit']:<2} "
+              f"{lin['per_sf']:>8.2f}{lin['unit']:<2} {pow_['exponent']:>9.2f} "
+              f"{lin['r_squared']:>6.3f}/{pow_['r_squared']:.3f}")
+
+    print(f"\nExtrapolated speedup (baseline / rpt), {ci}:")
+    for row in speedup_rows:
+        print(f"  {row['query']:<6} SF={format_value(row['scale_factor'])!s:<5} "
+              f"{row['speedup']:.3f}x [{row['ci_low']:.3f}, {row['ci_high']:.3f}] "
+              f"measured {row['measured']:.3f}x -> {row['trend']}")
+    trends = [row["trend"] for row in speedup_rows]
+    if trends:
+        print(f"\n  {trends.count('grows')} grow, {trends.count('flat')} flat, "
+              f"{trends.count('shrinks')} shrink (query x target SF)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fit runtime and memory against scale factor and extrapolate."
+    )
+    parser.add_argument("results_dirs", nargs="*",
+                        help="Results directories (sf1, sf5, sf10, ...)")
+    parser.add_argument("--store", default=None,
+                        help="Use the latest run of every scale factor and mode in this store")
+    parser.add_argument("--targets", type=float, nargs="+", default=[30, 100],
+                        help="Scale factors to extrapolate to")
+    parser.add_argument("--metrics", nargs="+", choices=sorted(METRICS), default=sorted(METRICS))
+    parser.add_argument("--reference", default="baseline")
+    parser.add_argument("--cache", choices=CACHE_MODES, default=DEFAULT_CACHE_MODE,
+                        help="Cache mode of the runtime series (see cache_control.py)")
+    parser.add_argument("--mode", default="rpt", help="Mode whose speedup is projected")
+    parser.add_argument("--resamples", type=int, default=2000)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Bootstrap seed (default: 0, for reproducible reports)")
+    parser.add_argument("--out", default=None,
+                        help="Output prefix for <out>_fits.csv, <out>_predictions.csv, "
+                             "<out>_speedup.csv")
+    args = parser.parse_args()
+    if not args.store and not args.results_dirs:
+        parser.error("give results directories or --store")
+
+    fit_rows, prediction_rows, speedup_rows = [], [], []
+    for metric in args.metrics:
+        samples = load_samples(args, metric)
+        fits, predictions, boots = scaling_analysis(
+            samples, args.targets, args.resamples, args.confidence, args.seed, metric)
+        fit_rows += fits
+        prediction_rows += predictions
+        if metric == "runtime":
+            speedup_rows = speedup_projection(boots, args.targets, args.confidence,
+                                              args.reference, args.mode)
+    if not fit_rows:
+        print("Error: need results at two or more scale factors")
+        sys.exit(1)
+    print_report(fit_rows, prediction_rows, speedup_rows, args.confidence)
+
+    if args.out:
+        out = Path(args.out)
+        write_rows(f"{out}_fits.csv", FIT_FIELDS, fit_rows)
+        write_rows(f"{out}_predictions.csv", PREDICTION_FIELDS, prediction_rows)
+        write_rows(f"{out}_speedup.csv", SPEEDUP_FIELDS, speedup_rows)
+        print(f"\nWrote {out}_fits.csv, {out}_predictions.csv and {out}_speedup.csv")
+
+
+if __name__ == "__main__":
+    main()
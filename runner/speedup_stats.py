@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Speedup statistics for SSB timings, vectorized with NumPy.
+
+Every (scale factor, mode, query) group is compared against the reference
+mode (baseline) of the same scale factor and query. All groups go through
+one batched pass:
+
+  - speedup: statistic(reference) / statistic(mode), the statistic being the
+    mean (as in analyze_results.py) or the median
+  - percentile bootstrap CI of the speedup, with the reps of each side
+    resampled independently
+  - geometric-mean speedup per (scale factor, mode) over the queries, with a
+    CI from the same bootstrap resamples
+  - two-sided Mann-Whitney U test; exact p-value when a group has no ties,
+    normal approximation with tie and continuity correction otherwise
+  - effect sizes: Cliff's delta (with its negligible/small/medium/large
+    magnitude) and Hedges' g
+
+A query only counts as faster or slower when p < alpha and the CI of its
+speedup excludes 1; everything else is "n.s." (not significant). With
+--correction holm the p-values are Holm-adjusted per scale factor and mode.
+With 5 reps per side the smallest possible two-sided p-value is 2/252 ~ 0.008.
+
+Usage:
+    python3 speedup_stats.py ../results/sf5 ../results/sf10 --out ../results/speedup_stats.csv
+    python3 speedup_stats.py --store ../results/warehouse.duckdb
+"""
+
+import argparse
+import csv
+import math
+import re
+import sys
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from cache_control import CACHE_MODES, DEFAULT_CACHE_MODE
+
+STATS_FIELDS = ["scale_factor", "mode", "query", "n_reference", "n_mode",
+                "reference_seconds", "mode_seconds", "speedup", "ci_low", "ci_high",
+                "u_statistic", "p_value", "exact", "cliffs_delta", "effect_size",
+                "hedges_g", "verdict"]
+
+GEOMEAN_FIELDS = ["scale_factor", "mode", "queries", "geomean_speedup", "ci_low",
+                  "ci_high", "faster", "slower", "not_significant", "verdict"]
+
+STATISTICS = ("mean", "median")
+CORRECTIONS = ("none", "holm")
+
+# Romano et al. (2006) thresholds for |Cliff's delta|
+CLIFFS_DELTA_MAGNITUDES = ((0.147, "negligible"), (0.33, "small"), (0.474, "medium"))
+
+# Largest n * m with an exact U distribution; normal approximation beyond
+EXACT_MAX_CELLS = 2500
+
+# Bootstrap resamples drawn per batch, to bound memory on large groups
+BOOTSTRAP_BATCH = 500
+
+
+def pad(groups):
+    """Ragged lists -> (values padded with NaN, counts)."""
+    counts = np.array([len(g) for g in groups])
+    values = np.full((len(groups), max(counts.max(), 1)), np.nan)
+    for i, g in enumerate(groups):
+        values[i, :len(g)] = g
+    return values, counts
+
+
+def reduce_valid(values, statistic):
+    return np.nanmean(values, axis=-1) if statistic == "mean" else np.nanmedian(values, axis=-1)
+
+
+def resample(values, counts, resamples, rng):
+    """(groups, resamples, width) bootstrap samples, NaN past each group's count."""
+    width = values.shape[1]
+    idx = (rng.random((len(values), resamples, width)) * counts[:, None, None]).astype(int)
+    drawn = np.take_along_axis(values[:, None, :], idx, axis=2)
+    return np.where(np.arange(width) < counts[:, None, None], drawn, np.nan)
+
+
+def bootstrap_speedups(ref, ref_n, mode, mode_n, statistic, resamples, rng):
+    """(groups, resamples) bootstrap replicates of the speedup."""
+    batches = []
+    for start in range(0, resamples, BOOTSTRAP_BATCH):
+        size = min(BOOTSTRAP_BATCH, resamples - start)
+        ref_stat = reduce_valid(resample(ref, ref_n, size, rng), statistic)
+        mode_stat = reduce_valid(resample(mode, mode_n, size, rng), statistic)
+        batches.append(ref_stat / mode_stat)
+    return np.concatenate(batches, axis=1)
+
+
+@lru_cache(maxsize=None)
+def exact_u_cdf(n, m):
+    """P(U <= u) for u = 0..n*m under H0 without ties (counting recurrence)."""
+    # prev[j] holds the counts of each U for samples of size i - 1 and j
+    prev = [np.ones(1) for _ in range(m + 1)]
+    for i in range(1, n + 1):
+        cur = [np.ones(1)]
+        for j in range(1, m + 1):
+            # the largest value is from the first sample (adds j) or the second
+            a = np.concatenate([np.zeros(j), prev[j]])
+            b = cur[j - 1]
+            size = max(len(a), len(b))
+            cur.append(np.pad(a, (0, size - len(a))) + np.pad(b, (0, size - len(b))))
+        prev = cur
+    counts = prev[m]
+    return np.cumsum(counts) / counts.sum()
+
+
+def mann_whitney(ref, ref_n, mode, mode_n):
+    """U of reference > mode, two-sided p-values and whether they are exact."""
+    # NaN padding compares False, so it never counts
+    greater = (ref[:, :, None] > mode[:, None, :]).sum(axis=(1, 2))
+    equal = (ref[:, :, None] == mode[:, None, :]).sum(axis=(1, 2))
+    u = greater + 0.5 * equal
+
+    combined = np.concatenate([ref, mode], axis=1)
+    valid = ~np.isnan(combined)
+    multiplicity = (combined[:, :, None] == combined[:, None, :]).sum(axis=2)
+    tie_term = np.where(valid, multiplicity ** 2 - 1, 0).sum(axis=1)  # sum(t^3 - t)
+
+    cells = ref_n * mode_n
+    total = ref_n + mode_n
+    mu = cells / 2
+    sigma = np.sqrt(cells / 12 * ((total + 1) - tie_term / np.maximum(total * (total - 1), 1)))
+    z = np.where(sigma > 0, (np.abs(u - mu) - 0.5).clip(min=0) / np.where(sigma > 0, sigma, 1), 0)
+    p = np.array([math.erfc(v / math.sqrt(2)) for v in z])
+
+    exact = (tie_term == 0) & (cells <= EXACT_MAX_CELLS) & (cells > 0)
+    for i in np.flatnonzero(exact):
+        cdf = exact_u_cdf(int(ref_n[i]), int(mode_n[i]))
+        k = int(u[i])
+        lower = cdf[k]
+        upper = 1 - cdf[k - 1] if k > 0 else 1.0
+        p[i] = min(1.0, 2 * min(lower, upper))
+    return u, np.where(cells > 0, p, 1.0), exact
+
+
+def cliffs_delta_magnitude(delta):
+    for limit, label in CLIFFS_DELTA_MAGNITUDES:
+        if abs(delta) < limit:
+            return label
+    return "large"
+
+
+def hedges_g(ref, ref_n, mode, mode_n):
+    """Standardized mean difference (reference - mode), small-sample corrected."""
+    dof = ref_n + mode_n - 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pooled = np.sqrt(((ref_n - 1) * np.nanvar(ref, axis=1, ddof=1)
+                          + (mode_n - 1) * np.nanvar(mode, axis=1, ddof=1)) / dof)
+        d = (np.nanmean(ref, axis=1) - np.nanmean(mode, axis=1)) / pooled
+        g = d * (1 - 3 / (4 * dof - 1))
+    return np.where(np.isfinite(g), g, 0.0)
+
+
+def holm(p_values):
+    """Holm-Bonferroni adjusted p-values of one family."""
+    order = np.argsort(p_values)
+    m = len(p_values)
+    adjusted = np.maximum.accumulate((m - np.arange(m)) * p_values[order]).clip(max=1)
+    out = np.empty(m)
+    out[order] = adjusted
+    return out
+
+
+def sort_key(scale_factor, mode):
+    """Numeric scale factors in order, named ones after them."""
+    if isinstance(scale_factor, (int, float)):
+        return (0, scale_factor, "", mode)
+    return (1, 0, str(scale_factor), mode)
+
+
+def verdict(speedup_low, speedup_high, p_value, alpha):
+    if p_value < alpha and speedup_low > 1:
+        return "faster"
+    if p_value < alpha and speedup_high < 1:
+        return "slower"
+    return "n.s."
+
+
+def compare(samples, reference="baseline", statistic="mean", resamples=2000,
+            confidence=0.95, alpha=0.05, correction="none", seed=None):
+    """Compare every mode against the reference mode in one batched pass.
+
+    samples: {(scale_factor, mode): {query: [seconds]}}
+    Returns (per-query rows, per-(scale factor, mode) geometric-mean rows),
+    both lists of dicts with the STATS_FIELDS / GEOMEAN_FIELDS keys.
+    """
+    if statistic not in STATISTICS:
+        raise ValueError(f"Unknown statistic: {statistic}")
+    if correction not in CORRECTIONS:
+        raise ValueError(f"Unknown correction: {correction}")
+
+    keys = []
+    for (sf, mode), per_query in sorted(samples.items(), key=lambda kv: sort_key(*kv[0])):
+        if mode == reference or (sf, reference) not in samples:
+            continue
+        ref_times = samples[(sf, reference)]
+        for query in sorted(per_query):
+            if per_query[query] and ref_times.get(query):
+                keys.append((sf, mode, query))
+    if not keys:
+        return [], []
+
+    ref, ref_n = pad([samples[(sf, reference)][q] for sf, _, q in keys])
+    mode, mode_n = pad([samples[(sf, m)][q] for sf, m, q in keys])
+    rng = np.random.default_rng(seed)
+
+    ref_stat = reduce_valid(ref, statistic)
+    mode_stat = reduce_valid(mode, statistic)
+    speedup = ref_stat / mode_stat
+    boot = bootstrap_speedups(ref, ref_n, mode, mode_n, statistic, resamples, rng)
+    tail = (1 - confidence) / 2
+    ci_low, ci_high = np.quantile(boot, [tail, 1 - tail], axis=1)
+
+    u, p_value, exact = mann_whitney(ref, ref_n, mode, mode_n)
+    delta = 2 * u / (ref_n * mode_n) - 1
+    g = hedges_g(ref, ref_n, mode, mode_n)
+
+    # one family per (scale factor, mode) for the correction and the geomean
+    families = defaultdict(list)
+    for i, (sf, m, _) in enumerate(keys):
+        families[(sf, m)].append(i)
+    if correction == "holm":
+        for members in families.values():
+            p_value[members] = holm(p_value[members])
+
+    rows = []
+    for i, (sf, m, query) in enumerate(keys):
+        rows.append({
+            "scale_factor": sf,
+            "mode": m,
+            "query": query,
+            "n_reference": int(ref_n[i]),
+            "n_mode": int(mode_n[i]),
+            "reference_seconds": float(ref_stat[i]),
+            "mode_seconds": float(mode_stat[i]),
+            "speedup": float(speedup[i]),
+            "ci_low": float(ci_low[i]),
+            "ci_high": float(ci_high[i]),
+            "u_statistic": float(u[i]),
+            "p_value": float(p_value[i]),
+            "exact": bool(exact[i]),
+            "cliffs_delta": float(delta[i]),
+            "effect_size": cliffs_delta_magnitude(delta[i]),
+            "hedges_g": float(g[i]),
+            "verdict": verdict(ci_low[i], ci_high[i], p_value[i], alpha),
+        })
+
+    # geometric mean over queries of each family, from the same resamples
+    family_keys = list(families)
+    membership = np.zeros((len(family_keys), len(keys)))
+    for f, key in enumerate(family_keys):
+        membership[f, families[key]] = 1 / len(families[key])
+    geo_point = np.exp(membership @ np.log(speedup))
+    geo_boot = np.exp(membership @ np.log(boot))
+    geo_low, geo_high = np.quantile(geo_boot, [tail, 1 - tail], axis=1)
+
+    geomeans = []
+    for f, (sf, m) in enumerate(family_keys):
+        verdicts = [rows[i]["verdict"] for i in families[(sf, m)]]
+        if geo_low[f] > 1:
+            overall = "faster"
+        elif geo_high[f] < 1:
+            overall = "slower"
+        else:
+            overall = "n.s."
+        geomeans.append({
+            "scale_factor": sf,
+            "mode": m,
+            "queries": len(verdicts),
+            "geomean_speedup": float(geo_point[f]),
+            "ci_low": float(geo_low[f]),
+            "ci_high": float(geo_high[f]),
+            "faster": verdicts.count("faster"),
+            "slower": verdicts.count("slower"),
+            "not_significant": verdicts.count("n.s."),
+            "verdict": overall,
+        })
+    return rows, geomeans
+
+
+def scale_factor_of(path):
+    """Scale factor from a results directory name like sf10 (else the name)."""
+    match = re.fullmatch(r"sf(\d+(?:\.\d+)?)", Path(path).name)
+    return float(match.group(1)) if match else Path(path).name
+
+
+def split_cache_suffix(mode):
+    """ssb_<mode>_<cache>.csv holds a non-default cache mode (see cache_control.py)."""
+    for cache in CACHE_MODES:
+        if cache != DEFAULT_CACHE_MODE and mode.endswith(f"_{cache}"):
+            return mode[:-len(cache) - 1], cache
+    return mode, DEFAULT_CACHE_MODE
+
+
+def load_result_dirs(dirs, prefix="ssb", column="time_seconds", cache=DEFAULT_CACHE_MODE):
+    """{(scale_factor, mode): {query: [values]}} from <prefix>_<mode>.csv files
+    (ssb_<mode>.csv timings by default), skipping failed repetitions."""
+    samples = {}
+    for results_dir in dirs:
+        sf = scale_factor_of(results_dir)
+        for csv_path in sorted(Path(results_dir).glob(f"{prefix}_*.csv")):
+            mode = csv_path.stem[len(prefix) + 1:]
+            if mode.endswith("_operators"):
+                continue
+            mode, file_cache = split_cache_suffix(mode)
+            if file_cache != cache:
+                continue
+            values = defaultdict(list)
+            with open(csv_path) as f:
+                for row in csv.DictReader(f):
+                    if row.get("status", "success") == "success" and row.get(column):
+                        values[row["query"]].append(float(row[column]))
+            samples[(sf, mode)] = values
+    return samples
+
+
+def format_value(value):
+    return f"{value:.6g}" if isinstance(value, float) else value
+
+
+def write_rows(path, fields, rows):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: format_value(v) for k, v in row.items()})
+
+
+def print_report(rows, geomeans, confidence):
+    ci_label = f"{confidence:.0%} CI"
+    print(f"{'SF':<6} {'Mode':<10} {'Query':<8} {'Speedup':>8} {ci_label:>17} "
+          f"{'p':>8} {'Cliff d':>8} {'Verdict':>8}")
+    print("-" * 80)
+    for r in rows:
+        ci = f"[{r['ci_low']:.3f}, {r['ci_high']:.3f}]"
+        print(f"{format_value(r['scale_factor'])!s:<6} {r['mode']:<10} {r['query']:<8} "
+              f"{r['speedup']:>7.3f}x {ci:>17} {r['p_value']:>8.4f} "
+              f"{r['cliffs_delta']:>+8.2f} {r['verdict']:>8}")
+    print()
+    for gm in geomeans:
+        print(f"SF={format_value(gm['scale_factor'])} {gm['mode']}: geomean speedup "
+              f"{gm['geomean_speedup']:.3f}x [{gm['ci_low']:.3f}, {gm['ci_high']:.3f}] "
+              f"({gm['faster']} faster, {gm['slower']} slower, "
+              f"{gm['not_significant']} n.s. of {gm['queries']})")
+
+
+def add_stats_arguments(parser):
+    """Options shared with analyze_results.py."""
+    parser.add_argument("--statistic", choices=STATISTICS, default="mean",
+                        help="Per-side statistic the speedup is a ratio of")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="Significance level of the Mann-Whitney test")
+    parser.add_argument("--confidence", type=float, default=0.95,
+                        help="Bootstrap confidence level")
+    parser.add_argument("--resamples", type=int, default=2000,
+                        help="Bootstrap resamples")
+    parser.add_argument("--correction", choices=CORRECTIONS, default="none",
+                        help="Multiple-comparison correction per scale factor and mode")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Bootstrap seed (default: 0, for reproducible reports)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Speedup CIs, significance and effect sizes for every scale factor and mode."
+    )
+    parser.add_argument("results_dirs", nargs="*",
+                        help="Results directories (sf5, sf10, ...) with ssb_<mode>.csv files")
+    parser.add_argument("--store", default=None,
+                        help="Use the latest run of every scale factor and mode in this store")
+    parser.add_argument("--reference", default="baseline",
+                        help="Mode the others are compared against")
+    parser.add_argument("--cache", choices=CACHE_MODES, default=DEFAULT_CACHE_MODE,
+                        help="Cache mode of the runs to compare (see cache_control.py)")
+    add_stats_arguments(parser)
+    parser.add_argument("--out", default=None, help="Per-query statistics CSV")
+    parser.add_argument("--geomean-out", default=None,
+                        help="Geometric-mean CSV (default: <out>_geomean.csv)")
+    args = parser.parse_args()
+
+    if args.store:
+        from results_store import load_latest_times
+        samples = load_latest_times(args.store, args.cache)
+    elif args.results_dirs:
+        samples = load_result_dirs(args.results_dirs, cache=args.cache)
+    else:
+        parser.error("give results directories or --store")
+
+    rows, geomeans = compare(samples, args.reference, args.statistic, args.resamples,
+                             args.confidence, args.alpha, args.correction, args.seed)
+    if not rows:
+        print(f"Error: no query has timings for both {args.reference} and another mode")
+        sys.exit(1)
+    print_report(rows, geomeans, args.confidence)
+
+    if args.out:
+        out_path = Path(args.out)
+        write_rows(out_path, STATS_FIELDS, rows)
+        geomean_path = Path(args.geomean_out or out_path.with_name(f"{out_path.stem}_geomean.csv"))
+        write_rows(geomean_path, GEOMEAN_FIELDS, geomeans)
+        print(f"\nWrote {out_path} and {geomean_path}")
+
+
+if __name__ == "__main__":
+    main()
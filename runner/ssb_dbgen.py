@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Deterministic SSB data generator that never writes .tbl text.
+
+Rows are produced by SQL inside the duckdb CLI itself: every random column is
+a hash of (seed, table, row key, column), so the output depends only on --seed and
+the scale factor and not on how work is split across threads or chunks. The
+schema is the one in sql/load_ssb.sql and the value domains follow ssb-dbgen
+(see ssb_domains.py): uniform nations/cities, 5 manufacturers x 5 categories
+x 40 brands, 1-7 lines per order, orders dated 1992-01-01 to 1998-08-02.
+Order keys are dense (dbgen leaves gaps) and the row counts are
+
+    customer  30,000 x SF           supplier  2,000 x SF
+    part      200,000 x (1 + log2 SF)   date  2,557 (1992-1998)
+    lineorder ~6,000,000 x SF (1,500,000 x SF orders)
+
+Data variants (the defaults give the standard, uniform data):
+  --zipf S / --skew COLUMN=S
+             draw lo_custkey, lo_partkey, lo_suppkey and lo_orderdate from
+             a Zipf distribution of exponent S instead of uniformly (P of
+             the k-th most frequent key ~ 1/k^S); hot keys are spread over
+             the key range by a fixed permutation, hot dates are the most
+             recent ones. --skew sets one column, e.g. --skew suppkey=1.2
+  --correlation C
+             with probability C a line's supplier is in its customer's
+             nation (suppliers are then assigned to nations round-robin,
+             so each nation's suppliers can be drawn from directly)
+  --fact-scale F
+             F times as many orders for the same dimensions, to vary the
+             fact-to-dimension size ratio
+Every variant uses the same schema, so load_ssb.py loads it into ssb like
+standard data; give each variant its own --out directory.
+
+Output formats:
+  - parquet: <out>/<table>.parquet for the dimensions and <out>/lineorder/
+             chunk-NNNN.parquet, one chunk per core generated by concurrent
+             CLI processes; load_ssb.py loads such a directory directly
+  - duckdb:  insert straight into a database file; DuckDB parallelizes each
+             INSERT ... SELECT over all cores itself
+
+Usage:
+    python3 ssb_dbgen.py --sf 10 --duckdb-bin <bin> --format parquet --out ../ssb-data/sf10
+    python3 ssb_dbgen.py --sf 10 --duckdb-bin <bin> --format duckdb --out ../duckdb-rpt/ssb_sf10.db
+    python3 ssb_dbgen.py --sf 10 --duckdb-bin <bin> --zipf 1.0 --correlation 0.8 \
+        --out ../ssb-data/sf10-zipf1-corr0.8
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import ssb_domains as dom
+from load_ssb import TABLES, run_script, table_schemas
+
+FORMATS = ("parquet", "duckdb")
+
+# lineorder columns a Zipf skew applies to
+SKEW_COLUMNS = ("custkey", "partkey", "suppkey", "orderdate")
+
+# Hot ranks are spread over the keys by rank * PERMUTE_PRIME + offset mod n,
+# a bijection for every n the prime does not divide
+PERMUTE_PRIME = 2147483647
+
+SEGMENTS = ["AUTOMOBILE", "BUILDING", "FURNITURE", "HOUSEHOLD", "MACHINERY"]
+PRIORITIES = ["1-URGENT", "2-HIGH", "3-MEDIUM", "4-NOT SPECI", "5-LOW"]
+SHIP_MODES = ["AIR", "FOB", "MAIL", "RAIL", "REG AIR", "SHIP", "TRUCK"]
+TYPE_SYLLABLES = (
+    ["ECONOMY", "LARGE", "MEDIUM", "PROMO", "SMALL", "STANDARD"],
+    ["ANODIZED", "BRUSHED", "BURNISHED", "PLATED", "POLISHED"],
+    ["BRASS", "COPPER", "NICKEL", "STEEL", "TIN"],
+)
+CONTAINER_SYLLABLES = (
+    ["JUMBO", "LG", "MED", "SM", "WRAP"],
+    ["BAG", "BOX", "CAN", "CASE", "DRUM", "JAR", "PACK", "PKG"],
+)
+COLORS = [
+    "almond", "antique", "aquamarine", "azure", "beige", "bisque", "black",
+    "blanched", "blue", "blush", "brown", "burlywood", "burnished", "chartreuse",
+    "chiffon", "chocolate", "coral", "cornflower", "cornsilk", "cream", "cyan",
+    "dark", "deep", "dim", "dodger", "drab", "firebrick", "floral", "forest",
+    "frosted", "gainsboro", "ghost", "goldenrod", "green", "grey", "honeydew",
+    "hot", "indian", "ivory", "khaki", "lace", "lavender", "lawn", "lemon",
+    "light", "lime", "linen", "magenta", "maroon", "medium", "metallic",
+    "midnight", "mint", "misty", "moccasin", "navajo", "navy", "olive", "orange",
+    "orchid", "pale", "papaya", "peach", "peru", "pink", "plum", "powder", "puff",
+    "purple", "red", "rose", "rosy", "royal", "saddle", "salmon", "sandy",
+    "seashell", "sienna", "sky", "slate", "smoke", "snow", "spring", "steel",
+    "tan", "thistle", "tomato", "turquoise", "violet", "wheat", "white", "yellow",
+]
+# (month, day) of the holidays flagged in D_HOLIDAYFL
+HOLIDAYS = [(1, 1), (2, 14), (5, 30), (7, 4), (9, 5), (11, 11), (11, 24), (12, 25)]
+
+START_DATE = "1992-01-01"
+END_DATE = "1998-12-31"
+# dbgen leaves 151 days after the last order date for shipping
+ORDER_DAYS = 2557 - 151
+MAX_LINES = 7
+
+
+def row_counts(sf, fact_scale=1.0):
+    """Rows (orders for lineorder) per table at a scale factor."""
+    parts = 200000 * (1 + math.floor(math.log2(sf))) if sf >= 1 else 200000 * sf
+    return {
+        "customer": max(int(30000 * sf), 1),
+        "supplier": max(int(2000 * sf), 1),
+        "part": max(int(parts), 1),
+        "orders": max(int(1500000 * sf * fact_scale), 1),
+    }
+
+
+def sql_list(values):
+    return "[" + ", ".join("'" + v.replace("'", "''") + "'" for v in values) + "]"
+
+
+class Generator:
+    """SELECT statements producing each table for one seed and scale factor.
+
+    skew maps SKEW_COLUMNS to Zipf exponents; correlation and fact_scale
+    select the data variant (see the module docstring).
+    """
+
+    def __init__(self, sf, seed, skew=None, correlation=0.0, fact_scale=1.0):
+        self.sf = sf
+        self.seed = seed
+        self.skew = {column: s for column, s in (skew or {}).items() if s}
+        self.correlation = correlation
+        self.fact_scale = fact_scale
+        self.counts = row_counts(sf, fact_scale)
+
+    def variant(self):
+        return {"skew": self.skew, "correlation": self.correlation,
+                "fact_scale": self.fact_scale}
+
+    def describe(self):
+        if not self.skew and not self.correlation and self.fact_scale == 1:
+            return "standard"
+        parts = [f"zipf {column}={s:g}" for column, s in self.skew.items()]
+        if self.correlation:
+            parts.append(f"correlation {self.correlation:g}")
+        if self.fact_scale != 1:
+            parts.append(f"fact scale {self.fact_scale:g}")
+        return ", ".join(parts)
+
+    def rand(self, table, key, column, n):
+        """Deterministic integer in [0, n) for a table's row key and column.
+
+        The table is part of the hash, so equal keys of different tables
+        (customer k and supplier k) get independent values.
+        """
+        return f"CAST(hash({self.seed}, '{table}', {key}, '{column}') % {n} AS BIGINT)"
+
+    def uniform(self, table, key, column):
+        """Deterministic double in [0, 1) for a table's row key and column."""
+        return (f"(CAST(hash({self.seed}, '{table}', {key}, '{column}') % {1 << 52} AS DOUBLE)"
+                f" / {1 << 52})")
+
+    def zipf(self, key, column, n, s):
+        """Rank in [0, n) with P(rank k) ~ 1 / (k + 1)^s.
+
+        Inverts the CDF of the density x^-s on [1, n + 1), whose integer
+        part follows Zipf approximately; n may be an SQL expression.
+        """
+        u = self.uniform("lineorder", key, column)
+        if s == 1:
+            x = f"pow(({n}) + 1, {u})"
+        else:
+            x = f"pow(1 + {u} * (pow(({n}) + 1, {1 - s}) - 1), {1 / (1 - s)})"
+        return f"LEAST(CAST(floor({x}) AS BIGINT) - 1, ({n}) - 1)"
+
+    def permute(self, rank, n, column):
+        """Spread ranks over [0, n) so the hottest keys are not the smallest."""
+        offset = zlib.crc32(f"{self.seed}-{column}".encode())
+        return f"((({rank}) * {PERMUTE_PRIME} + {offset}) % ({n}))"
+
+    def foreign_key(self, key, column, n, hash_column):
+        """1-based key in [1, n]: uniform (from hash_column), or Zipf when column is skewed."""
+        s = self.skew.get(column)
+        if not s:
+            return f"1 + {self.rand('lineorder', key, hash_column, n)}"
+        return f"1 + {self.permute(self.zipf(key, column, n, s), n, column)}"
+
+    def order_day(self, key):
+        """Day offset of an order; with skew the most recent days are the hottest."""
+        s = self.skew.get("orderdate")
+        if not s:
+            return self.rand("lineorder", key, "date", ORDER_DAYS)
+        return f"{ORDER_DAYS - 1} - {self.zipf(key, 'orderdate', ORDER_DAYS, s)}"
+
+    def correlated_supplier(self, line_key, custkey, uniform_key):
+        """A supplier in the customer's nation with probability correlation.
+
+        Suppliers are assigned to nations round-robin in this variant, so
+        the ones of nation n are n + 1, n + 1 + 25, ...
+        """
+        nations = len(dom.NATIONS)
+        suppliers = self.counts["supplier"]
+        # the customer's nation, drawn like address_columns draws it
+        nation = self.rand("customer", custkey, "nation", nations)
+        count = f"(({suppliers} - {nation} - 1) // {nations} + 1)"
+        s = self.skew.get("suppkey")
+        index = (self.permute(self.zipf(line_key, "suppkey", count, s), count, "suppkey")
+                 if s else self.rand("lineorder", line_key, "supp", count))
+        return (f"CASE WHEN {self.uniform('lineorder', line_key, 'correlation')} "
+                f"< {self.correlation} "
+                f"AND {suppliers} > {nation} "
+                f"THEN {nation} + 1 + {nations} * {index} ELSE {uniform_key} END")
+
+    def pick(self, table, values, key, column):
+        return f"{sql_list(values)}[1 + {self.rand(table, key, column, len(values))}]"
+
+    def text(self, table, key, column, min_len, max_len):
+        """dbgen-style random filler text of min_len..max_len characters."""
+        length = f"{min_len} + {self.rand(table, key, column + '_len', max_len - min_len + 1)}"
+        return (f"substr(md5(concat({self.seed}, '-{table}-', {key}, '{column}')), "
+                f"1, {length})")
+
+    def phone(self, table, key, nation_idx):
+        parts = [self.rand(table, key, "phone1", 900) + " + 100",
+                 self.rand(table, key, "phone2", 900) + " + 100",
+                 self.rand(table, key, "phone3", 9000) + " + 1000"]
+        return (f"concat({nation_idx} + 10, '-', {parts[0]}, '-', "
+                f"{parts[1]}, '-', {parts[2]})")
+
+    def address_columns(self, table, key, nation_idx=None):
+        """City, nation and region of a customer or supplier."""
+        nations = sql_list([n for n, _ in dom.NATIONS])
+        regions = sql_list([r for _, r in dom.NATIONS])
+        if nation_idx is None:
+            nation_idx = self.rand(table, key, "nation", len(dom.NATIONS))
+        city_idx = self.rand(table, key, "city", dom.CITIES_PER_NATION)
+        return nation_idx, {
+            "city": f"rpad(substr({nations}[1 + {nation_idx}], 1, 9), 9, ' ') || {city_idx}",
+            "nation": f"{nations}[1 + {nation_idx}]",
+            "region": f"{regions}[1 + {nation_idx}]",
+        }
+
+    def customer(self):
+        k = "k"
+        nation_idx, addr = self.address_columns("customer", k)
+        return (
+            f"SELECT k AS C_CUSTKEY, 'Customer#' || lpad(k::VARCHAR, 9, '0') AS C_NAME, "
+            f"{self.text('customer', k, 'address', 10, 25)} AS C_ADDRESS, "
+            f"{addr['city']} AS C_CITY, "
+            f"{addr['nation']} AS C_NATION, {addr['region']} AS C_REGION, "
+            f"{self.phone('customer', k, nation_idx)} AS C_PHONE, "
+            f"{self.pick('customer', SEGMENTS, k, 'segment')} AS C_MKTSEGMENT "
+            f"FROM range(1, {self.counts['customer'] + 1}) t(k)"
+        )
+
+    def supplier(self):
+        k = "k"
+        # round-robin nations let lineorder pick a supplier of a given nation
+        nation_idx, addr = self.address_columns(
+            "supplier", k, f"(({k} - 1) % {len(dom.NATIONS)})" if self.correlation else None)
+        return (
+            f"SELECT k AS S_SUPPKEY, 'Supplier#' || lpad(k::VARCHAR, 9, '0') AS S_NAME, "
+            f"{self.text('supplier', k, 'address', 10, 25)} AS S_ADDRESS, "
+            f"{addr['city']} AS S_CITY, "
+            f"{addr['nation']} AS S_NATION, {addr['region']} AS S_REGION, "
+            f"{self.phone('supplier', k, nation_idx)} AS S_PHONE "
+            f"FROM range(1, {self.counts['supplier'] + 1}) t(k)"
+        )
+
+    def part(self):
+        k = "k"
+        mfgr = f"(1 + {self.rand('part', k, 'mfgr', dom.MFGRS)})"
+        category = f"(1 + {self.rand('part', k, 'category', dom.CATEGORIES_PER_MFGR)})"
+        brand = f"(1 + {self.rand('part', k, 'brand', dom.BRANDS_PER_CATEGORY)})"
+        p_type = " || ' ' || ".join(self.pick('part', s, k, f"type{i}")
+                                   for i, s in enumerate(TYPE_SYLLABLES))
+        container = " || ' ' || ".join(self.pick('part', s, k, f"container{i}")
+                                      for i, s in enumerate(CONTAINER_SYLLABLES))
+        return (
+            f"SELECT k AS P_PARTKEY, "
+            f"{self.pick('part', COLORS, k, 'name1')} || ' ' || {self.pick('part', COLORS, k, 'name2')} AS P_NAME, "
+            f"'MFGR#' || {mfgr} AS P_MFGR, "
+            f"'MFGR#' || {mfgr} || {category} AS P_CATEGORY, "
+            f"'MFGR#' || {mfgr} || {category} || {brand} AS P_BRAND, "
+            f"{self.pick('part', COLORS, k, 'color')} AS P_COLOR, {p_type} AS P_TYPE, "
+            f"1 + {self.rand('part', k, 'size', 50)} AS P_SIZE, {container} AS P_CONTAINER "
+            f"FROM range(1, {self.counts['part'] + 1}) t(k)"
+        )
+
+    def date(self):
+        holidays = " OR ".join(f"(month(d) = {m} AND day(d) = {dd})" for m, dd in HOLIDAYS)
+        return (
+            "SELECT year(d) * 10000 + month(d) * 100 + day(d) AS D_DATEKEY, "
+            "strftime(d, '%B %-d, %Y') AS D_DATE, strftime(d, '%A') AS D_DAYOFWEEK, "
+            "strftime(d, '%B') AS D_MONTH, year(d) AS D_YEAR, "
+            "year(d) * 100 + month(d) AS D_YEARMONTHNUM, strftime(d, '%b%Y') AS D_YEARMONTH, "
+            "dayofweek(d) + 1 AS D_DAYNUMINWEEK, day(d) AS D_DAYNUMINMONTH, "
+            "dayofyear(d) AS D_DAYNUMINYEAR, month(d) AS D_MONTHNUMINYEAR, "
+            "(dayofyear(d) - 1) // 7 + 1 AS D_WEEKNUMINYEAR, "
+            "CASE WHEN month(d) = 12 THEN 'Christmas' WHEN month(d) <= 2 THEN 'Winter' "
+            "WHEN month(d) <= 4 THEN 'Spring' WHEN month(d) <= 8 THEN 'Summer' "
+            "ELSE 'Fall' END AS D_SELLINGSEASON, "
+            "(dayofweek(d) = 6)::INTEGER AS D_LASTDAYINWEEKFL, "
+            "(d = last_day(d))::INTEGER AS D_LASTDAYINMONTHFL, "
+            f"({holidays})::INTEGER AS D_HOLIDAYFL, "
+            "(dayofweek(d) BETWEEN 1 AND 5)::INTEGER AS D_WEEKDAYFL "
+            f"FROM (SELECT CAST(r AS DATE) AS d FROM range(DATE '{START_DATE}', "
+            f"DATE '{END_DATE}' + INTERVAL 1 DAY, INTERVAL 1 DAY) t(r))"
+        )
+
+    def lineorder(self, first_order, last_order):
+        """Lines of orders first_order..last_order-1 (0-based)."""
+        o, ln = "o", "ln"
+        order_date = f"DATE '{START_DATE}' + CAST({self.order_day(o)} AS INTEGER)"
+        line_key = f"{o}, {ln}"
+        suppkey = self.foreign_key(line_key, "suppkey", self.counts["supplier"], "supp")
+        if self.correlation:
+            suppkey = self.correlated_supplier(line_key, "custkey", suppkey)
+        price = "(90000 + ((partkey // 10) % 20001) + 100 * (partkey % 1000))"
+        return (
+            "WITH orders AS ("
+            f"  SELECT {o}, 1 + {self.rand('lineorder', o, 'lines', MAX_LINES)} AS nlines, "
+            f"  {self.foreign_key(o, 'custkey', self.counts['customer'], 'cust')} AS custkey, "
+            f"  {order_date} AS orderdate, "
+            f"  {self.pick('lineorder', PRIORITIES, o, 'priority')} AS priority "
+            f"  FROM range({first_order}, {last_order}) t({o})"
+            "), lines AS ("
+            f"  SELECT orders.*, {ln}, "
+            f"  {self.foreign_key(line_key, 'partkey', self.counts['part'], 'part')} AS partkey, "
+            f"  {suppkey} AS suppkey, "
+            f"  1 + {self.rand('lineorder', line_key, 'quantity', 50)} AS quantity, "
+            f"  {self.rand('lineorder', line_key, 'discount', 11)} AS discount, "
+            f"  {self.rand('lineorder', line_key, 'tax', 9)} AS tax, "
+            f"  orderdate + CAST(30 + {self.rand('lineorder', line_key, 'commit', 61)} AS INTEGER) AS commitdate, "
+            f"  {self.pick('lineorder', SHIP_MODES, line_key, 'shipmode')} AS shipmode "
+            f"  FROM orders, range(1, {MAX_LINES + 1}) l({ln}) WHERE {ln} <= nlines"
+            "), priced AS ("
+            f"  SELECT *, quantity * {price} AS extendedprice, 6 * {price} // 10 AS supplycost "
+            "  FROM lines"
+            ")"
+            f"SELECT CAST({o} + 1 AS INTEGER) AS LO_ORDERKEY, CAST({ln} AS INTEGER) AS LO_LINENUMBER, "
+            "CAST(custkey AS INTEGER) AS LO_CUSTKEY, CAST(partkey AS INTEGER) AS LO_PARTKEY, "
+            "CAST(suppkey AS INTEGER) AS LO_SUPPKEY, "
+            "year(orderdate) * 10000 + month(orderdate) * 100 + day(orderdate) AS LO_ORDERDATE, "
+            "priority AS LO_ORDERPRIORITY, 0 AS LO_SHIPPRIORITY, "
+            "CAST(quantity AS INTEGER) AS LO_QUANTITY, "
+            "CAST(extendedprice AS INTEGER) AS LO_EXTENDEDPRICE, "
+            "CAST(sum(extendedprice * (100 - discount) * (100 + tax) // 10000) "
+            f"OVER (PARTITION BY {o}) AS INTEGER) AS LO_ORDTOTALPRICE, "
+            "CAST(discount AS INTEGER) AS LO_DISCOUNT, "
+            "CAST(extendedprice * (100 - discount) // 100 AS INTEGER) AS LO_REVENUE, "
+            "CAST(supplycost AS INTEGER) AS LO_SUPPLYCOST, CAST(tax AS INTEGER) AS LO_TAX, "
+            "year(commitdate) * 10000 + month(commitdate) * 100 + day(commitdate) AS LO_COMMITDATE, "
+            "shipmode AS LO_SHIPMODE "
+            f"FROM priced ORDER BY {o}, {ln}"
+        )
+
+    def table_sql(self, table):
+        if table == "lineorder":
+            return self.lineorder(0, self.counts["orders"])
+        return getattr(self, table)()
+
+
+def chunk_ranges(total, chunks):
+    """Split 0..total into contiguous [start, end) ranges."""
+    chunks = max(1, min(chunks, total))
+    step = math.ceil(total / chunks)
+    return [(start, min(start + step, total)) for start in range(0, total, step)]
+
+
+def count_rows(lines):
+    return int(lines[-1]) if lines and lines[-1].strip().isdigit() else None
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    rows = fn(*args)
+    return rows, time.perf_counter() - start
+
+
+def write_parquet(bin_path, select_sql, path, threads):
+    """Run one generator SELECT in a throw-away in-memory CLI into Parquet."""
+    script = (
+        f"SET threads = {threads};\n"
+        f"COPY ({select_sql}) TO '{path}' (FORMAT parquet);\n"
+        ".mode csv\n.headers off\n"
+        f"SELECT count(*) FROM read_parquet('{path}');\n"
+    )
+    return count_rows(run_script(bin_path, ":memory:", script))
+
+
+def generate_parquet(bin_path, gen, out_dir, chunks):
+    """Dimensions and lineorder chunks as concurrent CLI processes."""
+    out_dir = Path(out_dir)
+    lineorder_dir = out_dir / "lineorder"
+    shutil.rmtree(lineorder_dir, ignore_errors=True)
+    lineorder_dir.mkdir(parents=True)
+    ranges = chunk_ranges(gen.counts["orders"], chunks)
+    threads = max(1, (os.cpu_count() or 1) // len(ranges))
+    with ThreadPoolExecutor(max_workers=chunks) as pool:
+        futures = {}
+        for table in TABLES:
+            if table != "lineorder":
+                futures[table] = [pool.submit(timed, write_parquet, bin_path, gen.table_sql(table),
+                                              (out_dir / f"{table}.parquet").resolve(), threads)]
+        futures["lineorder"] = [
+            pool.submit(timed, write_parquet, bin_path, gen.lineorder(start, end),
+                        (lineorder_dir / f"chunk-{i:04d}.parquet").resolve(), threads)
+            for i, (start, end) in enumerate(ranges)
+        ]
+        return {table: [f.result() for f in futures[table]] for table in TABLES}
+
+
+def generate_duckdb(bin_path, gen, db_path):
+    """Create the ssb schema and INSERT ... SELECT every table."""
+    schemas = table_schemas()
+    results = {}
+    for table in TABLES:
+        script = (
+            "CREATE SCHEMA IF NOT EXISTS ssb;\n"
+            "SET schema 'ssb';\n"
+            f"{schemas[table]}\n"
+            f"INSERT INTO {table} {gen.table_sql(table)};\n"
+            ".mode csv\n.headers off\n"
+            f"SELECT count(*) FROM {table};\n"
+        )
+        rows, seconds = timed(lambda: count_rows(run_script(bin_path, db_path, script)))
+        results[table] = [(rows, seconds)]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate SSB data deterministically without .tbl files."
+    )
+    parser.add_argument("--sf", type=float, required=True, help="Scale factor")
+    parser.add_argument("--duckdb-bin", required=True,
+                        help="duckdb executable that runs the generator SQL")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--out", required=True,
+                        help="Output directory (parquet) or database file (duckdb)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed; the same seed and SF always give the same data")
+    parser.add_argument("--chunks", type=int, default=os.cpu_count() or 1,
+                        help="Concurrent lineorder chunks for parquet (default: one per core)")
+    parser.add_argument("--zipf", type=float, default=0.0,
+                        help="Zipf exponent of all lineorder foreign keys (0: uniform)")
+    parser.add_argument("--skew", nargs="+", default=[], metavar="COLUMN=S",
+                        help=f"Zipf exponent of single columns ({', '.join(SKEW_COLUMNS)})")
+    parser.add_argument("--correlation", type=float, default=0.0,
+                        help="Probability that a line's supplier is in its customer's nation")
+    parser.add_argument("--fact-scale", type=float, default=1.0,
+                        help="Orders relative to standard SSB at this SF (dimensions unchanged)")
+    args = parser.parse_args()
+
+    skew = {column: args.zipf for column in SKEW_COLUMNS}
+    for item in args.skew:
+        column, _, value = item.partition("=")
+        if column not in SKEW_COLUMNS or not value:
+            parser.error(f"--skew takes COLUMN=S with COLUMN one of {', '.join(SKEW_COLUMNS)}")
+        skew[column] = float(value)
+    if any(value < 0 for value in skew.values()):
+        parser.error("Zipf exponents must be >= 0")
+    if not 0 <= args.correlation <= 1:
+        parser.error("--correlation must be between 0 and 1")
+    if args.fact_scale <= 0:
+        parser.error("--fact-scale must be positive")
+
+    sf = int(args.sf) if args.sf == int(args.sf) else args.sf
+    gen = Generator(sf, args.seed, skew, args.correlation, args.fact_scale)
+    bin_path = str(Path(args.duckdb_bin))
+    print(f"Generating SF={sf} (seed {args.seed}, {gen.describe()}) as {args.format} "
+          f"into {args.out}...")
+    start = time.perf_counter()
+    try:
+        if args.format == "parquet":
+            Path(args.out).mkdir(parents=True, exist_ok=True)
+            results = generate_parquet(bin_path, gen, args.out, args.chunks)
+        else:
+            Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+            if Path(args.out).exists():
+                raise RuntimeError(f"Database already exists: {args.out}")
+            results = generate_duckdb(bin_path, gen, str(Path(args.out)))
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'Table':<12} {'Rows':>12} {'Chunks':>7} {'Seconds':>8} {'Rows/s':>12}")
+    print("-" * 55)
+    summary = {}
+    for table in TABLES:
+        rows = sum(r or 0 for r, _ in results[table])
+        # chunks run concurrently, so the table took as long as its slowest chunk
+        seconds = max(s for _, s in results[table])
+        summary[table] = {"rows": rows, "chunks": len(results[table]),
+                          "seconds": round(seconds, 3)}
+        print(f"{table:<12} {rows:>12} {len(results[table]):>7} {seconds:>8.2f} "
+              f"{round(rows / seconds) if seconds > 0 else 0:>12}")
+    print(f"Generated in {elapsed:.1f}s")
+
+    if args.format == "parquet":
+        metadata = {"sf": sf, "seed": args.seed, "variant": gen.variant(), "tables": summary,
+                    "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        (Path(args.out) / "generator.json").write_text(json.dumps(metadata, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Value domains of the SSB dimension attributes as produced by ssb-dbgen.
+
+dbgen draws these attributes uniformly, so the selectivity of a predicate on
+a dimension table is the fraction of the domain it selects.
+"""
+
+REGIONS = ["AFRICA", "AMERICA", "ASIA", "EUROPE", "MIDDLE EAST"]
+
+# (nation, region) in dbgen's nation order
+NATIONS = [
+    ("ALGERIA", "AFRICA"),
+    ("ARGENTINA", "AMERICA"),
+    ("BRAZIL", "AMERICA"),
+    ("CANADA", "AMERICA"),
+    ("EGYPT", "MIDDLE EAST"),
+    ("ETHIOPIA", "AFRICA"),
+    ("FRANCE", "EUROPE"),
+    ("GERMANY", "EUROPE"),
+    ("INDIA", "ASIA"),
+    ("INDONESIA", "ASIA"),
+    ("IRAN", "MIDDLE EAST"),
+    ("IRAQ", "MIDDLE EAST"),
+    ("JAPAN", "ASIA"),
+    ("JORDAN", "MIDDLE EAST"),
+    ("KENYA", "AFRICA"),
+    ("MOROCCO", "AFRICA"),
+    ("MOZAMBIQUE", "AFRICA"),
+    ("PERU", "AMERICA"),
+    ("CHINA", "ASIA"),
+    ("ROMANIA", "EUROPE"),
+    ("SAUDI ARABIA", "MIDDLE EAST"),
+    ("VIETNAM", "ASIA"),
+    ("RUSSIA", "EUROPE"),
+    ("UNITED KINGDOM", "EUROPE"),
+    ("UNITED STATES", "AMERICA"),
+]
+
+CITIES_PER_NATION = 10
+
+YEARS = list(range(1992, 1999))
+
+MFGRS = 5
+CATEGORIES_PER_MFGR = 5
+BRANDS_PER_CATEGORY = 40
+
+
+def nations_in(region):
+    return [nation for nation, r in NATIONS if r == region]
+
+
+def city_name(nation, index):
+    """dbgen city: nation name cut/padded to 9 characters plus a digit."""
+    return f"{nation[:9]:<9}{index}"
+
+
+def cities(nation=None):
+    nations = [nation] if nation else [n for n, _ in NATIONS]
+    return [city_name(n, i) for n in nations for i in range(CITIES_PER_NATION)]
+
+
+def categories():
+    return [f"MFGR#{m}{c}" for m in range(1, MFGRS + 1)
+            for c in range(1, CATEGORIES_PER_MFGR + 1)]
+
+
+def brands(category=None):
+    cats = [category] if category else categories()
+    return [f"{cat}{b}" for cat in cats for b in range(1, BRANDS_PER_CATEGORY + 1)]
+
+
+def days_in_year(year):
+    return 366 if year % 4 == 0 else 365
+
+
+def year_fraction(first, last):
+    """Fraction of the date dimension covered by years first..last."""
+    total = sum(days_in_year(y) for y in YEARS)
+    return sum(days_in_year(y) for y in range(first, last + 1)) / total
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Thread-scaling sweep for baseline and RPT.
+
+Every query runs at each DuckDB `threads` setting (1, 2, 4, ... up to the
+cores this process may use, plus the core count itself), with the setting
+applied by `SET threads` in a persistent session per mode. Baseline and RPT
+are interleaved in random order every repetition. Per query, mode and thread
+count the summary has the median runtime, the speedup over the smallest thread
+count swept (one by default) and the parallel efficiency (speedup / the
+thread count's ratio to it).
+
+With --profile the hash join and predicate transfer (CREATE_BF/USE_BF)
+operator times are captured as well. DuckDB sums operator time over all
+threads, so for perfectly parallel work they stay flat as threads grow; the
+work ratio against one thread (> 1 means parallel overhead) shows whether
+filter construction parallelizes as well as the hash join pipelines.
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from statistics import median
+
+from ab_scheduler import MODES
+from duckdb_session import PersistentSession
+from profiles import summarize_profile
+from run_experiments import QUERIES, format_seconds
+
+SWEEP_FIELDS = ["threads", "query", "mode", "rep", "time_seconds", "engine_seconds",
+                "hash_join_seconds", "transfer_seconds"]
+SUMMARY_FIELDS = ["query", "mode", "threads", "median_seconds", "speedup", "efficiency",
+                  "hash_join_seconds", "transfer_seconds", "hash_join_work_ratio",
+                  "transfer_work_ratio"]
+
+
+def available_cores():
+    """Cores this process may run on (respects taskset/cgroup cpusets)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_thread_counts(cores):
+    """1, 2, 4, ... up to cores, plus cores when it is not a power of two."""
+    counts = []
+    t = 1
+    while t <= cores:
+        counts.append(t)
+        t *= 2
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def ratio(numerator, denominator):
+    return numerator / denominator if denominator else None
+
+
+def format_ratio(value):
+    return "" if value is None else f"{value:.3f}"
+
+
+def summarize(per_threads, thread_counts):
+    """Summary rows of one query and mode from {threads: [sample dicts]}."""
+    medians = {t: {key: median(s[key] for s in samples)
+                   for key in ("time_seconds", "hash_join_seconds", "transfer_seconds")
+                   if all(s.get(key) is not None for s in samples)}
+               for t, samples in per_threads.items() if samples}
+    base_threads = min(medians) if medians else None
+    base = medians.get(base_threads, {})
+    rows = []
+    for t in thread_counts:
+        if t not in medians:
+            continue
+        m = medians[t]
+        speedup = ratio(base["time_seconds"], m["time_seconds"])
+        rows.append({
+            "threads": t,
+            "median_seconds": format_seconds(m["time_seconds"]),
+            "speedup": format_ratio(speedup),
+            # speedup is over the smallest thread count swept, not over one thread
+            "efficiency": format_ratio(speedup / (t / base_threads) if speedup else None),
+            "hash_join_seconds": format_seconds(m.get("hash_join_seconds")),
+            "transfer_seconds": format_seconds(m.get("transfer_seconds")),
+            "hash_join_work_ratio": format_ratio(ratio(m.get("hash_join_seconds"),
+                                                       base.get("hash_join_seconds"))),
+            "transfer_work_ratio": format_ratio(ratio(m.get("transfer_seconds"),
+                                                      base.get("transfer_seconds"))),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run SSB queries at increasing DuckDB thread counts for baseline and RPT."
+    )
+    parser.add_argument("--baseline-bin", required=True)
+    parser.add_argument("--rpt-bin", required=True)
+    parser.add_argument("--db", default="db/ssb.duckdb",
+                        help="Path to DuckDB database file (opened read-only)")
+    parser.add_argument("--queries", nargs="+", default=None,
+                        help="Specific queries to run (default: all)")
+    parser.add_argument("--threads", type=int, nargs="+", default=None,
+                        help="Thread counts (default: 1, 2, 4, ... up to the core count)")
+    parser.add_argument("--reps", type=int, default=5,
+                        help="Repetitions per query, thread count and mode")
+    parser.add_argument("--profile", action="store_true",
+                        help="Also capture hash join and predicate transfer operator time")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for the mode order (default: random)")
+    parser.add_argument("--out", default="thread_sweep.csv",
+                        help="Per-execution output CSV")
+    parser.add_argument("--summary-out", default=None,
+                        help="Scaling summary CSV (default: <out>_summary.csv)")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    rng = random.Random(seed)
+    cores = available_cores()
+    thread_counts = sorted(set(args.threads)) if args.threads else default_thread_counts(cores)
+    print(f"Thread sweep over {thread_counts} ({cores} cores available), seed {seed}")
+    if max(thread_counts) > cores:
+        print(f"Warning: more threads than the {cores} available cores")
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path = Path(args.summary_out or out_path.with_name(f"{out_path.stem}_summary.csv"))
+    queries_to_run = args.queries if args.queries else list(QUERIES.keys())
+    bins = {"baseline": str(Path(args.baseline_bin)), "rpt": str(Path(args.rpt_bin))}
+    # samples[(query, mode)][threads] = [{time_seconds, hash_join_seconds, ...}]
+    samples = defaultdict(lambda: defaultdict(list))
+
+    with out_path.open("w", newline="") as f, tempfile.TemporaryDirectory() as profile_dir:
+        writer = csv.DictWriter(f, fieldnames=SWEEP_FIELDS)
+        writer.writeheader()
+        for threads in thread_counts:
+            print(f"\nthreads = {threads}")
+            sessions = {}
+            try:
+                for mode in MODES:
+                    sessions[mode] = PersistentSession(bins[mode], str(Path(args.db)),
+                                                       read_only=True,
+                                                       setup_sql=f"SET threads = {threads}")
+                for qname in queries_to_run:
+                    if qname not in QUERIES:
+                        print(f"Warning: Query {qname} not found, skipping")
+                        continue
+                    sql = QUERIES[qname]
+                    for mode in MODES:
+                        sessions[mode].execute(sql)  # warm-up
+                    for rep in range(1, args.reps + 1):
+                        order = list(MODES)
+                        rng.shuffle(order)
+                        for mode in order:
+                            profile_path = (Path(profile_dir) / f"{mode}.json"
+                                            if args.profile else None)
+                            result = sessions[mode].execute(sql, profile_path=profile_path)
+                            sample = {"time_seconds": result.wall_seconds,
+                                      "hash_join_seconds": None, "transfer_seconds": None}
+                            if result.profile is not None:
+                                summary = summarize_profile(result.profile)
+                                sample["hash_join_seconds"] = summary["hash_join_seconds"]
+                                sample["transfer_seconds"] = summary["transfer_seconds"]
+                            samples[(qname, mode)][threads].append(sample)
+                            writer.writerow({
+                                "threads": threads, "query": qname, "mode": mode, "rep": rep,
+                                "time_seconds": format_seconds(result.wall_seconds),
+                                "engine_seconds": format_seconds(result.engine_seconds),
+                                "hash_join_seconds": format_seconds(sample["hash_join_seconds"]),
+                                "transfer_seconds": format_seconds(sample["transfer_seconds"]),
+                            })
+                    print(f"  {qname:<6} " + "  ".join(
+                        f"{mode} {median(s['time_seconds'] for s in samples[(qname, mode)][threads]):.4f}s"
+                        for mode in MODES))
+            finally:
+                for session in sessions.values():
+                    session.close()
+
+    summaries = []
+    print(f"\n{'Query':<6} {'Mode':<9} " + " ".join(f"{f'{t}T':>7}" for t in thread_counts)
+          + f"   (speedup over {min(thread_counts)} thread"
+          + ("s)" if min(thread_counts) > 1 else ")"))
+    for qname in QUERIES:
+        for mode in MODES:
+            if (qname, mode) not in samples:
+                continue
+            rows = summarize(samples[(qname, mode)], thread_counts)
+            for row in rows:
+                summaries.append(dict(row, query=qname, mode=mode))
+            speedups = {row["threads"]: row["speedup"] for row in rows}
+            print(f"{qname:<6} {mode:<9} " + " ".join(f"{speedups.get(t, ''):>7}"
+                                                       for t in thread_counts))
+
+    with summary_path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summaries)
+    print(f"\nResults saved to: {out_path}")
+    print(f"Scaling summary saved to: {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
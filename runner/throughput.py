@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Concurrent multi-stream throughput test for baseline and RPT.
+
+Like the TPC throughput test, K client streams run at the same time against
+one database, each executing the 13 SSB queries in its own permuted order,
+then a new permutation, until --duration seconds have passed. Queries still
+running at the deadline finish and are counted. Each stream is one
+persistent read-only duckdb session; by default every session uses all
+cores, so the streams contend for CPU and memory bandwidth the way
+concurrent dashboard queries do (--threads-per-stream limits that).
+
+The two modes run one after the other, in an order drawn from the seed, and
+never against each other. Per mode the summary reports queries per hour
+(completed queries over the time until the last stream finished) and per
+query the p50/p95/p99 latency.
+
+Permutations come from --seed (logged), so a run can be replayed.
+"""
+
+import argparse
+import csv
+import random
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from ab_scheduler import MODES
+from duckdb_session import PersistentSession
+from join_order_sweep import percentile
+from run_experiments import QUERIES, format_seconds
+
+STREAM_FIELDS = ["seed", "mode", "streams", "stream", "seq", "permutation", "query",
+                 "start_seconds", "latency_seconds", "status"]
+SUMMARY_FIELDS = ["mode", "streams", "query", "executions", "errors", "p50_seconds",
+                  "p95_seconds", "p99_seconds", "mean_seconds"]
+THROUGHPUT_FIELDS = ["mode", "streams", "duration_seconds", "elapsed_seconds",
+                     "completed", "errors", "queries_per_hour"]
+
+
+def stream_permutation(seed, stream, permutation):
+    """Query order of one pass of one stream."""
+    order = list(QUERIES)
+    random.Random(f"{seed}-{stream}-{permutation}").shuffle(order)
+    return order
+
+
+class Stream(threading.Thread):
+    """One client: runs permutations of the queries until the deadline."""
+
+    def __init__(self, stream_id, session, seed, start, deadline, barrier):
+        super().__init__(daemon=True)
+        self.stream_id = stream_id
+        self.session = session
+        self.seed = seed
+        self.start_time = start
+        self.deadline = deadline
+        self.barrier = barrier
+        self.records = []
+        self.finished = None
+
+    def run(self):
+        self.barrier.wait()
+        # all streams start on the same clock tick
+        time.sleep(max(0.0, self.start_time - time.perf_counter()))
+        seq = 0
+        permutation = 0
+        try:
+            while time.perf_counter() < self.deadline:
+                for qname in stream_permutation(self.seed, self.stream_id, permutation):
+                    if time.perf_counter() >= self.deadline:
+                        break
+                    seq += 1
+                    began = time.perf_counter()
+                    try:
+                        latency = self.session.execute(QUERIES[qname]).wall_seconds
+                        status = "success"
+                    except RuntimeError as e:
+                        latency = time.perf_counter() - began
+                        status = f"error: {e}"
+                    self.records.append({
+                        "stream": self.stream_id, "seq": seq, "permutation": permutation,
+                        "query": qname, "start_seconds": began - self.start_time,
+                        "latency_seconds": latency, "status": status,
+                    })
+                    if self.session.process.poll() is not None:
+                        return  # session died; nothing more to run
+                permutation += 1
+        finally:
+            self.finished = time.perf_counter()
+
+
+def run_streams(bin_path, db_path, streams, duration, seed, setup_sql=None, warmup=True):
+    """Run K streams for duration seconds; returns (records, elapsed seconds)."""
+    sessions = []
+    try:
+        for _ in range(streams):
+            sessions.append(PersistentSession(bin_path, db_path, read_only=True,
+                                              setup_sql=setup_sql))
+        if warmup:
+            # every session has run every query once before the clock starts
+            for session in sessions:
+                for sql in QUERIES.values():
+                    session.execute(sql)
+        barrier = threading.Barrier(streams + 1)
+        start = time.perf_counter() + 0.1
+        workers = [Stream(i + 1, session, seed, start, start + duration, barrier)
+                   for i, session in enumerate(sessions)]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        for worker in workers:
+            worker.join()
+        elapsed = max(worker.finished for worker in workers) - start
+        records = [r for worker in workers for r in worker.records]
+        return sorted(records, key=lambda r: r["start_seconds"]), elapsed
+    finally:
+        for session in sessions:
+            session.close()
+
+
+def summarize(mode, streams, duration, records, elapsed):
+    """(throughput row, per-query latency rows) of one mode."""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    for r in records:
+        if r["status"] == "success":
+            latencies[r["query"]].append(r["latency_seconds"])
+        else:
+            errors[r["query"]] += 1
+    completed = sum(len(v) for v in latencies.values())
+    throughput = {
+        "mode": mode, "streams": streams, "duration_seconds": duration,
+        "elapsed_seconds": f"{elapsed:.3f}", "completed": completed,
+        "errors": sum(errors.values()),
+        "queries_per_hour": f"{completed / elapsed * 3600:.1f}" if elapsed > 0 else "",
+    }
+    per_query = []
+    for qname in QUERIES:
+        values = latencies.get(qname, [])
+        row = {"mode": mode, "streams": streams, "query": qname,
+               "executions": len(values), "errors": errors.get(qname, 0)}
+        if values:
+            row.update({
+                "p50_seconds": format_seconds(percentile(values, 50)),
+                "p95_seconds": format_seconds(percentile(values, 95)),
+                "p99_seconds": format_seconds(percentile(values, 99)),
+                "mean_seconds": format_seconds(sum(values) / len(values)),
+            })
+        per_query.append(row)
+    return throughput, per_query
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run K concurrent SSB query streams against baseline and RPT."
+    )
+    parser.add_argument("--baseline-bin", required=True)
+    parser.add_argument("--rpt-bin", required=True)
+    parser.add_argument("--db", default="db/ssb.duckdb",
+                        help="Path to DuckDB database file (opened read-only)")
+    parser.add_argument("--streams", type=int, nargs="+", default=[4],
+                        help="Concurrent streams; several values run one test each")
+    parser.add_argument("--duration", type=float, default=300,
+                        help="Seconds each test admits new queries")
+    parser.add_argument("--threads-per-stream", type=int, default=None,
+                        help="SET threads in every session (default: DuckDB's default)")
+    parser.add_argument("--no-warmup", action="store_true",
+                        help="Do not run every query once per session before timing")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for the permutations and mode order (default: random)")
+    parser.add_argument("--out", default="throughput.csv",
+                        help="Per-execution output CSV")
+    parser.add_argument("--sf", default=None,
+                        help="Scale factor of the database, recorded with the run")
+    parser.add_argument("--store", default=None,
+                        help="Also record the runs in this results store")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    rng = random.Random(seed)
+    print(f"Throughput test seed: {seed}")
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path = out_path.with_name(f"{out_path.stem}_summary.csv")
+    latency_path = out_path.with_name(f"{out_path.stem}_latency.csv")
+    bins = {"baseline": str(Path(args.baseline_bin)), "rpt": str(Path(args.rpt_bin))}
+    db_path = str(Path(args.db))
+    setup_sql = (f"SET threads = {args.threads_per_stream}"
+                 if args.threads_per_stream else None)
+
+    summaries, latency_rows = [], []
+    with out_path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=STREAM_FIELDS)
+        writer.writeheader()
+        for streams in args.streams:
+            order = list(MODES)
+            rng.shuffle(order)
+            for mode in order:
+                print(f"\n{mode}: {streams} stream(s) for {args.duration:.0f}s")
+                run = None
+                if args.store:
+                    from results_store import new_run
+                    run = new_run("throughput", mode, args.sf, bins[mode], db_path,
+                                  "persistent")
+                records, elapsed = run_streams(bins[mode], db_path, streams, args.duration,
+                                               seed, setup_sql, not args.no_warmup)
+                rows = []
+                for r in records:
+                    row = dict(r, seed=seed, mode=mode, streams=streams)
+                    row["start_seconds"] = format_seconds(r["start_seconds"])
+                    row["latency_seconds"] = format_seconds(r["latency_seconds"])
+                    writer.writerow(row)
+                    rows.append(row)
+                throughput, per_query = summarize(mode, streams, args.duration, records, elapsed)
+                summaries.append(throughput)
+                latency_rows.extend(per_query)
+                print(f"  {throughput['completed']} queries in {elapsed:.1f}s: "
+                      f"{throughput['queries_per_hour']} queries/hour "
+                      f"({throughput['errors']} errors)")
+                for row in per_query:
+                    if row["executions"]:
+                        print(f"  {row['query']:<6} p50 {row['p50_seconds']}s  "
+                              f"p95 {row['p95_seconds']}s  p99 {row['p99_seconds']}s")
+                if run is not None:
+                    from results_store import record
+                    record(run, rows, args.store)
+
+    with summary_path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=THROUGHPUT_FIELDS)
+        writer.writeheader()
+        writer.writerows(summaries)
+    with latency_path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(latency_rows)
+    print(f"\nResults saved to: {out_path}")
+    print(f"Throughput saved to: {summary_path}")
+    print(f"Latency percentiles saved to: {latency_path}")
+
+
+if __name__ == "__main__":
+    main()